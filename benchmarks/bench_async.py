@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+# Measures request latency percentiles, and how long the event loop stalls,
+# when concurrent clients compile programs in one asyncio loop: calling
+# compile_minic directly, and through AsyncCompiler with a thread pool and
+# with a process pool. A quarter of the requests repeat a source that another
+# client compiles at the same time.
+#
+# Usage: python -m benchmarks.bench_async [num_clients] [requests_per_client]
+#                                         [num_statements]
+
+import asyncio
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from minic.async_compiler import AsyncCompiler
+from minic.compiler import compile_minic
+from minic.driver import available_cpus
+
+
+def gen_code(seed: int, num_statements: int) -> str:
+    lines = [f"a = {seed}"]
+    for idx in range(num_statements):
+        lines.append(f"a = a * {idx + 3} + {idx}")
+        lines.append("print a / 7")
+
+    return "\n".join(lines) + "\n"
+
+
+async def measure_loop_lag(lags: list[float], stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - start - 0.001)
+
+
+async def run_load(compile_fn, num_clients, requests_per_client, num_statements):
+    latencies = []
+    lags = []
+    stop = asyncio.Event()
+    ticker = asyncio.ensure_future(measure_loop_lag(lags, stop))
+
+    async def client(client_idx: int):
+        for request_idx in range(requests_per_client):
+            seed = client_idx * requests_per_client + request_idx
+            if seed % 4 == 0:
+                seed = request_idx
+            code = gen_code(seed, num_statements)
+
+            start = time.perf_counter()
+            await compile_fn(code)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(idx) for idx in range(num_clients)))
+    seconds = time.perf_counter() - start
+    stop.set()
+    await ticker
+
+    return latencies, max(lags, default=0.0), seconds
+
+
+def main():
+    num_clients = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    requests_per_client = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    num_statements = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    num_requests = num_clients * requests_per_client
+
+    async def blocking(code):
+        return compile_minic(code)
+
+    thread_pool = ThreadPoolExecutor(max_workers=available_cpus())
+    process_pool = ProcessPoolExecutor(max_workers=available_cpus())
+    modes = [
+        ("blocking", blocking),
+        ("threads", AsyncCompiler(thread_pool).compile),
+        ("processes", AsyncCompiler(process_pool).compile),
+    ]
+
+    print(f"{num_requests} requests, {available_cpus()} CPUs")
+    print(
+        f"{'':>10}  {'p50 ms':>8}  {'p90 ms':>8}  {'p99 ms':>8}  {'lag ms':>8}  req/s"
+    )
+    for label, compile_fn in modes:
+        latencies, max_lag, seconds = asyncio.run(
+            run_load(compile_fn, num_clients, requests_per_client, num_statements)
+        )
+        p50, p90, p99 = (
+            statistics.quantiles(latencies, n=100)[idx] * 1e3 for idx in (49, 89, 98)
+        )
+        print(
+            f"{label:>10}  {p50:8.1f}  {p90:8.1f}  {p99:8.1f}"
+            f"  {max_lag * 1e3:8.1f}  {num_requests / seconds:5.1f}"
+        )
+
+    thread_pool.shutdown()
+    process_pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
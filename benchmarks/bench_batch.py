@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+# Compares the throughput of compiling many small files with one invocation
+# of minic.py per file, and with a single batch invocation that compiles them
+# all in a process pool.
+#
+# Usage: python -m benchmarks.bench_batch [num_files] [num_statements]
+
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from minic.driver import available_cpus
+
+MINIC = Path(__file__).parent.parent / "minic.py"
+
+
+def gen_code(file_idx: int, num_statements: int) -> str:
+    lines = [f"a = {file_idx}"]
+    for idx in range(num_statements):
+        lines.append(f"a = a * {idx + 3} + {idx}")
+        lines.append("print a")
+
+    return "\n".join(lines) + "\n"
+
+
+def compile_serially(paths: list[Path]):
+    for path in paths:
+        subprocess.run([sys.executable, MINIC, path], check=True)
+
+
+def compile_in_batch(paths: list[Path]):
+    subprocess.run([sys.executable, MINIC, *paths], check=True)
+
+
+def main():
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    num_statements = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for file_idx in range(num_files):
+            path = Path(tmp) / f"file{file_idx}.mc"
+            path.write_text(gen_code(file_idx, num_statements))
+            paths.append(path)
+
+        print(f"{num_files} files, {available_cpus()} CPUs")
+
+        outputs = []
+        for label, compile_all in [
+            ("serial", compile_serially),
+            ("batch", compile_in_batch),
+        ]:
+            start = time.perf_counter()
+            compile_all(paths)
+            seconds = time.perf_counter() - start
+            outputs.append([path.with_suffix(".S").read_text() for path in paths])
+            print(f"{label:>8}: {num_files / seconds:8.1f} files/s")
+
+        assert outputs[0] == outputs[1]
+
+
+if __name__ == "__main__":
+    main()
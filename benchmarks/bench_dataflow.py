@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+# Measures how the time to solve liveness and reaching definitions, and to
+# walk the live registers after each instruction, grows with the size of
+# straight-line programs. The time per instruction should stay roughly flat.
+#
+# Usage: python -m benchmarks.bench_dataflow [max_num_instrs]
+
+import sys
+import time
+
+from minic.dataflow import (compute_liveness, compute_reaching_defs,
+                            measure_register_pressure)
+from minic.ir import (BinOp, BinOpInstr, LoadLiteralInstr, LoadRegInstr,
+                      PrintInstr, Program, Reg)
+
+RUNS = 3
+NUM_MACHINE_REGS = 14
+
+
+# Each instruction reads recent registers and one of the first two, so that
+# some registers stay live across the whole program.
+def gen_program(num_instrs: int) -> Program:
+    instructions = [LoadLiteralInstr(Reg(0), 1), LoadLiteralInstr(Reg(1), 3)]
+    ops = list(BinOp)
+
+    while len(instructions) < num_instrs:
+        idx = len(instructions)
+        match idx % 4:
+            case 0:
+                instructions.append(LoadRegInstr(Reg(idx), Reg(idx - 1)))
+            case 1:
+                instructions.append(PrintInstr(Reg(idx - 2)))
+            case _:
+                instructions.append(
+                    BinOpInstr(Reg(idx), ops[idx % 3], Reg(idx - 1), Reg(idx % 2))
+                )
+
+    return Program(instructions=instructions)
+
+
+def best_time(fn) -> float:
+    best = float("inf")
+
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main():
+    max_num_instrs = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    num_instrs = 10_000
+
+    print(
+        f"{'instrs':>9}  {'liveness':>16}  {'reaching defs':>16}"
+        f"  {'register pressure':>16}"
+    )
+
+    while num_instrs <= max_num_instrs:
+        program = gen_program(num_instrs)
+        row = [f"{num_instrs:>9}"]
+
+        for analysis in [
+            compute_liveness,
+            compute_reaching_defs,
+            lambda program: measure_register_pressure(program, NUM_MACHINE_REGS),
+        ]:
+            elapsed = best_time(lambda: analysis(program))
+            row.append(f"{elapsed * 1e3:7.1f} ms {elapsed / num_instrs * 1e9:4.0f} ns")
+
+        print("  ".join(row))
+        num_instrs *= 10
+
+
+if __name__ == "__main__":
+    main()
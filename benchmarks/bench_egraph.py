@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+# Measures the compile time and the run time of native code for statements
+# that the `egraph` pass simplifies, such as `a*b + a*c` and `(x + y) - y`,
+# with and without the pass. Uses the C driver of bench_reassociate, which
+# calls the generated `main` repeatedly.
+#
+# Usage: python -m benchmarks.bench_egraph [num_statements]
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.bench_reassociate import build, run
+
+BASE_PASSES = ("cse", "copy-prop", "dce")
+
+
+def gen_code(num_statements: int) -> str:
+    lines = [f"{name} = {idx + 2} / 1" for idx, name in enumerate("abc")]
+    lines.append("x = 0 / 1")
+
+    for idx in range(num_statements):
+        lines.append(f"t = x * a + x * b - x * c + {idx}")
+        lines.append("x = (t + c) - c + a * 2")
+
+    lines.append("print x")
+
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    num_statements = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    code = gen_code(num_statements)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+        outputs = []
+
+        for label, ir_passes in [
+            ("base", BASE_PASSES),
+            ("egraph", ("cse", "egraph", *BASE_PASSES[1:])),
+        ]:
+            exe_path = out_dir / label
+            start = time.perf_counter()
+            num_instrs = build(code, ir_passes, (), exe_path)
+            compile_time = time.perf_counter() - start
+            elapsed, output = run(exe_path)
+            outputs.append(output)
+            print(
+                f"{label:>8}: {num_instrs:8} instrs, {elapsed * 1e6:8.1f} us,"
+                f" compiled in {compile_time:.2f} s"
+            )
+
+        assert len(set(outputs)) == 1
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+# Compares building an executable from assembly text (compile_minic + as + cc)
+# with building it from a directly emitted object (compile_minic_object + cc).
+#
+# Usage: python -m benchmarks.bench_elf [num_statements]
+
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from minic.compiler import compile_minic, compile_minic_object
+
+RUNS = 10
+
+
+def build_from_text(code: str, out_dir: Path):
+    asm_path = out_dir / "text.S"
+    obj_path = out_dir / "text.o"
+    asm_path.write_text(compile_minic(code))
+    subprocess.run(["as", "-o", obj_path, asm_path], check=True)
+
+    return obj_path
+
+
+def build_from_object(code: str, out_dir: Path):
+    obj_path = out_dir / "direct.o"
+    obj_path.write_bytes(compile_minic_object(code))
+
+    return obj_path
+
+
+def link(obj_path: Path):
+    subprocess.run(["cc", "-o", obj_path.with_suffix(""), obj_path], check=True)
+
+
+def best_time(fn) -> float:
+    best = float("inf")
+
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main():
+    num_statements = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    code = "a = 1\nb = 3\n" + "a = a * 10 + b / 2\nprint a\n" * num_statements
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+
+        for label, build in [
+            ("text + as", build_from_text),
+            ("direct", build_from_object),
+        ]:
+            to_object = best_time(lambda: build(code, out_dir))
+            end_to_end = best_time(lambda: link(build(code, out_dir)))
+
+            print(
+                f"{label:>10}: to object {to_object * 1e3:8.2f} ms, "
+                f"end to end {end_to_end * 1e3:8.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
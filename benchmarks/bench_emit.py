@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+# Compares the throughput of writing a program's assembly to a file with
+# X86_64_Program.dump and with the emitter of minic.x86_64_emit, at each
+# optimization level.
+#
+# Usage: python -m benchmarks.bench_emit [num_statements]
+
+import gc
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from minic.compiler import gen_x86_64_program
+from minic.pass_manager import OPT_LEVELS
+from minic.x86_64 import X86_64_Program
+from minic.x86_64_emit import write_program
+
+RUNS = 20
+
+
+def gen_code(num_statements: int) -> str:
+    lines = ["a = 1", "b = 2"]
+    for idx in range(num_statements // 2):
+        lines.append(f"a = (a * {idx % 13 + 3} + b) / {idx % 5 + 1} - {idx}")
+        lines.append("print a + b")
+
+    return "\n".join(lines) + "\n"
+
+
+def write_with_dump(program: X86_64_Program, path: Path):
+    with path.open("wb") as out_file:
+        out_file.write(program.dump().encode())
+
+
+def write_with_emitter(program: X86_64_Program, path: Path):
+    with path.open("wb") as out_file:
+        write_program(program, out_file)
+
+
+# The two are interleaved, so that both see the same noise.
+def best_times(program: X86_64_Program, path: Path) -> tuple[float, float]:
+    best = [float("inf"), float("inf")]
+
+    for _ in range(RUNS):
+        for idx, write in enumerate([write_with_dump, write_with_emitter]):
+            gc.collect()
+            start = time.perf_counter()
+            write(program, path)
+            best[idx] = min(best[idx], time.perf_counter() - start)
+
+    return best[0], best[1]
+
+
+def main():
+    num_statements = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    code = gen_code(num_statements)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "prog.S"
+
+        for opt_level in OPT_LEVELS:
+            program = gen_x86_64_program(code, opt_level=opt_level)
+            size = len(program.dump().encode())
+            dump_time, emit_time = best_times(program, path)
+
+            print(
+                f"-O{opt_level}: {size / 2**20:6.2f} MiB,"
+                f" dump {size / dump_time / 2**20:6.1f} MiB/s,"
+                f" emitter {size / emit_time / 2**20:6.1f} MiB/s"
+                f" ({dump_time / emit_time:.2f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+
+# Compares evaluating a program over many parameter sets with one batched
+# evaluation against regenerating and running the source once per set.
+#
+# Usage: python -m benchmarks.bench_ir_batch [max_batch_size]
+
+import sys
+import time
+
+import numpy as np
+
+from minic.compiler import run_minic
+from minic.ir_batch import eval_minic_batch
+
+CODE = """
+y = x * x - 3 * x + 7
+z = (y / (x + 1000)) * 5 - y / 7
+print y
+print z
+print z * z - y
+"""
+
+
+def per_program(xs: np.ndarray):
+    for x in xs.tolist():
+        run_minic(f"x = {x}\n" + CODE)
+
+
+def batched(xs: np.ndarray):
+    eval_minic_batch("x = 0\n" + CODE, {"x": xs})
+
+
+def main():
+    max_batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    batch_size = 1
+
+    while batch_size <= max_batch_size:
+        xs = np.arange(batch_size, dtype=np.int64)
+        runs = [("batched", batched)]
+        if batch_size <= 10_000:
+            runs.append(("per program", per_program))
+
+        for label, fn in runs:
+            start = time.perf_counter()
+            fn(xs)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{batch_size:>9} rows, {label:>11}: {elapsed * 1e3:9.2f} ms, "
+                f"{batch_size / elapsed:14,.0f} rows/s"
+            )
+
+        batch_size *= 10
+
+
+if __name__ == "__main__":
+    main()
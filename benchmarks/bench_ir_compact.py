@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+# Compares the memory used per instruction and the throughput of a simple
+# analysis pass (counting uses of each register) between `Program` and
+# `CompactProgram`.
+#
+# Usage: python -m benchmarks.bench_ir_compact [num_instrs]
+
+import sys
+import time
+import tracemalloc
+
+from minic.ir import (BinOp, BinOpInstr, LoadLiteralInstr, LoadRegInstr,
+                      PrintInstr, Program, Reg)
+from minic.ir_compact import (OP_LOAD_LITERAL, OP_LOAD_REG, OP_PRINT,
+                              CompactProgram, compact_program, expand_program)
+
+RUNS = 3
+
+
+def gen_program(num_instrs: int) -> Program:
+    instructions = [LoadLiteralInstr(Reg(0), 1), LoadLiteralInstr(Reg(1), 3)]
+    ops = list(BinOp)
+
+    while len(instructions) < num_instrs:
+        idx = len(instructions)
+        match idx % 4:
+            case 0:
+                instructions.append(LoadRegInstr(Reg(idx), Reg(idx - 1)))
+            case 1:
+                instructions.append(PrintInstr(Reg(idx - 2)))
+            case _:
+                instructions.append(
+                    BinOpInstr(Reg(idx), ops[idx % 3], Reg(idx - 1), Reg(idx % 2))
+                )
+
+    return Program(instructions=instructions)
+
+
+def count_uses(program: Program) -> list[int]:
+    uses = [0] * len(program.instructions)
+
+    for instr in program.instructions:
+        match instr:
+            case LoadRegInstr(_, in_reg):
+                uses[in_reg.idx] += 1
+            case BinOpInstr(_, _, left_reg, right_reg):
+                uses[left_reg.idx] += 1
+                uses[right_reg.idx] += 1
+            case PrintInstr(arg_reg):
+                uses[arg_reg.idx] += 1
+
+    return uses
+
+
+def count_uses_compact(compact: CompactProgram) -> list[int]:
+    uses = [0] * len(compact)
+
+    for opcode, _, src1, src2, _ in compact:
+        if opcode == OP_LOAD_LITERAL:
+            continue
+        uses[src1] += 1
+        if opcode != OP_LOAD_REG and opcode != OP_PRINT:
+            uses[src2] += 1
+
+    return uses
+
+
+def measure_memory(build) -> tuple[object, int]:
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, size
+
+
+def best_time(fn) -> float:
+    best = float("inf")
+
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main():
+    num_instrs = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    program, program_size = measure_memory(lambda: gen_program(num_instrs))
+    compact, compact_size = measure_memory(lambda: compact_program(program))
+    assert count_uses(program) == count_uses_compact(compact)
+
+    print(f"{num_instrs:,} instructions")
+    print(f"    Program: {program_size / num_instrs:6.1f} bytes/instr")
+    print(f"    compact: {compact_size / num_instrs:6.1f} bytes/instr")
+
+    for label, fn in [
+        ("count uses, Program", lambda: count_uses(program)),
+        ("count uses, compact", lambda: count_uses_compact(compact)),
+        ("compact_program", lambda: compact_program(program)),
+        ("expand_program", lambda: expand_program(compact)),
+    ]:
+        elapsed = best_time(fn)
+        print(f"{label:>20}: {num_instrs / elapsed / 1e6:6.2f} M instrs/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+# Compares loading serialized IR with rerunning the front end (scanner,
+# parser and IrGen) on the source it came from.
+#
+# Usage: python -m benchmarks.bench_ir_serial [num_statements]
+
+import io
+import sys
+import time
+
+from minic.compiler import gen_ir_program
+from minic.ir_serial import read_ir, write_ir
+
+RUNS = 5
+
+
+def best_time(fn) -> float:
+    best = float("inf")
+
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main():
+    num_statements = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    code = "a = 1\nb = 3\n" + "a = a * 10 + b / 2 - a\nprint a\n" * num_statements
+
+    program = gen_ir_program(code)
+    stream = io.BytesIO()
+    write_ir(program.instructions, stream)
+    data = stream.getvalue()
+    assert read_ir(io.BytesIO(data)) == program
+
+    front_end = best_time(lambda: gen_ir_program(code))
+    load = best_time(lambda: read_ir(io.BytesIO(data)))
+    store = best_time(lambda: write_ir(program.instructions, io.BytesIO()))
+
+    num_instrs = len(program.instructions)
+    print(f"{num_instrs:,} instructions")
+    print(f"   source: {len(code):>10,} bytes")
+    print(f"       IR: {len(data):>10,} bytes ({len(data) / num_instrs:.1f}/instr)")
+    print(f"front end: {front_end * 1e3:8.1f} ms")
+    print(f"  load IR: {load * 1e3:8.1f} ms ({load / front_end:.0%} of front end)")
+    print(f" store IR: {store * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+# Compares the latency of running a small program in-process with the JIT
+# against building it natively (compile_minic_object + cc) and running it.
+#
+# Usage: python -m benchmarks.bench_jit [num_programs]
+
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from minic.compiler import compile_minic_object, run_minic_jit
+
+
+def gen_code(seed: int) -> str:
+    return f"a = {seed}\nb = a * 7 + 3\nprint b\nprint b / 2\nprint a - b\n"
+
+
+def run_native(code: str, out_dir: Path) -> str:
+    obj_path = out_dir / "prog.o"
+    exe_path = out_dir / "prog"
+    obj_path.write_bytes(compile_minic_object(code))
+    subprocess.run(["cc", "-o", exe_path, obj_path], check=True)
+
+    return subprocess.run([exe_path], capture_output=True, check=True, text=True).stdout
+
+
+def time_per_program(run, programs: list[str]) -> float:
+    start = time.perf_counter()
+
+    for code in programs:
+        run(code)
+
+    return (time.perf_counter() - start) / len(programs)
+
+
+def main():
+    num_programs = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    programs = [gen_code(seed) for seed in range(num_programs)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+
+        for code in programs[:10]:
+            assert run_minic_jit(code) == run_native(code, out_dir)
+
+        native = time_per_program(lambda code: run_native(code, out_dir), programs)
+
+    jit = time_per_program(run_minic_jit, programs)
+
+    print(f"native: {native * 1e6:10.1f} us/program")
+    print(f"   jit: {jit * 1e6:10.1f} us/program ({native / jit:.0f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
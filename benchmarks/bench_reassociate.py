@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+# Measures the run time of native code for long chains of additions and
+# multiplications, with and without the `reassociate` pass. Operands are
+# divided by one so that they aren't literals, and constant folding is left
+# out of both pipelines, so that all the arithmetic happens at run time.
+# The generated `main` is renamed and called repeatedly from a C driver, so
+# that process startup doesn't drown the difference.
+#
+# Usage: python -m benchmarks.bench_reassociate [num_statements] [chain_length]
+
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from minic.compiler import gen_unoptimized_ir_program
+from minic.elf import write_elf_object
+from minic.pass_manager import FULL_LOWERING, PassManager, Pipeline
+
+RUNS = 1000
+
+DRIVER_C = r"""
+#include <stdio.h>
+#include <time.h>
+
+int minic_main(void);
+
+int main(void) {
+    double best = 1e9;
+    for (int run = 0; run < %d; run++) {
+        struct timespec start, end;
+        clock_gettime(CLOCK_MONOTONIC, &start);
+        minic_main();
+        clock_gettime(CLOCK_MONOTONIC, &end);
+        double elapsed = (end.tv_sec - start.tv_sec) + (end.tv_nsec - start.tv_nsec) * 1e-9;
+        if (elapsed < best) best = elapsed;
+    }
+    fprintf(stderr, "%%.9f\n", best);
+    return 0;
+}
+""" % RUNS
+
+BASE_PASSES = ("cse", "copy-prop", "dce")
+
+
+def gen_code(num_statements: int, chain_length: int) -> str:
+    lines = [f"a{idx} = {idx + 2} / 1" for idx in range(chain_length)]
+    lines.append("x = 0 / 1")
+    lines.append("y = 1 / 1")
+
+    for _ in range(num_statements):
+        terms = [f"a{idx}" for idx in range(chain_length)]
+        lines.append("x = x + " + " + ".join(terms))
+        lines.append("y = y * " + " * ".join(terms))
+
+    lines.append("print x")
+    lines.append("print y")
+
+    return "\n".join(lines) + "\n"
+
+
+def build(
+    code: str,
+    ir_passes: tuple[str, ...],
+    machine_passes: tuple[str, ...],
+    exe_path: Path,
+    codegen_options: dict[str, bool] = FULL_LOWERING,
+    avx2: bool = False,
+) -> int:
+    pass_manager = PassManager()
+    pass_manager.pipeline = Pipeline(
+        ir_passes=ir_passes,
+        codegen_options=codegen_options,
+        machine_passes=machine_passes,
+    )
+    ir_program = pass_manager.run_ir_passes(gen_unoptimized_ir_program(code))
+    x86_64_program = pass_manager.run_machine_passes(
+        pass_manager.lower(ir_program, avx2=avx2)
+    )
+
+    obj_path = exe_path.with_suffix(".o")
+    obj_path.write_bytes(write_elf_object(x86_64_program))
+    subprocess.run(
+        ["objcopy", "--redefine-sym", "main=minic_main", obj_path], check=True
+    )
+    driver_path = exe_path.with_suffix(".c")
+    driver_path.write_text(DRIVER_C)
+    subprocess.run(["cc", "-O2", "-o", exe_path, driver_path, obj_path], check=True)
+
+    return len(x86_64_program.instructions)
+
+
+# Returns the best time of a call to the program's `main`, and its output.
+def run(exe_path: Path) -> tuple[float, bytes]:
+    result = subprocess.run([exe_path], capture_output=True, check=True)
+
+    return float(result.stderr), result.stdout
+
+
+def main():
+    num_statements = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    chain_length = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    code = gen_code(num_statements, chain_length)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+        outputs = []
+
+        for machine_passes in [(), ("store-forward",)]:
+            print(f"machine passes: {', '.join(machine_passes) or 'none'}")
+
+            for label, ir_passes in [
+                ("chains", BASE_PASSES),
+                ("reassociated", (*BASE_PASSES, "reassociate")),
+            ]:
+                exe_path = out_dir / label
+                num_instrs = build(code, ir_passes, machine_passes, exe_path)
+                elapsed, output = run(exe_path)
+                outputs.append(output)
+                print(f"{label:>14}: {num_instrs:8} instrs, {elapsed * 1e6:8.1f} us")
+
+        # Each run prints the same values again.
+        assert len(set(outputs)) == 1
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+# Compares the freestanding runtime against the libc build: startup time of an
+# empty program and per-print cost of a print-heavy one.
+#
+# Usage: python -m benchmarks.bench_runtime [num_prints]
+
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from minic.compiler import compile_minic
+
+RUNS = 20
+
+
+def build(code: str, out_dir: Path, name: str, freestanding: bool) -> Path:
+    asm_path = out_dir / f"{name}.S"
+    exe_path = out_dir / name
+    asm_path.write_text(compile_minic(code, freestanding=freestanding))
+
+    flags = ["-nostdlib", "-static"] if freestanding else []
+    subprocess.run(["cc", *flags, "-o", exe_path, asm_path], check=True)
+
+    return exe_path
+
+
+def time_exe(exe_path: Path) -> float:
+    best = float("inf")
+
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        subprocess.run([exe_path], stdout=subprocess.DEVNULL, check=True)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main():
+    num_prints = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    empty_code = "a = 0\n"
+    prints_code = "a = 1\n" + "a = a * 3\nprint a\n" * num_prints
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+
+        for freestanding in [False, True]:
+            label = "freestanding" if freestanding else "libc"
+            empty = build(empty_code, out_dir, f"empty_{label}", freestanding)
+            prints = build(prints_code, out_dir, f"prints_{label}", freestanding)
+
+            startup = time_exe(empty)
+            per_print = (time_exe(prints) - startup) / num_prints
+
+            print(
+                f"{label:>12}: startup {startup * 1e6:9.1f} us, "
+                f"per print {per_print * 1e9:7.1f} ns"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+# Measures the run time of native code that mixes divisions with independent
+# additions and multiplications, with and without the `schedule` pass. The
+# divisors are computed at run time, so that each division stays an `idiv`.
+# Uses the C driver of bench_reassociate, which calls the generated `main`
+# repeatedly.
+#
+# Usage: python -m benchmarks.bench_schedule [num_statements]
+
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.bench_reassociate import build, run
+
+IR_PASSES = ("cse", "copy-prop", "dce")
+
+
+def gen_code(num_statements: int) -> str:
+    lines = [f"a{idx} = {idx + 3} / 1" for idx in range(8)]
+    lines.append("x = 1000000007 / 1")
+    lines.append("y = 0 / 1")
+
+    for idx in range(num_statements):
+        a, b, c = (f"a{(idx + offset) % 8}" for offset in range(3))
+        lines.append(f"x = x / {a} + {b} * {c}")
+        lines.append(f"y = y + {b} * {c} - {a}")
+
+    lines.append("print x")
+    lines.append("print y")
+
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    num_statements = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    code = gen_code(num_statements)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+        outputs = []
+
+        for label, machine_passes in [
+            ("in IR order", ("store-forward",)),
+            ("scheduled", ("store-forward", "schedule")),
+        ]:
+            exe_path = out_dir / label.replace(" ", "_")
+            num_instrs = build(code, IR_PASSES, machine_passes, exe_path)
+            elapsed, output = run(exe_path)
+            outputs.append(output)
+            print(f"{label:>12}: {num_instrs:8} instrs, {elapsed * 1e6:8.1f} us")
+
+        assert len(set(outputs)) == 1
+
+
+if __name__ == "__main__":
+    main()
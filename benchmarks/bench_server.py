@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+# Compares the latency of compiling a small file by running minic.py, by
+# running the thin client against a compile server, and by sending requests
+# over an open connection to the server, with and without its cache.
+#
+# Usage: python -m benchmarks.bench_server [num_requests]
+
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from minic.client import CompileClient
+
+MINIC = Path(__file__).parent.parent / "minic.py"
+
+CODE = """
+a = 7
+b = a * 10 - 3
+print b
+print b / 4
+c = b * b / a
+print c
+"""
+
+
+def median_ms(run, num_requests: int) -> float:
+    times = []
+    for _ in range(num_requests):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    return statistics.median(times) * 1e3
+
+
+def main():
+    num_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "file.mc"
+        path.write_text(CODE)
+        socket_path = Path(tmp) / "sock"
+
+        server = subprocess.Popen(
+            [sys.executable, "-m", "minic.server", socket_path, "--cache"],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        # The server reports when it's listening.
+        server.stdout.readline()
+
+        try:
+            cold = [sys.executable, MINIC, path]
+            thin_client = [sys.executable, "-m", "minic.client", socket_path, path]
+            with CompileClient(socket_path) as client:
+                latencies = [
+                    ("minic.py", lambda: subprocess.run(cold, check=True)),
+                    ("client", lambda: subprocess.run(thin_client, check=True)),
+                    # Each request differs, so that the cache misses.
+                    (
+                        "request",
+                        lambda: client.compile(f"{CODE}print {time.time_ns()}\n"),
+                    ),
+                    ("cached", lambda: client.compile(CODE)),
+                ]
+                for label, run in latencies:
+                    print(f"{label:>10}: {median_ms(run, num_requests):8.2f} ms")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+# Reports the peak number of live IR registers and the number of spills on a
+# machine with 14 allocatable registers, with IR generated left to right and
+# in Sethi-Ullman order, for deep and unbalanced expressions.
+#
+# Usage: python -m benchmarks.bench_sethi_ullman [num_leaves]
+
+import random
+import sys
+
+from minic.dataflow import measure_register_pressure
+from minic.pass_manager import PassManager, Pipeline
+
+# The x86-64 general purpose registers, without rsp and rbp.
+NUM_MACHINE_REGS = 14
+
+OPS = ["+", "-", "*", "/"]
+
+
+# Each leaf is a distinct literal, so that interning them doesn't stretch
+# their live ranges over the whole program.
+class ExprGen:
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.next_literal = 1
+
+    def leaf(self) -> str:
+        self.next_literal += 1
+        return str(self.next_literal)
+
+    def op(self) -> str:
+        return self.rng.choice(OPS)
+
+    def left_deep(self, num_leaves: int) -> str:
+        expr = self.leaf()
+        for _ in range(num_leaves - 1):
+            expr = f"{expr} {self.op()} {self.leaf()}"
+        return expr
+
+    def right_deep(self, num_leaves: int) -> str:
+        expr = self.leaf()
+        for _ in range(num_leaves - 1):
+            expr = f"{self.leaf()} {self.op()} ({expr})"
+        return expr
+
+    def random_tree(self, num_leaves: int) -> str:
+        if num_leaves == 1:
+            return self.leaf()
+
+        num_left = self.rng.randint(1, num_leaves - 1)
+        left = self.random_tree(num_left)
+        right = self.random_tree(num_leaves - num_left)
+        return f"({left}) {self.op()} ({right})"
+
+
+def measure(code: str, sethi_ullman: bool):
+    pass_manager = PassManager()
+    pass_manager.pipeline = Pipeline(
+        ir_passes=("cse",),
+        codegen_options={},
+        machine_passes=(),
+        irgen_options=dict(sethi_ullman=sethi_ullman),
+    )
+    program = pass_manager.run_ir_passes(pass_manager.gen_ir(code))
+
+    return measure_register_pressure(program, NUM_MACHINE_REGS)
+
+
+def main():
+    num_leaves = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 20 * num_leaves))
+    expr_gen = ExprGen(seed=0)
+
+    print(f"{'':>11}  {'left to right':>15}  {'sethi-ullman':>15}")
+    print(f"{'':>11}  {'peak':>6} {'spills':>8}  {'peak':>6} {'spills':>8}")
+
+    for label, gen in [
+        ("left-deep", expr_gen.left_deep),
+        ("right-deep", expr_gen.right_deep),
+        ("random", expr_gen.random_tree),
+    ]:
+        code = "".join(f"print {gen(num_leaves)}\n" for _ in range(10))
+        before = measure(code, sethi_ullman=False)
+        after = measure(code, sethi_ullman=True)
+        print(
+            f"{label:>11}  {before.peak:6} {before.spills:8}"
+            f"  {after.peak:6} {after.spills:8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
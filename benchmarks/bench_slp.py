@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+# Measures the run time of native code for many independent chains of
+# additions and subtractions, computed with scalar instructions, with SSE2
+# and with AVX2. Uses the C driver of bench_reassociate, which calls the
+# generated `main` repeatedly.
+#
+# Usage: python -m benchmarks.bench_slp [num_statements] [num_chains]
+
+import sys
+import tempfile
+from pathlib import Path
+
+from benchmarks.bench_reassociate import build, run
+from minic.pass_manager import FULL_LOWERING
+
+IR_PASSES = ("cse", "copy-prop", "dce")
+
+
+def gen_code(num_statements: int, num_chains: int) -> str:
+    lines = [f"a{idx} = {idx + 2} / 1" for idx in range(num_chains)]
+    lines += [f"x{idx} = {idx + 1000} / 1" for idx in range(num_chains)]
+
+    for statement_idx in range(num_statements):
+        op = "+-"[statement_idx % 2]
+        for idx in range(num_chains):
+            lines.append(f"x{idx} = x{idx} {op} a{idx}")
+
+    lines += [f"print x{idx}" for idx in range(num_chains)]
+
+    return "\n".join(lines) + "\n"
+
+
+def has_avx2() -> bool:
+    try:
+        return " avx2 " in Path("/proc/cpuinfo").read_text()
+    except OSError:
+        return False
+
+
+def main():
+    num_statements = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    num_chains = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    code = gen_code(num_statements, num_chains)
+
+    configs = [
+        ("scalar", FULL_LOWERING, False),
+        ("sse2", dict(FULL_LOWERING, vectorize=True), False),
+    ]
+    if has_avx2():
+        configs.append(("avx2", dict(FULL_LOWERING, vectorize=True), True))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        out_dir = Path(tmp)
+        outputs = []
+
+        for label, codegen_options, avx2 in configs:
+            exe_path = out_dir / label
+            num_instrs = build(code, IR_PASSES, (), exe_path, codegen_options, avx2)
+            elapsed, output = run(exe_path)
+            outputs.append(output)
+            print(f"{label:>8}: {num_instrs:8} instrs, {elapsed * 1e6:8.1f} us")
+
+        assert len(set(outputs)) == 1
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+# Compares the peak memory of compiling programs of growing length to an
+# assembly file with compile_file, with and without streaming.
+#
+# Usage: python -m benchmarks.bench_streaming [max_statements]
+
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from minic.driver import CompileOptions, compile_file
+
+
+def gen_code(num_statements: int) -> str:
+    lines = ["a = 1", "b = 2"]
+    for idx in range(num_statements // 2):
+        lines.append(f"a = (a * {idx % 13 + 3} + b) / {idx % 5 + 1} - {idx}")
+        lines.append("print a + b")
+
+    return "\n".join(lines) + "\n"
+
+
+def measure(path: Path, options: CompileOptions) -> tuple[float, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    compile_file(path, options)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return seconds, peak
+
+
+def main():
+    max_statements = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    print(f"{'statements':>10} {'mode':>9} {'time':>9} {'peak memory':>12}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "prog.mc"
+        num_statements = 1000
+        while num_statements <= max_statements:
+            path.write_text(gen_code(num_statements))
+
+            for mode, options in [
+                ("-O1", CompileOptions()),
+                ("-O0", CompileOptions(opt_level=0)),
+                ("--stream", CompileOptions(stream=True)),
+            ]:
+                seconds, peak = measure(path, options)
+                print(
+                    f"{num_statements:>10} {mode:>9} {seconds:>8.2f}s"
+                    f" {peak / 2**20:>9.2f} MiB"
+                )
+
+            num_statements *= 10
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,155 @@
 #!/usr/bin/env python3
 
-from minic.ir_gen import IrGen
-from minic.parser import Parser
-from minic.scanner import Scanner
-from minic.x86_64_code_gen import X86_64_CodeGen
+import sys
+from pathlib import Path
+
+from minic.driver import (CompileOptions, compile_file, compile_files,
+                          expand_paths, load_program, lower)
+from minic.ir_eval import run_ir
+from minic.ir_serial import IR_SUFFIX
+from minic.jit import jit_run
+from minic.pass_manager import (DEFAULT_OPT_LEVEL, OPT_LEVELS, PassManager,
+                                format_pass_timings)
 
 
 def main():
-    import sys
-    from pathlib import Path
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(fromfile_prefix_chars="@")
+    arg_parser.add_argument(
+        "files",
+        nargs="+",
+        metavar="file",
+        help=(
+            f"minic source, or serialized IR if it ends in {IR_SUFFIX}; glob"
+            " patterns are expanded, and @file reads arguments from a file, one"
+            " per line"
+        ),
+    )
+    arg_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="compile multiple files with this many processes (default: CPUs)",
+    )
+    arg_parser.add_argument(
+        "--buffer-output",
+        action="store_true",
+        help="make stdout fully buffered until exit",
+    )
+    arg_parser.add_argument(
+        "--freestanding",
+        action="store_true",
+        help="emit a runtime that prints with raw syscalls instead of libc",
+    )
+    arg_parser.add_argument(
+        "--avx2",
+        action="store_true",
+        help="vectorize with 256-bit AVX2 instructions instead of SSE2",
+    )
+    arg_parser.add_argument(
+        "-c",
+        "--emit-obj",
+        action="store_true",
+        help="write a relocatable ELF object instead of assembly",
+    )
+    arg_parser.add_argument(
+        "--emit-ir",
+        action="store_true",
+        help=f"write the program's serialized IR to a {IR_SUFFIX} file",
+    )
+    arg_parser.add_argument(
+        "--jit",
+        action="store_true",
+        help="run the program in-process and print its output",
+    )
+    arg_parser.add_argument(
+        "--run",
+        action="store_true",
+        help="evaluate the program's IR and print its output",
+    )
+    arg_parser.add_argument(
+        "--stream",
+        action="store_true",
+        help=(
+            "compile to assembly while reading the source, in bounded memory,"
+            " with the local optimizations of -O1 only"
+        ),
+    )
+    arg_parser.add_argument(
+        "-O",
+        dest="opt_level",
+        type=int,
+        choices=OPT_LEVELS,
+        default=DEFAULT_OPT_LEVEL,
+        help=f"optimization level (default: {DEFAULT_OPT_LEVEL})",
+    )
+    arg_parser.add_argument(
+        "--time-passes",
+        action="store_true",
+        help="report the time and instruction count change of each pass",
+    )
+    args = arg_parser.parse_args()
+
+    if args.freestanding and (args.emit_obj or args.jit):
+        arg_parser.error("--freestanding only applies to assembly output")
+
+    if args.stream and (
+        args.emit_obj or args.emit_ir or args.jit or args.run or args.avx2
+    ):
+        arg_parser.error("--stream only applies to assembly output without --avx2")
+    if args.stream and args.time_passes:
+        arg_parser.error("--stream doesn't run passes to time")
+
+    paths, unmatched = expand_paths(args.files)
+    if unmatched:
+        arg_parser.error(f"no files match {', '.join(unmatched)}")
+
+    options = CompileOptions(
+        opt_level=args.opt_level,
+        buffer_output=args.buffer_output,
+        freestanding=args.freestanding,
+        avx2=args.avx2,
+        emit_obj=args.emit_obj,
+        emit_ir=args.emit_ir,
+        stream=args.stream,
+    )
+
+    if len(paths) > 1:
+        if args.jit or args.run or args.time_passes:
+            arg_parser.error("--jit, --run and --time-passes take a single file")
+        sys.exit(compile_batch(paths, options, args.jobs))
+
+    pass_manager = PassManager(args.opt_level)
+    emit(args, paths[0], options, pass_manager)
+
+    if args.time_passes:
+        print(format_pass_timings(pass_manager.timings), file=sys.stderr)
+
+
+def emit(args, path: Path, options: CompileOptions, pass_manager: PassManager):
+    if args.emit_ir or not (args.run or args.jit):
+        compile_file(path, options, pass_manager)
+        return
+
+    ir_program = pass_manager.run_ir_passes(load_program(path, pass_manager))
+
+    if args.run:
+        print(run_ir(ir_program), end="")
+        return
+
+    print(jit_run(lower(ir_program, options, pass_manager)), end="")
 
-    in_filename = Path(sys.argv[1])
-    code = in_filename.read_text()
-    asm_code = compile_minic(code)
-    out_filename = in_filename.with_suffix(".S")
-    out_filename.write_text(asm_code)
 
+# Reports each file that fails to compile, and returns the exit status.
+def compile_batch(paths: list[Path], options: CompileOptions, jobs) -> int:
+    results = compile_files(paths, options, jobs)
 
-def compile_minic(code: str) -> str:
-    scanner = Scanner(code)
-    parser = Parser(scanner)
-    ir_gen = IrGen(parser.parse_program())
-    code_gen = X86_64_CodeGen(ir_gen.gen_program())
-    x86_64_program = code_gen.generate()
+    for result in results:
+        if result.error is not None:
+            print(f"{result.path}: {result.error}", file=sys.stderr)
 
-    return x86_64_program.dump()
+    return 1 if any(result.error is not None for result in results) else 0
 
 
 if __name__ == "__main__":
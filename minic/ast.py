@@ -42,8 +42,12 @@ class BinOpExpr(Expr):
     right: Expr
 
     def accept(self, visitor):
-        self.left.accept(visitor)
-        self.right.accept(visitor)
+        if visitor.visits_right_first(self):
+            self.right.accept(visitor)
+            self.left.accept(visitor)
+        else:
+            self.left.accept(visitor)
+            self.right.accept(visitor)
         visitor.visit_bin_op_expr(self)
 
 
@@ -101,6 +105,10 @@ class AstVisitor:
     def visit_bin_op_expr(self, bin_op_expr: BinOpExpr):
         raise NotImplementedError()
 
+    # Whether the operands of `bin_op_expr` are visited right to left.
+    def visits_right_first(self, bin_op_expr: BinOpExpr) -> bool:
+        return False
+
     def visit_var_expr(self, var_expr: VarExpr):
         raise NotImplementedError()
 
@@ -0,0 +1,91 @@
+import asyncio
+import hashlib
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Optional
+
+from minic.compiler import gen_ir_program
+from minic.driver import CompileOptions, available_cpus, lower
+from minic.ir import Program
+
+
+# A compilation that one or more callers are waiting for.
+@dataclass
+class InFlight:
+    task: asyncio.Task
+    waiters: int = 0
+
+
+# Compiles minic source to assembly without blocking the event loop, by
+# running the compiler in `executor`, or in the loop's default executor when
+# None. With a thread pool, compilation holds the GIL, so a process pool
+# keeps the loop more responsive to other work.
+#
+# At most `max_concurrency` compilations run at once. Requests for the same
+# source and options while one is in flight share its result. Cancelling a
+# request, or its timeout expiring, only cancels the compilation when no
+# other request waits for it. Work already running in the executor can't be
+# interrupted, so it stops at the next stage instead.
+class AsyncCompiler:
+    def __init__(
+        self,
+        executor: Optional[Executor] = None,
+        max_concurrency: Optional[int] = None,
+    ):
+        self.executor = executor
+        self.semaphore = asyncio.Semaphore(max_concurrency or available_cpus())
+        self.in_flight = {}
+
+    async def compile(
+        self,
+        code: str,
+        options: CompileOptions = CompileOptions(),
+        timeout: Optional[float] = None,
+    ) -> str:
+        key = (hashlib.sha256(code.encode()).digest(), options)
+        entry = self.in_flight.get(key)
+        if entry is None:
+            entry = InFlight(asyncio.ensure_future(self.run_stages(code, options)))
+            entry.task.add_done_callback(lambda _: self.forget(key, entry))
+            self.in_flight[key] = entry
+
+        entry.waiters += 1
+        try:
+            return await asyncio.wait_for(asyncio.shield(entry.task), timeout)
+        finally:
+            entry.waiters -= 1
+            if entry.waiters == 0 and not entry.task.done():
+                entry.task.cancel()
+                self.forget(key, entry)
+
+    def forget(self, key: tuple, entry: InFlight):
+        if self.in_flight.get(key) is entry:
+            del self.in_flight[key]
+
+    # Each stage is a separate job, so that cancelled compilations don't
+    # start the next one.
+    async def run_stages(self, code: str, options: CompileOptions) -> str:
+        loop = asyncio.get_running_loop()
+        await self.semaphore.acquire()
+        job = None
+
+        try:
+            job = loop.run_in_executor(
+                self.executor, gen_ir_program, code, options.opt_level
+            )
+            ir_program = await asyncio.shield(job)
+            job = loop.run_in_executor(
+                self.executor, lower_to_assembly, ir_program, options
+            )
+            return await asyncio.shield(job)
+        finally:
+            # A job keeps running in the executor when its compilation is
+            # cancelled, so it only gives its place back once it finishes.
+            if job is None or job.done():
+                self.semaphore.release()
+            else:
+                job.add_done_callback(lambda _: self.semaphore.release())
+
+
+def lower_to_assembly(ir_program: Program, options: CompileOptions) -> str:
+    return lower(ir_program, options).dump()
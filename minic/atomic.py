@@ -0,0 +1,34 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator
+
+
+# Opens a temporary file next to `path` for writing, and renames it over
+# `path` once closed without errors, so that readers, and builds that were
+# interrupted, never see a partial output.
+@contextmanager
+def atomic_output(path: Path) -> Iterator[IO[bytes]]:
+    out_file = tempfile.NamedTemporaryFile(
+        dir=path.parent, prefix=f".{path.name}.", delete=False
+    )
+
+    try:
+        with out_file:
+            yield out_file
+    except BaseException:
+        os.unlink(out_file.name)
+        raise
+
+    # Temporary files are only accessible by their owner.
+    os.chmod(out_file.name, default_file_mode())
+    os.replace(out_file.name, path)
+
+
+# The permissions that files created by `open` get.
+def default_file_mode() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+
+    return 0o666 & ~umask
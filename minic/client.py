@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+
+# Compiles files to assembly through a compile server (see minic.server),
+# so that neither the interpreter nor the compiler start cold for each file.
+# Only the standard library is imported here, to keep that start cheap.
+#
+# Usage: python -m minic.client socket_path [options] file...
+
+import json
+import socket
+import struct
+import sys
+from pathlib import Path
+from typing import Any, Optional
+
+from minic.atomic import atomic_output
+
+# Messages are JSON objects, each preceded by its length in bytes as a
+# big-endian u32. A request is
+#
+#     {"source": str, "options": {...}}
+#
+# with the options of CompileOptions that apply to assembly, and the response
+# is either {"assembly": str} or {"error": str}.
+LENGTH = struct.Struct(">I")
+
+
+class CompileError(Exception):
+    pass
+
+
+def send_message(sock: socket.socket, message: dict[str, Any]):
+    data = json.dumps(message).encode()
+    sock.sendall(LENGTH.pack(len(data)) + data)
+
+
+# Returns None when the peer closes the connection between messages.
+def recv_message(sock: socket.socket) -> Optional[dict[str, Any]]:
+    header = recv_exactly(sock, LENGTH.size)
+    if header is None:
+        return None
+
+    (length,) = LENGTH.unpack(header)
+    data = recv_exactly(sock, length)
+    if data is None:
+        raise ConnectionError("connection closed in the middle of a message")
+
+    return json.loads(data)
+
+
+def recv_exactly(sock: socket.socket, size: int) -> Optional[bytes]:
+    chunks = []
+    remaining = size
+
+    while remaining:
+        chunk = sock.recv(remaining)
+        if not chunk:
+            if remaining == size:
+                return None
+            raise ConnectionError("connection closed in the middle of a message")
+        chunks.append(chunk)
+        remaining -= len(chunk)
+
+    return b"".join(chunks)
+
+
+# A connection to a compile server, over which any number of requests are
+# made one after the other.
+class CompileClient:
+    def __init__(self, socket_path: Path):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(str(socket_path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def close(self):
+        self.sock.close()
+
+    # Returns the assembly for `code`, or raises CompileError with the
+    # server's diagnostic.
+    def compile(self, code: str, **options) -> str:
+        send_message(self.sock, {"source": code, "options": options})
+        response = recv_message(self.sock)
+        if response is None:
+            raise ConnectionError("compile server closed the connection")
+
+        if "error" in response:
+            raise CompileError(response["error"])
+
+        return response["assembly"]
+
+
+def main():
+    import argparse
+
+    arg_parser = argparse.ArgumentParser(fromfile_prefix_chars="@")
+    arg_parser.add_argument("socket_path", type=Path)
+    arg_parser.add_argument("files", nargs="+", type=Path, metavar="file")
+    arg_parser.add_argument("--buffer-output", action="store_true")
+    arg_parser.add_argument("--freestanding", action="store_true")
+    arg_parser.add_argument(
+        "--avx2",
+        action="store_true",
+        help="vectorize with AVX2 rather than SSE2 (no effect yet: -O2 folds"
+        " every value of a program before it's vectorized)",
+    )
+    arg_parser.add_argument("-O", dest="opt_level", type=int)
+    args = arg_parser.parse_args()
+
+    options = dict(
+        buffer_output=args.buffer_output,
+        freestanding=args.freestanding,
+        avx2=args.avx2,
+    )
+    if args.opt_level is not None:
+        options["opt_level"] = args.opt_level
+
+    failed = False
+    with CompileClient(args.socket_path) as client:
+        for path in args.files:
+            try:
+                assembly = client.compile(path.read_text(), **options)
+            except (OSError, CompileError) as error:
+                print(f"{path}: {error}", file=sys.stderr)
+                failed = True
+                continue
+
+            with atomic_output(path.with_suffix(".S")) as out_file:
+                out_file.write(assembly.encode())
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+from typing import Optional
+
+from minic.elf import write_elf_object
+from minic.ir import Program
+from minic.ir_eval import run_ir
+from minic.jit import jit_run
+from minic.pass_manager import DEFAULT_OPT_LEVEL, PassManager
+from minic.x86_64 import X86_64_Program
+
+
+def compile_minic(
+    code: str,
+    buffer_output: bool = False,
+    freestanding: bool = False,
+    opt_level: int = DEFAULT_OPT_LEVEL,
+    avx2: bool = False,
+) -> str:
+    x86_64_program = gen_x86_64_program(
+        code,
+        buffer_output=buffer_output,
+        freestanding=freestanding,
+        opt_level=opt_level,
+        avx2=avx2,
+    )
+
+    return x86_64_program.dump()
+
+
+def compile_minic_object(
+    code: str, buffer_output: bool = False, opt_level: int = DEFAULT_OPT_LEVEL
+) -> bytes:
+    x86_64_program = gen_x86_64_program(
+        code, buffer_output=buffer_output, opt_level=opt_level
+    )
+
+    return write_elf_object(x86_64_program)
+
+
+def run_minic_jit(
+    code: str, buffer_output: bool = False, opt_level: int = DEFAULT_OPT_LEVEL
+) -> str:
+    x86_64_program = gen_x86_64_program(
+        code, buffer_output=buffer_output, opt_level=opt_level
+    )
+
+    return jit_run(x86_64_program)
+
+
+def run_minic(code: str, opt_level: int = DEFAULT_OPT_LEVEL) -> str:
+    return run_ir(gen_ir_program(code, opt_level=opt_level))
+
+
+# Generates IR without any optimization, for the pass manager to optimize.
+def gen_unoptimized_ir_program(code: str) -> Program:
+    return PassManager(0).gen_ir(code)
+
+
+def gen_ir_program(code: str, opt_level: int = DEFAULT_OPT_LEVEL) -> Program:
+    pass_manager = PassManager(opt_level)
+
+    return pass_manager.run_ir_passes(pass_manager.gen_ir(code))
+
+
+def gen_x86_64_program(
+    code: str,
+    buffer_output: bool = False,
+    freestanding: bool = False,
+    opt_level: int = DEFAULT_OPT_LEVEL,
+    avx2: bool = False,
+) -> X86_64_Program:
+    return lower_ir_program(
+        gen_ir_program(code, opt_level=opt_level),
+        buffer_output=buffer_output,
+        freestanding=freestanding,
+        opt_level=opt_level,
+        avx2=avx2,
+    )
+
+
+# Lowers IR to x86-64 and runs the machine passes of `opt_level`. Every way
+# of compiling lowers through here. A `pass_manager` that already ran the IR
+# passes can be passed in to keep its timings, in place of `opt_level`.
+def lower_ir_program(
+    ir_program: Program,
+    buffer_output: bool = False,
+    freestanding: bool = False,
+    opt_level: int = DEFAULT_OPT_LEVEL,
+    avx2: bool = False,
+    pass_manager: Optional[PassManager] = None,
+) -> X86_64_Program:
+    pass_manager = pass_manager or PassManager(opt_level)
+    x86_64_program = pass_manager.lower(
+        ir_program, buffer_output=buffer_output, freestanding=freestanding, avx2=avx2
+    )
+
+    return pass_manager.run_machine_passes(x86_64_program)
@@ -0,0 +1,280 @@
+from dataclasses import dataclass, field
+from enum import Enum, auto
+from typing import Callable, Iterator
+
+from minic.ir import Instr, PrintInstr, Program, Reg
+from minic.ir_ssa import instr_uses
+
+# Sets of registers are Python ints used as bitsets, with bit `reg.idx` set
+# for each register in the set. Bitwise operations on them run in machine
+# words, and building them goes through a bytearray, so that no step costs
+# more than linear time in the number of registers.
+
+
+def bitset_from_indices(indices, size: int) -> int:
+    bits = bytearray((size + 7) // 8)
+
+    for idx in indices:
+        bits[idx >> 3] |= 1 << (idx & 7)
+
+    return int.from_bytes(bits, "little")
+
+
+def iter_bits(bitset: int) -> Iterator[int]:
+    for idx, bit in enumerate(reversed(bin(bitset)[2:])):
+        if bit == "1":
+            yield idx
+
+
+def regs_in(bitset: int) -> set[Reg]:
+    return {Reg(idx) for idx in iter_bits(bitset)}
+
+
+@dataclass
+class BasicBlock:
+    instructions: list[Instr]
+    succs: list[int] = field(default_factory=list)
+
+
+@dataclass
+class Cfg:
+    blocks: list[BasicBlock]
+    # One more than the highest register index in the blocks.
+    num_regs: int
+
+    def preds(self) -> list[list[int]]:
+        preds = [[] for _ in self.blocks]
+
+        for block_idx, block in enumerate(self.blocks):
+            for succ in block.succs:
+                preds[succ].append(block_idx)
+
+        return preds
+
+
+# The language has no control flow yet, so the whole program is a single
+# block without successors.
+def build_cfg(program: Program) -> Cfg:
+    # Registers are written before they are read, so the highest output
+    # register bounds the register indices.
+    num_regs = 1 + max(
+        (
+            instr.out_reg.idx
+            for instr in program.instructions
+            if type(instr) is not PrintInstr
+        ),
+        default=-1,
+    )
+
+    return Cfg(blocks=[BasicBlock(program.instructions)], num_regs=num_regs)
+
+
+def instr_defs(instr: Instr) -> tuple[Reg, ...]:
+    if type(instr) is PrintInstr:
+        return ()
+
+    return (instr.out_reg,)
+
+
+class Direction(Enum):
+    Forward = auto()
+    Backward = auto()
+
+
+class Meet(Enum):
+    Union = auto()
+    Intersection = auto()
+
+
+# A problem whose transfer function over a block is
+# `out = gen | (in & ~kill)`, with `in` and `out` swapped for backward
+# problems.
+@dataclass(frozen=True)
+class DataflowProblem:
+    direction: Direction
+    meet: Meet
+    # Returns the (gen, kill) bitsets of a block.
+    gen_kill: Callable[[BasicBlock, int], tuple[int, int]]
+    # The fact flowing into the entry block, or out of the exit blocks for
+    # backward problems.
+    boundary: int = 0
+
+
+@dataclass
+class DataflowResult:
+    # Facts at the start and at the end of each block, in program order
+    # regardless of the direction of the problem.
+    in_facts: list[int]
+    out_facts: list[int]
+
+
+def solve(cfg: Cfg, problem: DataflowProblem) -> DataflowResult:
+    num_blocks = len(cfg.blocks)
+    gen_kills = [problem.gen_kill(block, cfg.num_regs) for block in cfg.blocks]
+
+    succs = [block.succs for block in cfg.blocks]
+    preds = cfg.preds()
+    if problem.direction == Direction.Backward:
+        # Solve the reversed graph as a forward problem.
+        succs, preds = preds, succs
+        is_boundary = [not block.succs for block in cfg.blocks]
+    else:
+        is_boundary = [block_idx == 0 for block_idx in range(num_blocks)]
+
+    if problem.meet == Meet.Union:
+        meet = int.__or__
+        top = 0
+    else:
+        meet = int.__and__
+        top = (1 << cfg.num_regs) - 1
+
+    before = [top] * num_blocks
+    after = [top] * num_blocks
+    worklist = list(range(num_blocks))
+    on_worklist = [True] * num_blocks
+
+    # Visiting blocks in reverse, and popping from the end, visits them
+    # in program order for forward problems.
+    if problem.direction == Direction.Forward:
+        worklist.reverse()
+
+    while worklist:
+        block_idx = worklist.pop()
+        on_worklist[block_idx] = False
+
+        fact = problem.boundary if is_boundary[block_idx] else top
+        for pred in preds[block_idx]:
+            fact = meet(fact, after[pred])
+        before[block_idx] = fact
+
+        gen, kill = gen_kills[block_idx]
+        new_after = gen | (fact & ~kill)
+        if new_after == after[block_idx]:
+            continue
+
+        after[block_idx] = new_after
+        for succ in succs[block_idx]:
+            if not on_worklist[succ]:
+                on_worklist[succ] = True
+                worklist.append(succ)
+
+    if problem.direction == Direction.Backward:
+        return DataflowResult(in_facts=after, out_facts=before)
+
+    return DataflowResult(in_facts=before, out_facts=after)
+
+
+# A register is live at a point if a later instruction may read it before
+# it's written again.
+def liveness_gen_kill(block: BasicBlock, num_regs: int) -> tuple[int, int]:
+    defined = bytearray(num_regs)
+    gen = []
+    kill = []
+
+    for instr in block.instructions:
+        for reg in instr_uses(instr):
+            if not defined[reg.idx]:
+                gen.append(reg.idx)
+        for reg in instr_defs(instr):
+            defined[reg.idx] = 1
+            kill.append(reg.idx)
+
+    return bitset_from_indices(gen, num_regs), bitset_from_indices(kill, num_regs)
+
+
+LIVENESS = DataflowProblem(Direction.Backward, Meet.Union, liveness_gen_kill)
+
+
+# The definition of a register reaches a point if no other definition of the
+# same register may run in between. Definitions are indexed by the register
+# they write, since IrGen writes each register once.
+def reaching_defs_gen_kill(block: BasicBlock, num_regs: int) -> tuple[int, int]:
+    defs = bitset_from_indices(
+        (
+            instr.out_reg.idx
+            for instr in block.instructions
+            if type(instr) is not PrintInstr
+        ),
+        num_regs,
+    )
+
+    return defs, defs
+
+
+REACHING_DEFS = DataflowProblem(Direction.Forward, Meet.Union, reaching_defs_gen_kill)
+
+
+def compute_liveness(program: Program) -> DataflowResult:
+    return solve(build_cfg(program), LIVENESS)
+
+
+def compute_reaching_defs(program: Program) -> DataflowResult:
+    return solve(build_cfg(program), REACHING_DEFS)
+
+
+# The registers live at a point of a walk over a block. Each register has a
+# flag, and the flags set are counted, so that updating the set for an
+# instruction doesn't cost time in the number of registers, as clearing and
+# setting bits of an int does.
+@dataclass
+class LiveRegs:
+    flags: bytearray
+    count: int = 0
+
+    def __contains__(self, reg: Reg) -> bool:
+        return bool(self.flags[reg.idx])
+
+    def regs(self) -> set[Reg]:
+        return {Reg(idx) for idx, flag in enumerate(self.flags) if flag}
+
+
+# Yields each instruction of `block` from last to first, along with the
+# registers live right after it, given the registers live at the end of the
+# block. The live registers are updated in place as the walk goes on.
+def iter_live_after(
+    block: BasicBlock, live_out: int, num_regs: int
+) -> Iterator[tuple[Instr, LiveRegs]]:
+    live = LiveRegs(bytearray(num_regs))
+    flags = live.flags
+    for idx in iter_bits(live_out):
+        flags[idx] = 1
+        live.count += 1
+
+    for instr in reversed(block.instructions):
+        yield instr, live
+
+        for reg in instr_defs(instr):
+            if flags[reg.idx]:
+                flags[reg.idx] = 0
+                live.count -= 1
+        for reg in instr_uses(instr):
+            if not flags[reg.idx]:
+                flags[reg.idx] = 1
+                live.count += 1
+
+
+@dataclass(frozen=True)
+class RegisterPressure:
+    # The most registers live at once.
+    peak: int
+    # How many values are written while `num_machine_regs` others are live,
+    # and so would have to be spilled to memory.
+    spills: int
+
+
+def measure_register_pressure(
+    program: Program, num_machine_regs: int
+) -> RegisterPressure:
+    cfg = build_cfg(program)
+    liveness = solve(cfg, LIVENESS)
+    peak = 0
+    spills = 0
+
+    for block, live_out in zip(cfg.blocks, liveness.out_facts):
+        for instr, live_after in iter_live_after(block, live_out, cfg.num_regs):
+            num_live = live_after.count
+            peak = max(peak, num_live)
+            if instr_defs(instr) and num_live > num_machine_regs:
+                spills += 1
+
+    return RegisterPressure(peak, spills)
@@ -0,0 +1,180 @@
+import glob
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from minic.atomic import atomic_output
+from minic.compiler import gen_ir_program, lower_ir_program
+from minic.elf import write_elf_object
+from minic.ir import Program
+from minic.ir_serial import IR_SUFFIX, read_ir, write_ir
+from minic.pass_manager import DEFAULT_OPT_LEVEL, PassManager
+from minic.streaming import compile_streaming
+from minic.x86_64 import X86_64_Program
+from minic.x86_64_emit import write_program
+
+
+# What to compile files to, as set by the command line flags of the same
+# names.
+@dataclass(frozen=True)
+class CompileOptions:
+    opt_level: int = DEFAULT_OPT_LEVEL
+    buffer_output: bool = False
+    freestanding: bool = False
+    avx2: bool = False
+    emit_obj: bool = False
+    emit_ir: bool = False
+    stream: bool = False
+
+
+# The output of compiling `path`, or why it failed.
+@dataclass(frozen=True)
+class CompileResult:
+    path: Path
+    out_path: Optional[Path] = None
+    error: Optional[str] = None
+
+
+# Reads a minic source file, or serialized IR if `path` ends in IR_SUFFIX.
+def load_program(path: Path, pass_manager: PassManager) -> Program:
+    if path.suffix == IR_SUFFIX:
+        with path.open("rb") as in_file:
+            return read_ir(in_file)
+
+    return pass_manager.gen_ir(path.read_text())
+
+
+# Compiles `path` into serialized IR, an object or assembly next to it,
+# according to `options`. Returns the path of the output.
+#
+# With `stream`, the source is compiled to assembly as it's read, in memory
+# that doesn't grow with its length, and only `buffer_output` and
+# `freestanding` apply.
+def compile_file(
+    path: Path, options: CompileOptions, pass_manager: Optional[PassManager] = None
+) -> Path:
+    if options.stream:
+        out_path = path.with_suffix(".S")
+        with path.open() as in_file, atomic_output(out_path) as out_file:
+            compile_streaming(
+                in_file,
+                out_file,
+                buffer_output=options.buffer_output,
+                freestanding=options.freestanding,
+            )
+        return out_path
+
+    pass_manager = pass_manager or PassManager(options.opt_level)
+    ir_program = pass_manager.run_ir_passes(load_program(path, pass_manager))
+
+    if options.emit_ir:
+        out_path = path.with_suffix(IR_SUFFIX)
+        with atomic_output(out_path) as out_file:
+            write_ir(ir_program.instructions, out_file)
+        return out_path
+
+    x86_64_program = lower(ir_program, options, pass_manager)
+
+    if options.emit_obj:
+        out_path = path.with_suffix(".o")
+        with atomic_output(out_path) as out_file:
+            out_file.write(write_elf_object(x86_64_program))
+        return out_path
+
+    out_path = path.with_suffix(".S")
+    with atomic_output(out_path) as out_file:
+        write_program(x86_64_program, out_file)
+
+    return out_path
+
+
+# Compiles minic source to assembly.
+def compile_source(code: str, options: CompileOptions) -> str:
+    ir_program = gen_ir_program(code, opt_level=options.opt_level)
+
+    return lower(ir_program, options).dump()
+
+
+# Lowers with the options of a compilation, through lower_ir_program.
+def lower(
+    ir_program: Program,
+    options: CompileOptions,
+    pass_manager: Optional[PassManager] = None,
+) -> X86_64_Program:
+    return lower_ir_program(
+        ir_program,
+        buffer_output=options.buffer_output,
+        freestanding=options.freestanding,
+        opt_level=options.opt_level,
+        avx2=options.avx2,
+        pass_manager=pass_manager,
+    )
+
+
+# Compiles each file in a pool of worker processes, so that the interpreter
+# starts and the compiler is imported once per worker rather than per file.
+# Failures are reported in the results, in the order of `paths`, rather than
+# stopping the batch.
+def compile_files(
+    paths: list[Path], options: CompileOptions, jobs: Optional[int] = None
+) -> list[CompileResult]:
+    jobs = min(jobs or available_cpus(), len(paths))
+    if jobs <= 1:
+        return [try_compile_file(path, options) for path in paths]
+
+    # Sending files in chunks amortizes the cost of talking to the workers,
+    # while still spreading the files evenly.
+    chunksize = max(1, len(paths) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(
+            executor.map(
+                try_compile_file,
+                paths,
+                [options] * len(paths),
+                chunksize=chunksize,
+            )
+        )
+
+
+def try_compile_file(path: Path, options: CompileOptions) -> CompileResult:
+    try:
+        return CompileResult(path, out_path=compile_file(path, options))
+    except Exception as error:
+        return CompileResult(path, error=format_error(error))
+
+
+# Compile errors are exceptions of any type, reported by their last line,
+# such as "KeyError: 'y'".
+def format_error(error: Exception) -> str:
+    return traceback.format_exception_only(error)[-1].strip()
+
+
+def available_cpus() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+
+    return os.cpu_count() or 1
+
+
+# Expands glob patterns, including `**`, into the files they match, in sorted
+# order. Other arguments are taken as paths, even if they don't exist, so that
+# compiling them reports the error. Returns the patterns that matched nothing
+# separately.
+def expand_paths(args: list[str]) -> tuple[list[Path], list[str]]:
+    paths = []
+    unmatched = []
+
+    for arg in args:
+        if not glob.has_magic(arg):
+            paths.append(Path(arg))
+            continue
+
+        matches = sorted(glob.glob(arg, recursive=True))
+        if not matches:
+            unmatched.append(arg)
+        paths += [Path(match) for match in matches]
+
+    return paths, unmatched
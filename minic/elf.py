@@ -0,0 +1,234 @@
+import struct
+from dataclasses import dataclass
+
+from minic.x86_64 import X86_64_Program
+from minic.x86_64_encoder import RelocKind, X86_64_Encoder
+
+ET_REL = 1
+EM_X86_64 = 62
+
+SHT_PROGBITS = 1
+SHT_SYMTAB = 2
+SHT_STRTAB = 3
+SHT_RELA = 4
+
+SHF_WRITE = 0x1
+SHF_ALLOC = 0x2
+SHF_EXECINSTR = 0x4
+SHF_INFO_LINK = 0x40
+
+STB_LOCAL = 0
+STB_GLOBAL = 1
+
+STT_NOTYPE = 0
+STT_FUNC = 2
+STT_SECTION = 3
+
+R_X86_64_PC32 = 2
+R_X86_64_PLT32 = 4
+R_X86_64_GOTPCREL = 9
+
+ELF_HEADER_SIZE = 64
+SECTION_HEADER_SIZE = 64
+SYMBOL_SIZE = 24
+RELA_SIZE = 24
+
+RELOC_TYPES = {
+    RelocKind.Pc32: R_X86_64_PC32,
+    RelocKind.Plt32: R_X86_64_PLT32,
+    RelocKind.GotPcRel: R_X86_64_GOTPCREL,
+}
+
+
+@dataclass
+class Section:
+    name: str
+    sh_type: int
+    flags: int = 0
+    data: bytes = b""
+    link: int = 0
+    info: int = 0
+    align: int = 1
+    entsize: int = 0
+
+
+class StringTable:
+    def __init__(self):
+        self.data = bytearray(b"\0")
+
+    def add(self, string: str) -> int:
+        offset = len(self.data)
+        self.data += string.encode() + b"\0"
+        return offset
+
+
+# Writes an X86_64_Program as a relocatable ELF64 object that defines `main`,
+# ready to be linked by the system linker against libc.
+def write_elf_object(program: X86_64_Program) -> bytes:
+    if program.freestanding:
+        raise NotImplementedError("the freestanding runtime is only emitted as text")
+
+    data, data_labels = layout_strings(
+        {".PRINTF_FMT_LLD": "%lld\n"}
+        | {label.value: string for label, string in program.strings.items()},
+        terminate=True,
+    )
+    rodata, rodata_labels = layout_strings(
+        {label.value: string for label, string in program.rodata.items()},
+        terminate=False,
+    )
+
+    encoder = X86_64_Encoder().encode(program.instructions)
+
+    text_index, data_index, rodata_index = 1, 2, 3
+    symtab_index, strtab_index = 4, 5
+
+    strtab = StringTable()
+    symbols = [
+        pack_symbol(0, STB_LOCAL, STT_NOTYPE, 0, 0, 0),
+        pack_symbol(0, STB_LOCAL, STT_SECTION, text_index, 0, 0),
+        pack_symbol(0, STB_LOCAL, STT_SECTION, data_index, 0, 0),
+        pack_symbol(0, STB_LOCAL, STT_SECTION, rodata_index, 0, 0),
+    ]
+    data_section_symbol, rodata_section_symbol = 2, 3
+    first_global = len(symbols)
+    symbols.append(
+        pack_symbol(
+            strtab.add("main"), STB_GLOBAL, STT_FUNC, text_index, 0, len(encoder.code)
+        )
+    )
+
+    global_symbol_by_name = {}
+    relas = bytearray()
+
+    for reloc in encoder.relocations:
+        addend = reloc.addend
+
+        if reloc.symbol in data_labels:
+            sym = data_section_symbol
+            addend += data_labels[reloc.symbol]
+        elif reloc.symbol in rodata_labels:
+            sym = rodata_section_symbol
+            addend += rodata_labels[reloc.symbol]
+        else:
+            if reloc.symbol not in global_symbol_by_name:
+                global_symbol_by_name[reloc.symbol] = len(symbols)
+                symbols.append(
+                    pack_symbol(
+                        strtab.add(reloc.symbol), STB_GLOBAL, STT_NOTYPE, 0, 0, 0
+                    )
+                )
+            sym = global_symbol_by_name[reloc.symbol]
+
+        relas += struct.pack(
+            "<QQq", reloc.offset, (sym << 32) | RELOC_TYPES[reloc.kind], addend
+        )
+
+    sections = [
+        Section("", 0),
+        Section(
+            ".text",
+            SHT_PROGBITS,
+            SHF_ALLOC | SHF_EXECINSTR,
+            bytes(encoder.code),
+            align=16,
+        ),
+        Section(".data", SHT_PROGBITS, SHF_ALLOC | SHF_WRITE, data, align=8),
+        Section(".rodata", SHT_PROGBITS, SHF_ALLOC, rodata, align=8),
+        Section(
+            ".symtab",
+            SHT_SYMTAB,
+            data=b"".join(symbols),
+            link=strtab_index,
+            info=first_global,
+            align=8,
+            entsize=SYMBOL_SIZE,
+        ),
+        Section(".strtab", SHT_STRTAB, data=bytes(strtab.data)),
+        Section(
+            ".rela.text",
+            SHT_RELA,
+            SHF_INFO_LINK,
+            bytes(relas),
+            link=symtab_index,
+            info=text_index,
+            align=8,
+            entsize=RELA_SIZE,
+        ),
+        Section(".note.GNU-stack", SHT_PROGBITS),
+        Section(".shstrtab", SHT_STRTAB),
+    ]
+
+    return pack_sections(sections)
+
+
+def layout_strings(strings: dict[str, str], terminate: bool):
+    data = bytearray()
+    offset_by_label = {}
+
+    for label, string in strings.items():
+        offset_by_label[label] = len(data)
+        data += string.encode()
+        if terminate:
+            data.append(0)
+
+    return bytes(data), offset_by_label
+
+
+def pack_symbol(name, bind, sym_type, shndx, value, size) -> bytes:
+    return struct.pack("<IBBHQQ", name, (bind << 4) | sym_type, 0, shndx, value, size)
+
+
+def pack_sections(sections: list[Section]) -> bytes:
+    shstrtab = StringTable()
+    name_offsets = [
+        shstrtab.add(section.name) if section.name else 0 for section in sections
+    ]
+    sections[-1].data = bytes(shstrtab.data)
+
+    out = bytearray(ELF_HEADER_SIZE)
+    offsets = []
+
+    for section in sections:
+        out += bytes(-len(out) % section.align)
+        offsets.append(len(out))
+        out += section.data
+
+    out += bytes(-len(out) % 8)
+    section_headers_offset = len(out)
+
+    for section, name_offset, offset in zip(sections, name_offsets, offsets):
+        out += struct.pack(
+            "<IIQQQQIIQQ",
+            name_offset,
+            section.sh_type,
+            section.flags,
+            0,
+            offset if section.sh_type else 0,
+            len(section.data),
+            section.link,
+            section.info,
+            section.align if section.sh_type else 0,
+            section.entsize,
+        )
+
+    ident = b"\x7fELF" + bytes([2, 1, 1, 0]) + bytes(8)
+    out[:ELF_HEADER_SIZE] = struct.pack(
+        "<16sHHIQQQIHHHHHH",
+        ident,
+        ET_REL,
+        EM_X86_64,
+        1,
+        0,
+        0,
+        section_headers_offset,
+        0,
+        ELF_HEADER_SIZE,
+        0,
+        0,
+        SECTION_HEADER_SIZE,
+        len(sections),
+        len(sections) - 1,
+    )
+
+    return bytes(out)
@@ -8,6 +8,35 @@ class BinOp(Enum):
     Mul = auto()
     Div = auto()
 
+    # Members are singletons, so hashing their identity is enough, and much
+    # cheaper than Enum's hash of the member name.
+    __hash__ = object.__hash__
+
+
+INT64_MIN = -(2**63)
+INT64_MAX = 2**63 - 1
+
+
+def wrap_int64(value: int) -> int:
+    return (value + 2**63) % 2**64 - 2**63
+
+
+# Evaluates `op` with 64-bit wraparound and C truncating division. Raises
+# ZeroDivisionError on division by zero.
+def eval_bin_op(op: BinOp, left: int, right: int) -> int:
+    match op:
+        case BinOp.Add:
+            return wrap_int64(left + right)
+        case BinOp.Sub:
+            return wrap_int64(left - right)
+        case BinOp.Mul:
+            return wrap_int64(left * right)
+        case BinOp.Div:
+            quotient = abs(left) // abs(right)
+            return wrap_int64(quotient if (left < 0) == (right < 0) else -quotient)
+
+    assert False
+
 
 @dataclass(frozen=True)
 class Reg:
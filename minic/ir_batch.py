@@ -0,0 +1,105 @@
+# numpy is an optional dependency, installed with the `batch` extra.
+import numpy as np
+
+from minic.ir import (BinOp, BinOpInstr, LoadLiteralInstr, LoadRegInstr,
+                      PrintInstr, Program, Reg, eval_bin_op, wrap_int64)
+from minic.ir_gen import IrGen
+from minic.parser import Parser
+from minic.scanner import Scanner
+
+
+# Evaluates `program` once per row of the arrays in `bindings`, whose values
+# replace what the program assigns to the bound registers. Returns one int64
+# array per PrintInstr. Division by zero in any row raises ZeroDivisionError.
+def eval_ir_batch(
+    program: Program, bindings: dict[Reg, np.ndarray]
+) -> list[np.ndarray]:
+    batch_size = get_batch_size(bindings.values())
+    # A register holds a Python int while its value is the same in every row,
+    # and an array otherwise.
+    value_by_reg = {}
+    outputs = []
+
+    for instr in program.instructions:
+        match instr:
+            case LoadLiteralInstr(out_reg, value):
+                value_by_reg[out_reg] = wrap_int64(value)
+
+            case LoadRegInstr(out_reg, _) if out_reg in bindings:
+                value_by_reg[out_reg] = bindings[out_reg]
+
+            case LoadRegInstr(out_reg, in_reg):
+                value_by_reg[out_reg] = value_by_reg[in_reg]
+
+            case BinOpInstr(out_reg, op, left_reg, right_reg):
+                left = value_by_reg[left_reg]
+                right = value_by_reg[right_reg]
+
+                if isinstance(left, int) and isinstance(right, int):
+                    value_by_reg[out_reg] = eval_bin_op(op, left, right)
+                else:
+                    value_by_reg[out_reg] = eval_bin_op_columns(op, left, right)
+
+            case PrintInstr(arg_reg):
+                value = value_by_reg[arg_reg]
+                if isinstance(value, int):
+                    value = np.full(batch_size, value, dtype=np.int64)
+                outputs.append(value)
+
+    return outputs
+
+
+# Compiles `code` and evaluates it with the first assignment of each variable
+# in `bindings` replaced by an array of values.
+def eval_minic_batch(code: str, bindings: dict[str, np.ndarray]) -> list[np.ndarray]:
+    ir_gen = IrGen(Parser(Scanner(code)).parse_program())
+    program = ir_gen.gen_program()
+
+    reg_bindings = {}
+    for var, values in bindings.items():
+        if var not in ir_gen.first_reg_by_var:
+            raise ValueError(f"variable `{var}` is never assigned")
+        reg_bindings[ir_gen.first_reg_by_var[var]] = values
+
+    return eval_ir_batch(program, reg_bindings)
+
+
+def get_batch_size(arrays) -> int:
+    sizes = set()
+
+    for array in arrays:
+        if array.dtype != np.int64 or array.ndim != 1:
+            raise ValueError("bound values must be one-dimensional int64 arrays")
+        sizes.add(len(array))
+
+    if len(sizes) > 1:
+        raise ValueError("bound arrays must have the same length")
+
+    return sizes.pop() if sizes else 1
+
+
+# Applies `op` to whole columns with 64-bit wraparound and C truncating
+# division, like eval_bin_op does for a single pair of values.
+def eval_bin_op_columns(op: BinOp, left, right) -> np.ndarray:
+    left = np.asarray(left, dtype=np.int64)
+    right = np.asarray(right, dtype=np.int64)
+
+    with np.errstate(over="ignore"):
+        match op:
+            case BinOp.Add:
+                return left + right
+            case BinOp.Sub:
+                return left - right
+            case BinOp.Mul:
+                return left * right
+            case BinOp.Div:
+                if not np.all(right):
+                    raise ZeroDivisionError("integer division by zero")
+
+                quotient = left // right
+                # Floor division rounds down where the exact quotient is
+                # negative and inexact, so round those toward zero instead.
+                inexact = left != quotient * right
+                return quotient + (inexact & ((left ^ right) < 0))
+
+    assert False
@@ -0,0 +1,119 @@
+from array import array
+from dataclasses import dataclass, field
+
+from minic.ir import (BinOp, BinOpInstr, Instr, LoadLiteralInstr, LoadRegInstr,
+                      PrintInstr, Program, Reg, wrap_int64)
+
+OP_LOAD_LITERAL = 0
+OP_LOAD_REG = 1
+OP_ADD = 2
+OP_SUB = 3
+OP_MUL = 4
+OP_DIV = 5
+OP_PRINT = 6
+
+OPCODE_BY_BIN_OP = {
+    BinOp.Add: OP_ADD,
+    BinOp.Sub: OP_SUB,
+    BinOp.Mul: OP_MUL,
+    BinOp.Div: OP_DIV,
+}
+
+BIN_OP_BY_OPCODE = {opcode: op for op, opcode in OPCODE_BY_BIN_OP.items()}
+
+# Marks register fields an instruction doesn't use.
+NO_REG = -1
+
+
+# Stores a Program as parallel arrays with one entry per instruction: the
+# opcode, the register written (`dst`), the registers read (`src1`, `src2`)
+# and the literal of OP_LOAD_LITERAL (`imm`). Literals are stored wrapped to
+# int64.
+@dataclass
+class CompactProgram:
+    opcodes: array = field(default_factory=lambda: array("B"))
+    dsts: array = field(default_factory=lambda: array("i"))
+    src1s: array = field(default_factory=lambda: array("i"))
+    src2s: array = field(default_factory=lambda: array("i"))
+    imms: array = field(default_factory=lambda: array("q"))
+
+    def __len__(self) -> int:
+        return len(self.opcodes)
+
+    # Iterates over (opcode, dst, src1, src2, imm) tuples.
+    def __iter__(self):
+        return zip(self.opcodes, self.dsts, self.src1s, self.src2s, self.imms)
+
+    def append(
+        self,
+        opcode: int,
+        dst: int = NO_REG,
+        src1: int = NO_REG,
+        src2: int = NO_REG,
+        imm: int = 0,
+    ):
+        self.opcodes.append(opcode)
+        self.dsts.append(dst)
+        self.src1s.append(src1)
+        self.src2s.append(src2)
+        self.imms.append(imm)
+
+    def nbytes(self) -> int:
+        return sum(
+            len(column) * column.itemsize
+            for column in [self.opcodes, self.dsts, self.src1s, self.src2s, self.imms]
+        )
+
+
+def compact_program(program: Program) -> CompactProgram:
+    compact = CompactProgram()
+
+    for instr in program.instructions:
+        compact.append(*compact_instr(instr))
+
+    return compact
+
+
+def expand_program(compact: CompactProgram) -> Program:
+    instructions = []
+
+    for opcode, dst, src1, src2, imm in compact:
+        if opcode == OP_LOAD_LITERAL:
+            instructions.append(LoadLiteralInstr(Reg(dst), imm))
+        elif opcode == OP_LOAD_REG:
+            instructions.append(LoadRegInstr(Reg(dst), Reg(src1)))
+        elif opcode == OP_PRINT:
+            instructions.append(PrintInstr(Reg(src1)))
+        else:
+            instructions.append(
+                BinOpInstr(Reg(dst), BIN_OP_BY_OPCODE[opcode], Reg(src1), Reg(src2))
+            )
+
+    return Program(instructions=instructions)
+
+
+def compact_instr(instr: Instr) -> tuple[int, int, int, int, int]:
+    instr_type = type(instr)
+
+    if instr_type is BinOpInstr:
+        return (
+            OPCODE_BY_BIN_OP[instr.op],
+            instr.out_reg.idx,
+            instr.left_reg.idx,
+            instr.right_reg.idx,
+            0,
+        )
+    if instr_type is LoadLiteralInstr:
+        return (
+            OP_LOAD_LITERAL,
+            instr.out_reg.idx,
+            NO_REG,
+            NO_REG,
+            wrap_int64(instr.value),
+        )
+    if instr_type is LoadRegInstr:
+        return (OP_LOAD_REG, instr.out_reg.idx, instr.in_reg.idx, NO_REG, 0)
+    if instr_type is PrintInstr:
+        return (OP_PRINT, NO_REG, instr.arg_reg.idx, NO_REG, 0)
+
+    assert False
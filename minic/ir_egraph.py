@@ -0,0 +1,571 @@
+import heapq
+import itertools
+import time
+from dataclasses import replace
+from typing import Iterator, NamedTuple, Optional, Union
+
+from minic.ir import (BinOp, BinOpInstr, Instr, LoadLiteralInstr, LoadRegInstr,
+                      PrintInstr, Program, Reg, eval_bin_op, wrap_int64)
+from minic.x86_64_encoder import fits_int32
+from minic.x86_64_strength_reduction import (IMUL_COST, div_by_const_instrs,
+                                             mul_by_const_instrs, seq_cost)
+
+# Saturation stops at whichever limit comes first. The match limit bounds the
+# e-nodes that rewrites are matched against over all iterations, so that the
+# result only depends on the program.
+NODE_LIMIT = 10_000
+ITERATION_LIMIT = 8
+MATCH_LIMIT = 5_000
+# A safety net for programs whose rewrites are slow to match even within the
+# limits above. Reaching it leaves the program unchanged, rather than making
+# the result depend on the speed of the machine.
+TIME_LIMIT = 5.0
+
+# Addition and multiplication wrap around at 64 bits, so they form a ring, and
+# the rewrites below hold for every value. Division truncates, and traps on
+# some operands, so it's left alone.
+COMMUTATIVE_OPS = (BinOp.Add, BinOp.Mul)
+
+
+# E-nodes are named tuples rather than frozen dataclasses, so that hashing
+# and comparing them, which saturation does for every match, runs in C.
+class LiteralNode(NamedTuple):
+    value: int
+
+
+# An operation over two e-classes.
+class OpNode(NamedTuple):
+    op: BinOp
+    left: int
+    right: int
+
+
+ENode = Union[LiteralNode, OpNode]
+
+# The right-hand side of a rewrite: an e-class, a literal, or an operation
+# over two terms, as `(op, left, right)`.
+Term = Union[int, LiteralNode, tuple]
+
+
+# A set of e-classes, each a set of e-nodes that compute the same value.
+# E-nodes are kept in dicts rather than sets, so that they are visited in the
+# order they were added, and the result doesn't depend on hash seeds.
+class EGraph:
+    def __init__(self):
+        self.parents = []
+        self.nodes_by_class = {}
+        self.class_by_node = {}
+        self.literal_by_class = {}
+        self.num_nodes = 0
+        # Changes whenever the e-nodes of a class do, so that saturation only
+        # matches rewrites again on e-nodes whose operands changed.
+        self.version_by_class = {}
+        self.versions = itertools.count()
+
+    def find(self, class_id: int) -> int:
+        while self.parents[class_id] != class_id:
+            self.parents[class_id] = self.parents[self.parents[class_id]]
+            class_id = self.parents[class_id]
+
+        return class_id
+
+    def canonicalize(self, node: ENode) -> ENode:
+        if type(node) is OpNode:
+            return OpNode(node.op, self.find(node.left), self.find(node.right))
+
+        return node
+
+    def add(self, node: ENode) -> int:
+        node = self.canonicalize(node)
+        class_id = self.class_by_node.get(node)
+        if class_id is not None:
+            return self.find(class_id)
+
+        class_id = len(self.parents)
+        self.parents.append(class_id)
+        self.nodes_by_class[class_id] = {node: None}
+        self.class_by_node[node] = class_id
+        self.version_by_class[class_id] = next(self.versions)
+        self.num_nodes += 1
+        if type(node) is LiteralNode:
+            self.literal_by_class[class_id] = node.value
+
+        return class_id
+
+    def add_term(self, term: Term) -> int:
+        if type(term) is int:
+            return self.find(term)
+        if type(term) is LiteralNode:
+            return self.add(term)
+
+        op, left, right = term
+        return self.add(OpNode(op, self.add_term(left), self.add_term(right)))
+
+    def merge(self, class_id: int, other_class_id: int) -> bool:
+        class_id = self.find(class_id)
+        other_class_id = self.find(other_class_id)
+        if class_id == other_class_id:
+            return False
+
+        if len(self.nodes_by_class[class_id]) < len(
+            self.nodes_by_class[other_class_id]
+        ):
+            class_id, other_class_id = other_class_id, class_id
+
+        self.parents[other_class_id] = class_id
+        self.nodes_by_class[class_id].update(self.nodes_by_class.pop(other_class_id))
+        self.version_by_class[class_id] = next(self.versions)
+        del self.version_by_class[other_class_id]
+        literal = self.literal_by_class.pop(other_class_id, None)
+        if literal is not None:
+            self.literal_by_class[class_id] = literal
+
+        return True
+
+    # Restores congruence after merges: e-nodes whose operands were merged
+    # are rewritten in terms of the merged classes, and classes that end up
+    # with the same e-node are merged in turn.
+    def rebuild(self):
+        while True:
+            class_by_node = {}
+            merges = []
+
+            for class_id, nodes in self.nodes_by_class.items():
+                canonical = {self.canonicalize(node): None for node in nodes}
+                if canonical.keys() != nodes.keys():
+                    self.nodes_by_class[class_id] = canonical
+                    self.version_by_class[class_id] = next(self.versions)
+                for node in canonical:
+                    other_class_id = class_by_node.setdefault(node, class_id)
+                    if other_class_id != class_id:
+                        merges.append((other_class_id, class_id))
+
+            self.class_by_node = class_by_node
+            self.num_nodes = len(class_by_node)
+            if not merges:
+                return
+
+            for class_id, other_class_id in merges:
+                self.merge(class_id, other_class_id)
+
+    # Rewrites look at the e-node, and at the e-nodes and literal of its
+    # operands, so they only have to be matched again when one of those
+    # changes.
+    def match_key(self, node: OpNode) -> tuple:
+        return (
+            node,
+            self.version_by_class[node.left],
+            self.version_by_class[node.right],
+        )
+
+    def literal(self, class_id: int) -> Optional[int]:
+        return self.literal_by_class.get(self.find(class_id))
+
+    def op_nodes(self, class_id: int, ops) -> list[OpNode]:
+        return [
+            node
+            for node in self.nodes_by_class[self.find(class_id)]
+            if type(node) is OpNode and node.op in ops
+        ]
+
+
+# Rewrites take an e-node and yield terms that compute the same value.
+
+
+def commute(egraph: EGraph, node: OpNode) -> Iterator[Term]:
+    if node.op in COMMUTATIVE_OPS:
+        yield (node.op, node.right, node.left)
+
+
+# (a op b) op c -> a op (b op c). The other direction follows from
+# commutativity.
+def associate(egraph: EGraph, node: OpNode) -> Iterator[Term]:
+    if node.op in COMMUTATIVE_OPS:
+        for inner in egraph.op_nodes(node.left, (node.op,)):
+            yield (node.op, inner.left, (node.op, inner.right, node.right))
+
+
+# a * b +- a * c -> a * (b +- c)
+def factor(egraph: EGraph, node: OpNode) -> Iterator[Term]:
+    if node.op not in (BinOp.Add, BinOp.Sub):
+        return
+
+    rights_by_factor = {}
+    for right in egraph.op_nodes(node.right, (BinOp.Mul,)):
+        rights_by_factor.setdefault(egraph.find(right.left), []).append(right)
+
+    for left in egraph.op_nodes(node.left, (BinOp.Mul,)):
+        for right in rights_by_factor.get(egraph.find(left.left), ()):
+            yield (BinOp.Mul, left.left, (node.op, left.right, right.right))
+
+
+# a * (b +- c) -> a * b +- a * c
+def distribute(egraph: EGraph, node: OpNode) -> Iterator[Term]:
+    if node.op != BinOp.Mul:
+        return
+
+    for inner in egraph.op_nodes(node.right, (BinOp.Add, BinOp.Sub)):
+        yield (
+            inner.op,
+            (BinOp.Mul, node.left, inner.left),
+            (BinOp.Mul, node.left, inner.right),
+        )
+
+
+def simplify_identities(egraph: EGraph, node: OpNode) -> Iterator[Term]:
+    right = egraph.literal(node.right)
+
+    match node.op:
+        case BinOp.Add | BinOp.Sub if right == 0:
+            yield node.left
+        case BinOp.Mul if right == 1:
+            yield node.left
+        case BinOp.Mul if right == 0:
+            yield LiteralNode(0)
+        case BinOp.Sub if egraph.find(node.left) == egraph.find(node.right):
+            yield LiteralNode(0)
+
+    # (a + b) - b -> a, and (a - b) + b -> a.
+    inverse_op = {BinOp.Add: BinOp.Sub, BinOp.Sub: BinOp.Add}.get(node.op)
+    if inverse_op is not None:
+        for inner in egraph.op_nodes(node.left, (inverse_op,)):
+            if egraph.find(inner.right) == egraph.find(node.right):
+                yield inner.left
+
+
+def fold_constants(egraph: EGraph, node: OpNode) -> Iterator[Term]:
+    left = egraph.literal(node.left)
+    right = egraph.literal(node.right)
+
+    if left is not None and right is not None and node.op != BinOp.Div:
+        yield LiteralNode(eval_bin_op(node.op, left, right))
+
+
+# a + a <-> a * 2, and a * -1 -> 0 - a. Whether a multiplication by a literal
+# is cheaper than the alternatives is left to the cost model.
+def reduce_strength(egraph: EGraph, node: OpNode) -> Iterator[Term]:
+    match node.op:
+        case BinOp.Add if egraph.find(node.left) == egraph.find(node.right):
+            yield (BinOp.Mul, node.left, LiteralNode(2))
+        case BinOp.Mul if egraph.literal(node.right) == 2:
+            yield (BinOp.Add, node.left, node.left)
+        case BinOp.Mul if egraph.literal(node.right) == -1:
+            yield (BinOp.Sub, LiteralNode(0), node.left)
+
+
+REWRITES = (
+    commute,
+    associate,
+    factor,
+    distribute,
+    simplify_identities,
+    fold_constants,
+    reduce_strength,
+)
+
+
+# Applies every rewrite to every e-node, merging each result into the class
+# of the e-node, until nothing changes or a limit is reached. Each match adds
+# at least one e-node unless it's already in the e-graph, so an iteration
+# stops matching once it has more matches than the node limit allows for.
+# Returns False if the time limit was reached first.
+def saturate(
+    egraph: EGraph,
+    node_limit: int,
+    iteration_limit: int,
+    match_limit: int,
+    time_limit: float,
+) -> bool:
+    deadline = time.perf_counter() + time_limit
+    matched = set()
+
+    for _ in range(iteration_limit):
+        matches = []
+        for class_id, node in list(iter_op_nodes(egraph)):
+            if len(matches) >= node_limit or len(matched) >= match_limit:
+                break
+            if time.perf_counter() > deadline:
+                return False
+
+            match_key = egraph.match_key(node)
+            if match_key in matched:
+                continue
+            matched.add(match_key)
+
+            for rewrite in REWRITES:
+                terms = rewrite(egraph, node)
+                budget = node_limit - len(matches)
+                matches.extend(
+                    (class_id, term) for term in itertools.islice(terms, budget)
+                )
+
+        changed = False
+        for class_id, term in matches:
+            if egraph.num_nodes >= node_limit:
+                break
+            changed |= egraph.merge(class_id, egraph.add_term(term))
+
+        egraph.rebuild()
+        if not changed or egraph.num_nodes >= node_limit or len(matched) >= match_limit:
+            break
+
+    return time.perf_counter() <= deadline
+
+
+# Classes known to be a literal are extracted as that literal, so their
+# e-nodes aren't worth rewriting.
+def iter_op_nodes(egraph: EGraph) -> Iterator[tuple[int, OpNode]]:
+    for class_id, nodes in egraph.nodes_by_class.items():
+        if class_id in egraph.literal_by_class:
+            continue
+
+        for node in nodes:
+            if type(node) is OpNode:
+                yield class_id, node
+
+
+# Costs follow the instructions that code generation emits for each IR
+# instruction, with multiplications and divisions by literals strength
+# reduced. Each operation loads its operands from their stack slots and
+# stores its result.
+LOAD_STORE_COST = 3
+# `idiv` issues one division every several cycles.
+IDIV_COST = 10
+
+
+# Register to register copies store the loaded value to another slot.
+COPY_COST = 2
+
+
+def node_cost(egraph: EGraph, node: ENode) -> int:
+    if type(node) is LiteralNode:
+        return literal_cost(node.value)
+
+    return op_cost(node.op, egraph.literal(node.left), egraph.literal(node.right))
+
+
+def literal_cost(value: int) -> int:
+    # Stores to memory only take a sign-extended 32-bit immediate.
+    return 1 if fits_int32(value) else 2
+
+
+# The cost of an operation, given the values of its operands that are
+# literals.
+def op_cost(op: BinOp, left: Optional[int], right: Optional[int]) -> int:
+    match op:
+        case BinOp.Add | BinOp.Sub:
+            return LOAD_STORE_COST + 1
+        case BinOp.Mul:
+            for value in (right, left):
+                if value is not None:
+                    mul_instrs = mul_by_const_instrs(value)
+                    if mul_instrs is not None:
+                        return LOAD_STORE_COST - 1 + seq_cost(mul_instrs)
+            return LOAD_STORE_COST + IMUL_COST
+        case BinOp.Div:
+            if right is not None:
+                div_instrs = div_by_const_instrs(right)
+                if div_instrs is not None:
+                    return LOAD_STORE_COST - 1 + seq_cost(div_instrs)
+            return LOAD_STORE_COST + IDIV_COST
+
+    assert False
+
+
+def program_cost(program: Program) -> int:
+    literal_by_reg = {}
+    cost = 0
+
+    for instr in program.instructions:
+        match instr:
+            case LoadLiteralInstr(out_reg, value):
+                literal_by_reg[out_reg] = wrap_int64(value)
+                cost += literal_cost(wrap_int64(value))
+            case LoadRegInstr(out_reg, in_reg):
+                if in_reg in literal_by_reg:
+                    literal_by_reg[out_reg] = literal_by_reg[in_reg]
+                cost += COPY_COST
+            case BinOpInstr(_, op, left_reg, right_reg):
+                cost += op_cost(
+                    op, literal_by_reg.get(left_reg), literal_by_reg.get(right_reg)
+                )
+
+    return cost
+
+
+# Picks the cheapest e-node of each class, counting the cost of the operands
+# of each e-node as trees. Classes are finalized cheapest first, and an e-node
+# is only considered once both its operands are, like in Dijkstra's
+# algorithm, since an operation always costs more than its operands.
+def extract(egraph: EGraph) -> dict[int, tuple[int, ENode]]:
+    users_by_class = {}
+    heap = []
+    counter = itertools.count()
+
+    for class_id, nodes in egraph.nodes_by_class.items():
+        for node in nodes:
+            if type(node) is LiteralNode:
+                heap.append((node_cost(egraph, node), next(counter), class_id, node))
+                continue
+
+            users_by_class.setdefault(node.left, []).append((class_id, node))
+            if node.right != node.left:
+                users_by_class.setdefault(node.right, []).append((class_id, node))
+
+    heapq.heapify(heap)
+    best_by_class = {}
+
+    while heap:
+        cost, _, class_id, node = heapq.heappop(heap)
+        if class_id in best_by_class:
+            continue
+        best_by_class[class_id] = (cost, node)
+
+        for user_class_id, user in users_by_class.get(class_id, ()):
+            if user_class_id in best_by_class:
+                continue
+            left = best_by_class.get(user.left)
+            right = best_by_class.get(user.right)
+            if left is None or right is None:
+                continue
+            user_cost = node_cost(egraph, user) + left[0] + right[0]
+            heapq.heappush(heap, (user_cost, next(counter), user_class_id, user))
+
+    return best_by_class
+
+
+# Builds an e-graph from the expression DAG of `program`, saturates it with
+# algebraic rewrites, and emits the cheapest equivalent program according to
+# the cost model of x86-64 code generation.
+#
+# Prints, and divisions that may trap, keep their order. Everything else is
+# computed right before the first of them that needs it, and dropped if none
+# does. If the cheapest form of a value would compute a division that may
+# trap ahead of time, the program is returned unchanged.
+def rewrite_with_egraph(
+    program: Program,
+    node_limit: int = NODE_LIMIT,
+    iteration_limit: int = ITERATION_LIMIT,
+    match_limit: int = MATCH_LIMIT,
+    time_limit: float = TIME_LIMIT,
+) -> Program:
+    egraph = EGraph()
+    class_by_reg = {}
+    # Prints, as their argument class, and divisions, as their e-node.
+    roots = []
+
+    # Copies share the class of their source, and repeated operations share
+    # an e-node, so equal terms get the same class like in IrGen's value
+    # table.
+    for instr in program.instructions:
+        instr_type = type(instr)
+
+        if instr_type is LoadLiteralInstr:
+            literal_node = LiteralNode(wrap_int64(instr.value))
+            class_by_reg[instr.out_reg.idx] = egraph.add(literal_node)
+        elif instr_type is LoadRegInstr:
+            class_by_reg[instr.out_reg.idx] = class_by_reg[instr.in_reg.idx]
+        elif instr_type is BinOpInstr:
+            node = OpNode(
+                instr.op,
+                class_by_reg[instr.left_reg.idx],
+                class_by_reg[instr.right_reg.idx],
+            )
+            class_by_reg[instr.out_reg.idx] = egraph.add(node)
+            if instr.op == BinOp.Div:
+                roots.append(node)
+        else:
+            roots.append(class_by_reg[instr.arg_reg.idx])
+
+    if not saturate(egraph, node_limit, iteration_limit, match_limit, time_limit):
+        return program
+
+    emitter = Emitter(egraph, extract(egraph))
+    try:
+        for root in roots:
+            if type(root) is int:
+                emitter.emit_print(root)
+            elif emitter.may_trap(root):
+                emitter.emit_trapping_div(root)
+    except TrapHoisted:
+        return program
+
+    if emitter.cost >= program_cost(program):
+        return program
+
+    return replace(program, instructions=emitter.instrs)
+
+
+class TrapHoisted(Exception):
+    pass
+
+
+class Emitter:
+    def __init__(self, egraph: EGraph, best_by_class: dict[int, tuple[int, ENode]]):
+        self.egraph = egraph
+        self.best_by_class = best_by_class
+        self.reg_by_class = {}
+        self.instrs = []
+        self.cost = 0
+
+    # Like the `dce` pass, only divisions by literals other than 0 and -1 are
+    # known not to trap.
+    def may_trap(self, node: OpNode) -> bool:
+        divisor = self.egraph.literal(node.right)
+
+        return divisor is None or divisor in (0, -1)
+
+    def emit_print(self, class_id: int):
+        self.instrs.append(PrintInstr(self.emit_class(class_id)))
+
+    def emit_trapping_div(self, node: OpNode):
+        node = self.egraph.canonicalize(node)
+        class_id = self.egraph.find(self.egraph.class_by_node[node])
+        if class_id not in self.reg_by_class:
+            self.reg_by_class[class_id] = self.emit_node(node)
+
+    # Emits the operands of a class before the class itself. Dependency chains
+    # are as long as the program, so this uses a stack instead of recursion.
+    def emit_class(self, class_id: int) -> Reg:
+        class_id = self.egraph.find(class_id)
+        stack = [class_id]
+
+        while stack:
+            top = stack[-1]
+            if top in self.reg_by_class:
+                stack.pop()
+                continue
+
+            _, node = self.best_by_class[top]
+            if type(node) is OpNode:
+                if node.op == BinOp.Div and self.may_trap(node):
+                    raise TrapHoisted()
+
+                operands = [
+                    operand
+                    for operand in map(self.egraph.find, (node.left, node.right))
+                    if operand not in self.reg_by_class
+                ]
+                if operands:
+                    stack.extend(operands)
+                    continue
+
+            stack.pop()
+            self.reg_by_class[top] = self.emit_node(node)
+
+        return self.reg_by_class[class_id]
+
+    def emit_node(self, node: ENode) -> Reg:
+        if type(node) is LiteralNode:
+            instr = LoadLiteralInstr(self.new_reg(), node.value)
+        else:
+            left_reg = self.emit_class(node.left)
+            right_reg = self.emit_class(node.right)
+            instr = BinOpInstr(self.new_reg(), node.op, left_reg, right_reg)
+
+        self.instrs.append(instr)
+        self.cost += node_cost(self.egraph, node)
+        return instr.out_reg
+
+    def new_reg(self) -> Reg:
+        return Reg(len(self.instrs))
@@ -0,0 +1,88 @@
+from dataclasses import dataclass
+
+from minic.ir import (BinOpInstr, Instr, LoadLiteralInstr, LoadRegInstr,
+                      PrintInstr, Program, wrap_int64)
+from minic.ir_compact import (OP_ADD, OP_DIV, OP_LOAD_LITERAL, OP_LOAD_REG,
+                              OP_MUL, OP_PRINT, OP_SUB, OPCODE_BY_BIN_OP)
+
+BIAS = 2**63
+MASK = 2**64 - 1
+
+
+# Same as eval_bin_op(BinOp.Div, ...), without the dispatch on the operator.
+def div_int64(left: int, right: int) -> int:
+    if (left < 0) == (right < 0):
+        quotient = abs(left) // abs(right)
+    else:
+        quotient = -(abs(left) // abs(right))
+
+    return ((quotient + BIAS) & MASK) - BIAS
+
+
+# IR lowered to a flat list of (opcode, out, left, right) tuples of register
+# indices, except that the `left` of OP_LOAD_LITERAL is the value itself and
+# the `out` of OP_PRINT is the printed register.
+@dataclass
+class CompiledIr:
+    code: list[tuple[int, int, int, int]]
+    num_regs: int
+
+    # Runs the code on a register file indexed by `Reg.idx` and returns the
+    # program's output. Division by zero raises ZeroDivisionError.
+    def run(self) -> str:
+        r = [0] * self.num_regs
+        values = []
+        out = values.append
+
+        for op, o, a, b in self.code:
+            if op == OP_LOAD_LITERAL:
+                r[o] = a
+            elif op == OP_LOAD_REG:
+                r[o] = r[a]
+            elif op == OP_ADD:
+                r[o] = ((r[a] + r[b] + BIAS) & MASK) - BIAS
+            elif op == OP_SUB:
+                r[o] = ((r[a] - r[b] + BIAS) & MASK) - BIAS
+            elif op == OP_MUL:
+                r[o] = ((r[a] * r[b] + BIAS) & MASK) - BIAS
+            elif op == OP_DIV:
+                r[o] = div_int64(r[a], r[b])
+            else:
+                out(r[o])
+
+        return "".join(f"{value}\n" for value in values)
+
+
+def compile_ir(program: Program) -> CompiledIr:
+    code = [compile_instr(instr) for instr in program.instructions]
+    # Registers are written before they are read, so the highest output
+    # register bounds the register file.
+    num_regs = 1 + max((out for _, out, _, _ in code), default=-1)
+
+    return CompiledIr(code, num_regs)
+
+
+def run_ir(program: Program) -> str:
+    return compile_ir(program).run()
+
+
+def compile_instr(instr: Instr) -> tuple[int, int, int, int]:
+    # Dispatching on the exact type is much cheaper than a match statement
+    # over the instruction dataclasses, and this runs once per instruction.
+    instr_type = type(instr)
+
+    if instr_type is BinOpInstr:
+        return (
+            OPCODE_BY_BIN_OP[instr.op],
+            instr.out_reg.idx,
+            instr.left_reg.idx,
+            instr.right_reg.idx,
+        )
+    if instr_type is LoadLiteralInstr:
+        return (OP_LOAD_LITERAL, instr.out_reg.idx, wrap_int64(instr.value), 0)
+    if instr_type is LoadRegInstr:
+        return (OP_LOAD_REG, instr.out_reg.idx, instr.in_reg.idx, 0)
+    if instr_type is PrintInstr:
+        return (OP_PRINT, instr.arg_reg.idx, 0, 0)
+
+    assert False
@@ -1,14 +1,26 @@
 from minic import ast
 from minic.ast import (AssignStmt, AstVisitor, BinOpExpr, NumberExpr,
                        ParenExpr, PrintStmt, ProgramStmt, VarExpr)
-from minic.ir import (BinOp, BinOpInstr, LoadLiteralInstr, LoadRegInstr,
+from minic.ir import (BinOp, BinOpInstr, Instr, LoadLiteralInstr, LoadRegInstr,
                       PrintInstr, Program, Reg)
 
 
 class IrGen(AstVisitor):
-    def __init__(self, program_ast):
+    # With `intern_terms`, repeated literals and operations reuse the register
+    # of their first occurrence. Without it, the `cse` pass does the same later.
+    #
+    # With `sethi_ullman`, the operand that needs more registers to evaluate is
+    # generated first, so that fewer temporaries are live at once.
+    def __init__(
+        self, program_ast, intern_terms: bool = True, sethi_ullman: bool = False
+    ):
         self.program_ast = program_ast
+        self.intern_terms = intern_terms
+        self.sethi_ullman = sethi_ullman
+        self.reg_need_by_expr_id = {}
         self.reg_by_term = {}
+        self.reg_by_var = {}
+        self.first_reg_by_var = {}
         self.reg_stack = []
         self.reg_idx_counter = 0
         self.instructions = []
@@ -20,13 +32,24 @@ class IrGen(AstVisitor):
             instructions=self.instructions,
         )
 
+    # Generates the instructions of a single statement, and returns them
+    # instead of adding them to the program. Lowering a program this way, one
+    # statement at a time, keeps memory bounded when terms aren't interned.
+    def gen_stmt(self, stmt: ast.Stmt) -> list[Instr]:
+        self.instructions = []
+        stmt.accept(self)
+        self.reg_need_by_expr_id.clear()
+
+        return self.instructions
+
     def new_reg(self):
         reg = Reg(self.reg_idx_counter)
         self.reg_idx_counter += 1
         return reg
 
     def intern_term(self, term_key, reg):
-        self.reg_by_term[term_key] = reg
+        if self.intern_terms:
+            self.reg_by_term[term_key] = reg
 
     def get_interned_term(self, term_key):
         assert self.is_term_interned(term_key)
@@ -40,7 +63,8 @@ class IrGen(AstVisitor):
 
     def visit_assign_stmt(self, assign_stmt: AssignStmt):
         out_reg = self.new_reg()
-        self.intern_term(assign_stmt.target_ident, out_reg)
+        self.reg_by_var[assign_stmt.target_ident] = out_reg
+        self.first_reg_by_var.setdefault(assign_stmt.target_ident, out_reg)
         in_reg = self.reg_stack.pop()
         load_instr = LoadRegInstr(out_reg, in_reg)
         self.instructions.append(load_instr)
@@ -53,9 +77,42 @@ class IrGen(AstVisitor):
     def visit_paren_expr(self, paren_expr: ParenExpr):
         pass
 
+    def visits_right_first(self, bin_op_expr: BinOpExpr) -> bool:
+        if not self.sethi_ullman:
+            return False
+
+        return self.reg_need(bin_op_expr.right) > self.reg_need(bin_op_expr.left)
+
+    # The Sethi-Ullman number of `expr`: how many registers evaluating it
+    # takes, if the operand that takes more is always evaluated first.
+    def reg_need(self, expr: ast.Expr) -> int:
+        expr_id = id(expr)
+        if expr_id in self.reg_need_by_expr_id:
+            return self.reg_need_by_expr_id[expr_id]
+
+        match expr:
+            case BinOpExpr(_, left, right):
+                left_need = self.reg_need(left)
+                right_need = self.reg_need(right)
+                if left_need == right_need:
+                    need = left_need + 1
+                else:
+                    need = max(left_need, right_need)
+            case ParenExpr(inner):
+                need = self.reg_need(inner)
+            case _:
+                need = 1
+
+        self.reg_need_by_expr_id[expr_id] = need
+        return need
+
     def visit_bin_op_expr(self, bin_op_expr: BinOpExpr):
-        right_reg = self.reg_stack.pop()
-        left_reg = self.reg_stack.pop()
+        if self.visits_right_first(bin_op_expr):
+            left_reg = self.reg_stack.pop()
+            right_reg = self.reg_stack.pop()
+        else:
+            right_reg = self.reg_stack.pop()
+            left_reg = self.reg_stack.pop()
 
         instr_op = bin_op_from_node_op(bin_op_expr.op)
         term = (instr_op, right_reg, left_reg)
@@ -77,7 +134,7 @@ class IrGen(AstVisitor):
         self.reg_stack.append(out_reg)
 
     def visit_var_expr(self, var_expr: VarExpr):
-        var_reg = self.reg_by_term[var_expr.ident]
+        var_reg = self.reg_by_var[var_expr.ident]
         self.reg_stack.append(var_reg)
 
     def visit_number_expr(self, number_expr: NumberExpr):
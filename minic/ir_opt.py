@@ -0,0 +1,151 @@
+from dataclasses import replace
+
+from minic.ir import (INT64_MIN, BinOp, BinOpInstr, Instr, LoadLiteralInstr,
+                      LoadRegInstr, PrintInstr, Program, Reg, eval_bin_op,
+                      wrap_int64)
+from minic.ir_ssa import SsaProgram, instr_uses, rename_uses
+
+# IR passes take a Program, followed by the results of the analyses they use,
+# and return the optimized Program. They return the same Program when they
+# change nothing, so that cached analyses stay valid. Passes that take an
+# SsaProgram rewrite it along with the program, and only read the program
+# through it, so it can be shared by consecutive passes.
+
+
+def compute_ssa(program: Program) -> SsaProgram:
+    return SsaProgram(program)
+
+
+# Reuses the register of the first load of a literal and of the first
+# computation of an operation on the same registers, like IrGen does when it
+# interns terms.
+def eliminate_common_subexprs(program: Program) -> Program:
+    reg_by_term = {}
+    reg_by_reg = {}
+    instrs = []
+
+    for instr in program.instructions:
+        instr = rename_uses(instr, reg_by_reg)
+
+        match instr:
+            case LoadLiteralInstr(out_reg, value):
+                term = value
+            case BinOpInstr(out_reg, op, left_reg, right_reg):
+                term = (op, right_reg, left_reg)
+            case _:
+                instrs.append(instr)
+                continue
+
+        if term in reg_by_term:
+            reg_by_reg[out_reg] = reg_by_term[term]
+        else:
+            reg_by_term[term] = out_reg
+            instrs.append(instr)
+
+    if not reg_by_reg:
+        return program
+
+    return replace(program, instructions=instrs)
+
+
+# Makes reads of a copied register read the original register instead. The
+# copies themselves are left for `dce`.
+def propagate_copies(program: Program, ssa: SsaProgram) -> Program:
+    changed = False
+
+    for _, instr in ssa:
+        if isinstance(instr, LoadRegInstr) and ssa.has_uses(instr.out_reg):
+            # Earlier copies have already renamed `in_reg` to an original.
+            ssa.replace_all_uses_with(instr.out_reg, instr.in_reg)
+            changed = True
+
+    if not changed:
+        return program
+
+    return ssa.to_program()
+
+
+# Replaces operations on literals with a load of their result. Operands are
+# only looked up one instruction back, so copies have to be propagated first.
+# Divisions that trap at run time are kept.
+def fold_constants(program: Program, ssa: SsaProgram) -> Program:
+    worklist = [
+        instr_idx for instr_idx, instr in ssa if isinstance(instr, BinOpInstr)
+    ]
+    worklist.reverse()
+    changed = False
+
+    while worklist:
+        instr_idx = worklist.pop()
+        instr = ssa.instructions[instr_idx]
+        if not isinstance(instr, BinOpInstr):
+            continue
+
+        left = get_literal(ssa, instr.left_reg)
+        right = get_literal(ssa, instr.right_reg)
+        if left is None or right is None or may_trap(instr.op, left, right):
+            continue
+
+        value = eval_bin_op(instr.op, left, right)
+        ssa.replace(instr_idx, LoadLiteralInstr(instr.out_reg, value))
+        changed = True
+        # Only the readers of the new literal can become foldable.
+        worklist.extend(ssa.get_uses(instr.out_reg))
+
+    if not changed:
+        return program
+
+    return ssa.to_program()
+
+
+def get_literal(ssa: SsaProgram, reg: Reg):
+    instr = ssa.get_def(reg)
+    if not isinstance(instr, LoadLiteralInstr):
+        return None
+
+    return wrap_int64(instr.value)
+
+
+def may_trap(op: BinOp, left: int, right: int) -> bool:
+    return op == BinOp.Div and (right == 0 or (right == -1 and left == INT64_MIN))
+
+
+# Removes instructions whose result is never read, except divisions that may
+# trap.
+def eliminate_dead_code(program: Program, ssa: SsaProgram) -> Program:
+    worklist = [
+        instr_idx
+        for instr_idx, instr in ssa
+        if not isinstance(instr, PrintInstr) and not ssa.has_uses(instr.out_reg)
+    ]
+    changed = False
+
+    while worklist:
+        instr_idx = worklist.pop()
+        instr = ssa.instructions[instr_idx]
+        if instr is None or ssa.has_uses(instr.out_reg):
+            continue
+        if is_div_that_may_trap(instr, ssa):
+            continue
+
+        ssa.erase(instr_idx)
+        changed = True
+        # Erasing an instruction can only make its operands dead.
+        for reg in instr_uses(instr):
+            def_idx = ssa.get_def_idx(reg)
+            if def_idx is not None and not ssa.has_uses(reg):
+                worklist.append(def_idx)
+
+    if not changed:
+        return program
+
+    return ssa.to_program()
+
+
+def is_div_that_may_trap(instr: Instr, ssa: SsaProgram) -> bool:
+    match instr:
+        case BinOpInstr(_, BinOp.Div, _, right_reg):
+            divisor = get_literal(ssa, right_reg)
+            return divisor is None or divisor in (0, -1)
+
+    return False
@@ -0,0 +1,150 @@
+from collections import Counter
+from dataclasses import replace
+
+from minic.ir import (BinOp, BinOpInstr, Instr, LoadLiteralInstr, LoadRegInstr,
+                      PrintInstr, Program, Reg, eval_bin_op, wrap_int64)
+from minic.ir_ssa import instr_uses
+
+# Addition and multiplication wrap around at 64 bits, so they are still
+# associative and commutative, and any grouping of their operands computes
+# the same result.
+IDENTITY_BY_OP = {
+    BinOp.Add: 0,
+    BinOp.Mul: 1,
+}
+
+
+# Rewrites each tree of additions or multiplications into a balanced tree, so
+# that its operations no longer depend on each other one after the other. The
+# literal operands of a tree are combined into a single literal, applied last.
+#
+# An operation belongs to the tree of its reader if that is the only reader
+# and it applies the same operator. Copies would hide such readers, so they
+# have to be propagated and removed first.
+def reassociate(program: Program) -> Program:
+    def_by_reg = {}
+    use_counts = Counter()
+    reader_op_by_reg = {}
+
+    for instr in program.instructions:
+        if type(instr) is not PrintInstr:
+            def_by_reg[instr.out_reg.idx] = instr
+        for reg in instr_uses(instr):
+            use_counts[reg.idx] += 1
+        if type(instr) is BinOpInstr:
+            reader_op_by_reg[instr.left_reg.idx] = instr.op
+            reader_op_by_reg[instr.right_reg.idx] = instr.op
+
+    def is_inner_node(instr: Instr) -> bool:
+        return (
+            type(instr) is BinOpInstr
+            and instr.op in IDENTITY_BY_OP
+            and use_counts[instr.out_reg.idx] == 1
+            and reader_op_by_reg.get(instr.out_reg.idx) == instr.op
+        )
+
+    rewriter = TreeRewriter(next_reg_idx=1 + max(def_by_reg, default=-1))
+    instrs = []
+    changed = False
+
+    for instr in program.instructions:
+        # Inner nodes are rewritten along with the root of their tree, which
+        # comes after them.
+        if is_inner_node(instr):
+            continue
+
+        if type(instr) is not BinOpInstr or instr.op not in IDENTITY_BY_OP:
+            instrs.append(instr)
+            continue
+
+        operands = []
+        regs = [instr.right_reg, instr.left_reg]
+        while regs:
+            reg = regs.pop()
+            operand_def = def_by_reg.get(reg.idx)
+            if is_inner_node(operand_def):
+                regs += [operand_def.right_reg, operand_def.left_reg]
+            else:
+                operands.append((reg, operand_def))
+
+        if len(operands) < 3:
+            instrs.append(instr)
+            continue
+
+        instrs += rewriter.rewrite_tree(instr.out_reg, instr.op, operands)
+        changed = True
+
+    if not changed:
+        return program
+
+    return replace(program, instructions=instrs)
+
+
+class TreeRewriter:
+    def __init__(self, next_reg_idx: int):
+        self.next_reg_idx = next_reg_idx
+
+    def new_reg(self) -> Reg:
+        reg = Reg(self.next_reg_idx)
+        self.next_reg_idx += 1
+        return reg
+
+    # Returns the instructions that compute `op` over all of `operands` into
+    # `out_reg`.
+    def rewrite_tree(
+        self, out_reg: Reg, op: BinOp, operands: list[tuple[Reg, Instr]]
+    ) -> list[Instr]:
+        regs = []
+        literal = None
+
+        for reg, operand_def in operands:
+            if isinstance(operand_def, LoadLiteralInstr):
+                value = wrap_int64(operand_def.value)
+                literal = value if literal is None else eval_bin_op(op, literal, value)
+            else:
+                regs.append(reg)
+
+        if not regs:
+            return [LoadLiteralInstr(out_reg, literal)]
+
+        instrs = []
+
+        if literal is None or literal == IDENTITY_BY_OP[op]:
+            self.balance(op, regs, out_reg, instrs)
+            return instrs
+
+        if len(regs) == 1:
+            balanced_reg = regs[0]
+        else:
+            balanced_reg = self.new_reg()
+            self.balance(op, regs, balanced_reg, instrs)
+
+        literal_reg = self.new_reg()
+        instrs.append(LoadLiteralInstr(literal_reg, literal))
+        instrs.append(BinOpInstr(out_reg, op, balanced_reg, literal_reg))
+
+        return instrs
+
+    # Combines `regs` into a tree as short as possible, whose root writes
+    # `out_reg`. Subtrees are emitted one after the other, and the subtree
+    # computed last is the left operand of their parent. Code generation
+    # loads the left operand first, so that load is the one right after the
+    # store of its value, which the `store-forward` pass turns into a move.
+    def balance(self, op: BinOp, regs: list[Reg], out_reg: Reg, instrs: list[Instr]):
+        if len(regs) == 1:
+            instrs.append(LoadRegInstr(out_reg, regs[0]))
+            return
+
+        half = len(regs) // 2
+        older_reg = self.balance_subtree(op, regs[:half], instrs)
+        recent_reg = self.balance_subtree(op, regs[half:], instrs)
+        instrs.append(BinOpInstr(out_reg, op, recent_reg, older_reg))
+
+    def balance_subtree(self, op: BinOp, regs: list[Reg], instrs: list[Instr]) -> Reg:
+        if len(regs) == 1:
+            return regs[0]
+
+        out_reg = self.new_reg()
+        self.balance(op, regs, out_reg, instrs)
+
+        return out_reg
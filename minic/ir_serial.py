@@ -0,0 +1,196 @@
+from typing import BinaryIO, Iterable, Iterator
+
+from minic.ir import (BinOpInstr, Instr, LoadLiteralInstr, LoadRegInstr,
+                      PrintInstr, Program, Reg)
+from minic.ir_compact import (BIN_OP_BY_OPCODE, OP_LOAD_LITERAL, OP_LOAD_REG,
+                              OP_PRINT, OPCODE_BY_BIN_OP)
+
+# A serialized program is MAGIC, the format version and then one record per
+# instruction, terminated by OP_END. A record is its opcode followed by its
+# operands, all as LEB128 varints: the output register first, then the input
+# registers, or the literal of OP_LOAD_LITERAL. Registers are encoded relative
+# to the last output register, which keeps them to a single byte for the code
+# IrGen emits: an output register as zigzag(reg - last - 1) and an input
+# register as zigzag(last - reg). Literals are zigzag encoded too.
+MAGIC = b"MINIC-IR"
+VERSION = 1
+OP_END = 0x7F
+
+IR_SUFFIX = ".mir"
+
+CHUNK_SIZE = 65536
+
+
+def write_ir(instrs: Iterable[Instr], stream: BinaryIO):
+    out = bytearray(MAGIC)
+    write_varint(out, VERSION)
+    last = -1
+
+    for instr in instrs:
+        match instr:
+            case LoadLiteralInstr(out_reg, value):
+                out.append(OP_LOAD_LITERAL)
+                write_varint(out, zigzag(out_reg.idx - last - 1))
+                write_varint(out, zigzag(value))
+                last = out_reg.idx
+            case LoadRegInstr(out_reg, in_reg):
+                out.append(OP_LOAD_REG)
+                write_varint(out, zigzag(out_reg.idx - last - 1))
+                write_varint(out, zigzag(last - in_reg.idx))
+                last = out_reg.idx
+            case BinOpInstr(out_reg, op, left_reg, right_reg):
+                out.append(OPCODE_BY_BIN_OP[op])
+                write_varint(out, zigzag(out_reg.idx - last - 1))
+                write_varint(out, zigzag(last - left_reg.idx))
+                write_varint(out, zigzag(last - right_reg.idx))
+                last = out_reg.idx
+            case PrintInstr(arg_reg):
+                out.append(OP_PRINT)
+                write_varint(out, zigzag(last - arg_reg.idx))
+
+        if len(out) >= CHUNK_SIZE:
+            stream.write(out)
+            out.clear()
+
+    out.append(OP_END)
+    stream.write(out)
+
+
+# Reads instructions from `stream` as they are decoded. Raises ValueError if
+# the stream isn't serialized IR of this version or is truncated.
+def iter_ir(stream: BinaryIO) -> Iterator[Instr]:
+    reader = IrReader(stream)
+
+    if reader.read_bytes(len(MAGIC)) != MAGIC:
+        raise ValueError("not a serialized minic IR stream")
+    version = reader.read_varint()
+    if version != VERSION:
+        raise ValueError(f"unsupported IR version {version}, expected {VERSION}")
+
+    read_varint = reader.read_varint
+    # Reg is immutable, so every reference to a register can share one object.
+    reg_by_idx = {}
+    last = -1
+
+    def get_reg(idx: int) -> Reg:
+        reg = reg_by_idx.get(idx)
+        if reg is None:
+            reg = reg_by_idx[idx] = Reg(idx)
+        return reg
+
+    def read_out_reg() -> Reg:
+        return get_reg(last + 1 + unzigzag(read_varint()))
+
+    def read_in_reg() -> Reg:
+        return get_reg(last - unzigzag(read_varint()))
+
+    while True:
+        opcode = read_varint()
+
+        if opcode == OP_LOAD_LITERAL:
+            out_reg = read_out_reg()
+            instr = LoadLiteralInstr(out_reg, unzigzag(read_varint()))
+        elif opcode == OP_LOAD_REG:
+            out_reg = read_out_reg()
+            instr = LoadRegInstr(out_reg, read_in_reg())
+        elif opcode == OP_PRINT:
+            yield PrintInstr(read_in_reg())
+            continue
+        elif opcode in BIN_OP_BY_OPCODE:
+            out_reg = read_out_reg()
+            left_reg = read_in_reg()
+            right_reg = read_in_reg()
+            instr = BinOpInstr(out_reg, BIN_OP_BY_OPCODE[opcode], left_reg, right_reg)
+        elif opcode == OP_END:
+            return
+        else:
+            raise ValueError(f"unknown IR opcode {opcode}")
+
+        last = out_reg.idx
+        yield instr
+
+
+def read_ir(stream: BinaryIO) -> Program:
+    return Program(instructions=list(iter_ir(stream)))
+
+
+class IrReader:
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.buf = b""
+        self.pos = 0
+        self.eof = False
+
+    # Makes at least `size` bytes available, unless the stream ends first.
+    def ensure(self, size: int):
+        if len(self.buf) - self.pos >= size or self.eof:
+            return
+
+        chunks = [self.buf[self.pos :]]
+        available = len(chunks[0])
+
+        while available < size:
+            chunk = self.stream.read(CHUNK_SIZE)
+            if not chunk:
+                self.eof = True
+                break
+            chunks.append(chunk)
+            available += len(chunk)
+
+        self.buf = b"".join(chunks)
+        self.pos = 0
+
+    def read_bytes(self, size: int) -> bytes:
+        self.ensure(size)
+        data = self.buf[self.pos : self.pos + size]
+        self.pos += len(data)
+
+        return data
+
+    def read_varint(self) -> int:
+        pos = self.pos
+        if pos < len(self.buf):
+            byte = self.buf[pos]
+            if byte < 0x80:
+                self.pos = pos + 1
+                return byte
+
+        return self.read_long_varint()
+
+    def read_long_varint(self) -> int:
+        buf = self.buf
+        pos = self.pos
+        result = 0
+        shift = 0
+
+        while True:
+            if pos == len(buf):
+                self.pos = pos
+                self.ensure(1)
+                if self.pos == len(self.buf):
+                    raise ValueError("truncated IR stream")
+                buf = self.buf
+                pos = self.pos
+
+            byte = buf[pos]
+            pos += 1
+            result |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                self.pos = pos
+                return result
+            shift += 7
+
+
+def write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def zigzag(value: int) -> int:
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value: int) -> int:
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
@@ -0,0 +1,115 @@
+from typing import Iterator, Optional
+
+from minic.ir import BinOpInstr, Instr, LoadRegInstr, PrintInstr, Program, Reg
+
+
+def instr_uses(instr: Instr) -> tuple[Reg, ...]:
+    instr_type = type(instr)
+
+    if instr_type is BinOpInstr:
+        return (instr.left_reg, instr.right_reg)
+    if instr_type is LoadRegInstr:
+        return (instr.in_reg,)
+    if instr_type is PrintInstr:
+        return (instr.arg_reg,)
+
+    return ()
+
+
+def rename_uses(instr: Instr, reg_by_reg: dict[Reg, Reg]) -> Instr:
+    match instr:
+        case LoadRegInstr(out_reg, in_reg):
+            return LoadRegInstr(out_reg, reg_by_reg.get(in_reg, in_reg))
+        case BinOpInstr(out_reg, op, left_reg, right_reg):
+            return BinOpInstr(
+                out_reg,
+                op,
+                reg_by_reg.get(left_reg, left_reg),
+                reg_by_reg.get(right_reg, right_reg),
+            )
+        case PrintInstr(arg_reg):
+            return PrintInstr(reg_by_reg.get(arg_reg, arg_reg))
+
+    return instr
+
+
+# A program in SSA form, with the instruction that writes each register and
+# the instructions that read it. Instructions are referred to by their index
+# in the original program, which stays valid as instructions are replaced
+# and erased, so that every rewrite only costs as much as the uses it
+# touches.
+class SsaProgram:
+    def __init__(self, program: Program):
+        self.instructions: list[Optional[Instr]] = list(program.instructions)
+        # Keyed by `Reg.idx`, since hashing ints is much cheaper than hashing
+        # Reg dataclasses.
+        self.def_by_reg: dict[int, int] = {}
+        self.uses_by_reg: dict[int, set[int]] = {}
+
+        for instr_idx, instr in enumerate(self.instructions):
+            self.add_def_use(instr_idx, instr)
+
+    def to_program(self) -> Program:
+        return Program(
+            instructions=[instr for instr in self.instructions if instr is not None]
+        )
+
+    def __iter__(self) -> Iterator[tuple[int, Instr]]:
+        for instr_idx, instr in enumerate(self.instructions):
+            if instr is not None:
+                yield instr_idx, instr
+
+    def get_def(self, reg: Reg) -> Optional[Instr]:
+        instr_idx = self.def_by_reg.get(reg.idx)
+
+        return None if instr_idx is None else self.instructions[instr_idx]
+
+    def get_def_idx(self, reg: Reg) -> Optional[int]:
+        return self.def_by_reg.get(reg.idx)
+
+    def get_uses(self, reg: Reg) -> set[int]:
+        return self.uses_by_reg.get(reg.idx, set())
+
+    def has_uses(self, reg: Reg) -> bool:
+        return bool(self.uses_by_reg.get(reg.idx))
+
+    def replace_all_uses_with(self, old_reg: Reg, new_reg: Reg):
+        if old_reg == new_reg:
+            return
+
+        reg_by_reg = {old_reg: new_reg}
+        uses = self.uses_by_reg.pop(old_reg.idx, set())
+
+        for instr_idx in uses:
+            self.instructions[instr_idx] = rename_uses(
+                self.instructions[instr_idx], reg_by_reg
+            )
+
+        self.uses_by_reg.setdefault(new_reg.idx, set()).update(uses)
+
+    # Replaces an instruction, which must write the same register if it
+    # writes any.
+    def replace(self, instr_idx: int, instr: Instr):
+        self.remove_def_use(instr_idx, self.instructions[instr_idx])
+        self.instructions[instr_idx] = instr
+        self.add_def_use(instr_idx, instr)
+
+    def erase(self, instr_idx: int):
+        self.remove_def_use(instr_idx, self.instructions[instr_idx])
+        self.instructions[instr_idx] = None
+
+    def add_def_use(self, instr_idx: int, instr: Instr):
+        if not isinstance(instr, PrintInstr):
+            if instr.out_reg.idx in self.def_by_reg:
+                raise ValueError(f"register {instr.out_reg.idx} is written twice")
+            self.def_by_reg[instr.out_reg.idx] = instr_idx
+
+        for reg in instr_uses(instr):
+            self.uses_by_reg.setdefault(reg.idx, set()).add(instr_idx)
+
+    def remove_def_use(self, instr_idx: int, instr: Instr):
+        if not isinstance(instr, PrintInstr):
+            del self.def_by_reg[instr.out_reg.idx]
+
+        for reg in instr_uses(instr):
+            self.uses_by_reg[reg.idx].discard(instr_idx)
@@ -0,0 +1,178 @@
+import ctypes
+import mmap
+import struct
+
+from minic.elf import layout_strings
+from minic.x86_64 import X86_64_Program
+from minic.x86_64_encoder import RelocKind, X86_64_Encoder
+
+PAGE_SIZE = mmap.PAGESIZE
+
+PROT_READ = 0x1
+PROT_WRITE = 0x2
+PROT_EXEC = 0x4
+MAP_PRIVATE = 0x02
+MAP_ANONYMOUS = 0x20
+MAP_FAILED = 2**64 - 1
+
+# push rbp; mov rbp, rsp; and rsp, -16; movabs r11, <target>; call r11; leave;
+# ret. Generated code does not keep the stack 16-byte aligned at calls, which
+# the ctypes callbacks need.
+STUB_PREFIX = bytes.fromhex("554889e54883e4f049bb")
+STUB_SUFFIX = bytes.fromhex("41ffd3c9c3")
+STUB_SIZE = 32
+
+PRINTF_TYPE = ctypes.CFUNCTYPE(
+    ctypes.c_int,
+    ctypes.c_char_p,
+    ctypes.c_int64,
+    ctypes.c_int64,
+    ctypes.c_int64,
+    ctypes.c_int64,
+    ctypes.c_int64,
+)
+FWRITE_TYPE = ctypes.CFUNCTYPE(
+    ctypes.c_size_t, ctypes.c_void_p, ctypes.c_size_t, ctypes.c_size_t, ctypes.c_void_p
+)
+SETVBUF_TYPE = ctypes.CFUNCTYPE(
+    ctypes.c_int, ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int, ctypes.c_size_t
+)
+MAIN_TYPE = ctypes.CFUNCTYPE(ctypes.c_int)
+
+_libc = ctypes.CDLL(None, use_errno=True)
+_libc.mmap.restype = ctypes.c_void_p
+_libc.mmap.argtypes = [
+    ctypes.c_void_p,
+    ctypes.c_size_t,
+    ctypes.c_int,
+    ctypes.c_int,
+    ctypes.c_int,
+    ctypes.c_long,
+]
+_libc.mprotect.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int]
+_libc.munmap.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+
+
+# Captures what the generated code prints through the libc functions it calls.
+class OutputCapture:
+    def __init__(self):
+        self.chunks = []
+        self.callbacks = {
+            "printf": PRINTF_TYPE(self.printf),
+            "fwrite": FWRITE_TYPE(self.fwrite),
+            "setvbuf": SETVBUF_TYPE(self.setvbuf),
+        }
+
+    def printf(self, fmt, *args):
+        fmt = fmt.decode()
+        self.chunks.append(fmt.replace("%lld", "%d") % args[: fmt.count("%lld")])
+        return 0
+
+    def fwrite(self, ptr, size, count, stream):
+        self.chunks.append(ctypes.string_at(ptr, size * count).decode())
+        return count
+
+    def setvbuf(self, stream, buf, mode, size):
+        return 0
+
+    def output(self) -> str:
+        return "".join(self.chunks)
+
+
+# Runs `program` in-process from an executable mapping and returns its output.
+# Calls to libc are redirected to Python callbacks, so nothing is written to
+# the real stdout.
+def jit_run(program: X86_64_Program) -> str:
+    if program.freestanding:
+        raise NotImplementedError("the freestanding runtime is only emitted as text")
+
+    capture = OutputCapture()
+    encoder = X86_64_Encoder().encode(program.instructions)
+
+    data, data_labels = layout_strings(
+        {".PRINTF_FMT_LLD": "%lld\n"}
+        | {label.value: string for label, string in program.strings.items()},
+        terminate=True,
+    )
+    rodata, rodata_labels = layout_strings(
+        {label.value: string for label, string in program.rodata.items()},
+        terminate=False,
+    )
+
+    stub_symbols = sorted(
+        {reloc.symbol for reloc in encoder.relocations if reloc.kind == RelocKind.Plt32}
+    )
+    got_symbols = sorted(
+        {
+            reloc.symbol
+            for reloc in encoder.relocations
+            if reloc.kind == RelocKind.GotPcRel
+        }
+    )
+
+    stubs_offset = align(len(encoder.code), 16)
+    data_offset = stubs_offset + STUB_SIZE * len(stub_symbols)
+    rodata_offset = data_offset + len(data)
+    # Each GOT entry points at a zeroed slot standing in for the libc object.
+    got_offset = align(rodata_offset + len(rodata), 8)
+    objects_offset = got_offset + 8 * len(got_symbols)
+    size = align(objects_offset + 8 * len(got_symbols), PAGE_SIZE)
+
+    base = _libc.mmap(
+        None, size, PROT_READ | PROT_WRITE, MAP_PRIVATE | MAP_ANONYMOUS, -1, 0
+    )
+    if base is None or base == MAP_FAILED:
+        raise OSError(ctypes.get_errno(), "mmap failed")
+
+    try:
+        image = bytearray(size)
+        image[: len(encoder.code)] = encoder.code
+        image[data_offset:rodata_offset] = data
+        image[rodata_offset : rodata_offset + len(rodata)] = rodata
+
+        symbol_offsets = {
+            **{label: data_offset + offset for label, offset in data_labels.items()},
+            **{
+                label: rodata_offset + offset for label, offset in rodata_labels.items()
+            },
+        }
+
+        for idx, symbol in enumerate(stub_symbols):
+            if symbol not in capture.callbacks:
+                raise NotImplementedError(f"cannot call `{symbol}` from jitted code")
+
+            stub_offset = stubs_offset + STUB_SIZE * idx
+            target = ctypes.cast(capture.callbacks[symbol], ctypes.c_void_p).value
+            stub = STUB_PREFIX + struct.pack("<Q", target) + STUB_SUFFIX
+            image[stub_offset : stub_offset + len(stub)] = stub
+            symbol_offsets[symbol] = stub_offset
+
+        got_offset_by_symbol = {}
+        for idx, symbol in enumerate(got_symbols):
+            entry_offset = got_offset + 8 * idx
+            object_address = base + objects_offset + 8 * idx
+            image[entry_offset : entry_offset + 8] = struct.pack("<Q", object_address)
+            got_offset_by_symbol[symbol] = entry_offset
+
+        for reloc in encoder.relocations:
+            if reloc.kind == RelocKind.GotPcRel:
+                target_offset = got_offset_by_symbol[reloc.symbol]
+            else:
+                target_offset = symbol_offsets[reloc.symbol]
+
+            value = target_offset + reloc.addend - reloc.offset
+            image[reloc.offset : reloc.offset + 4] = struct.pack("<i", value)
+
+        ctypes.memmove(base, bytes(image), size)
+        if _libc.mprotect(base, size, PROT_READ | PROT_EXEC) != 0:
+            raise OSError(ctypes.get_errno(), "mprotect failed")
+
+        MAIN_TYPE(base)()
+    finally:
+        _libc.munmap(base, size)
+
+    return capture.output()
+
+
+def align(value: int, alignment: int) -> int:
+    return (value + alignment - 1) // alignment * alignment
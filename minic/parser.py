@@ -9,11 +9,13 @@ class Parser:
         self.peeked_token = None
 
     def parse_program(self):
-        stmts = []
-        while self.peek_tok().kind != TokenKind.Eof:
-            stmts.append(self.parse_stmt())
+        return ProgramStmt(list(self.iter_stmts()))
 
-        return ProgramStmt(stmts)
+    # Parses statements as they are consumed, so that the whole program
+    # doesn't have to be in memory at once.
+    def iter_stmts(self):
+        while self.peek_tok().kind != TokenKind.Eof:
+            yield self.parse_stmt()
 
     def parse_stmt(self):
         if self.peek_tok().kind == TokenKind.PrintKw:
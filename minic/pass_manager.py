@@ -0,0 +1,279 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from minic.dataflow import compute_liveness, compute_reaching_defs
+from minic.ir import Program
+from minic.ir_egraph import rewrite_with_egraph
+from minic.ir_gen import IrGen
+from minic.ir_opt import (compute_ssa, eliminate_common_subexprs,
+                          eliminate_dead_code, fold_constants,
+                          propagate_copies)
+from minic.ir_reassociate import reassociate
+from minic.parser import Parser
+from minic.scanner import Scanner
+from minic.x86_64 import X86_64_Program
+from minic.x86_64_code_gen import X86_64_CodeGen
+from minic.x86_64_peephole import forward_stores
+from minic.x86_64_scheduler import schedule_instructions
+
+
+@dataclass(frozen=True)
+class Pass:
+    name: str
+    # Called with the program and the results of the analyses in `uses`, in
+    # that order. Returns the same program if it changes nothing.
+    run: Callable[..., Any]
+    uses: tuple[str, ...] = ()
+    # Passes that have to run earlier in the pipeline. They are scheduled
+    # automatically when missing.
+    requires: tuple[str, ...] = ()
+    # Analyses that stay valid when the pass changes the program.
+    preserves: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class Pipeline:
+    ir_passes: tuple[str, ...]
+    # Optimizations done while lowering, as X86_64_CodeGen keyword arguments.
+    codegen_options: dict[str, bool]
+    machine_passes: tuple[str, ...]
+    # How IR is generated, as IrGen keyword arguments.
+    irgen_options: dict[str, bool] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class PassTiming:
+    name: str
+    seconds: float
+    instrs_before: int
+    instrs_after: int
+
+
+IR_ANALYSES: dict[str, Callable[[Program], Any]] = {}
+MACHINE_ANALYSES: dict[str, Callable[[X86_64_Program], Any]] = {}
+IR_PASSES: dict[str, Pass] = {}
+MACHINE_PASSES: dict[str, Pass] = {}
+
+
+def register_ir_analysis(name: str, compute: Callable[[Program], Any]):
+    IR_ANALYSES[name] = compute
+
+
+def register_machine_analysis(name: str, compute: Callable[[X86_64_Program], Any]):
+    MACHINE_ANALYSES[name] = compute
+
+
+def register_ir_pass(ir_pass: Pass):
+    IR_PASSES[ir_pass.name] = ir_pass
+
+
+def register_machine_pass(machine_pass: Pass):
+    MACHINE_PASSES[machine_pass.name] = machine_pass
+
+
+register_ir_analysis("ssa", compute_ssa)
+register_ir_analysis("liveness", compute_liveness)
+register_ir_analysis("reaching-defs", compute_reaching_defs)
+
+register_ir_pass(Pass("cse", eliminate_common_subexprs))
+# Passes that rewrite the SsaProgram keep it up to date with the program they
+# return.
+register_ir_pass(
+    Pass("copy-prop", propagate_copies, uses=("ssa",), preserves=("ssa",))
+)
+register_ir_pass(
+    Pass(
+        "const-fold",
+        fold_constants,
+        uses=("ssa",),
+        requires=("copy-prop",),
+        preserves=("ssa",),
+    )
+)
+register_ir_pass(
+    Pass("dce", eliminate_dead_code, uses=("ssa",), preserves=("ssa",))
+)
+
+register_ir_pass(Pass("reassociate", reassociate, requires=("copy-prop", "dce")))
+register_ir_pass(Pass("egraph", rewrite_with_egraph))
+
+register_machine_pass(Pass("store-forward", forward_stores))
+register_machine_pass(Pass("schedule", schedule_instructions))
+
+FULL_LOWERING = dict(
+    reduce_mul=True,
+    reduce_div=True,
+    coalesce_prints=True,
+    prerender_prints=True,
+)
+
+PIPELINES = {
+    0: Pipeline(ir_passes=(), codegen_options={}, machine_passes=()),
+    1: Pipeline(
+        ir_passes=("cse",),
+        codegen_options=FULL_LOWERING,
+        machine_passes=(),
+        irgen_options=dict(sethi_ullman=True),
+    ),
+    # Literal arithmetic is folded before the e-graph, which would otherwise
+    # spend its budget on rewriting it. Programs have no inputs, so every
+    # value is folded by the time it's lowered, and nothing is vectorized yet.
+    2: Pipeline(
+        ir_passes=(
+            "cse",
+            "const-fold",
+            "dce",
+            "egraph",
+            "reassociate",
+            "const-fold",
+            "dce",
+        ),
+        codegen_options=dict(FULL_LOWERING, vectorize=True),
+        machine_passes=("store-forward", "schedule"),
+        irgen_options=dict(sethi_ullman=True),
+    ),
+}
+
+OPT_LEVELS = tuple(PIPELINES)
+
+DEFAULT_OPT_LEVEL = 1
+
+
+# Expands `names` with the passes they require that don't run before them.
+def schedule_passes(names: tuple[str, ...], passes: dict[str, Pass]) -> list[str]:
+    scheduled = []
+
+    def schedule(name: str, requiring: tuple[str, ...]):
+        if name in requiring:
+            raise ValueError(f"pass `{name}` requires itself")
+        if name not in passes:
+            raise ValueError(f"unknown pass `{name}`")
+
+        for required in passes[name].requires:
+            if required not in scheduled:
+                schedule(required, (*requiring, name))
+
+        scheduled.append(name)
+
+    for name in names:
+        schedule(name, ())
+
+    return scheduled
+
+
+# Runs passes over a program, computing the analyses they use on demand and
+# caching them until a pass that doesn't preserve them changes the program.
+class AnalysisCache:
+    def __init__(self, analyses: dict[str, Callable[[Any], Any]]):
+        self.analyses = analyses
+        self.result_by_name = {}
+
+    def get(self, name: str, program) -> Any:
+        if name not in self.result_by_name:
+            self.result_by_name[name] = self.analyses[name](program)
+
+        return self.result_by_name[name]
+
+    def run_pass(self, pass_: Pass, program):
+        results = [self.get(name, program) for name in pass_.uses]
+        new_program = pass_.run(program, *results)
+
+        if new_program is not program:
+            self.result_by_name = {
+                name: result
+                for name, result in self.result_by_name.items()
+                if name in pass_.preserves
+            }
+
+        return new_program
+
+
+class PassManager:
+    def __init__(self, opt_level: int = DEFAULT_OPT_LEVEL):
+        if opt_level not in PIPELINES:
+            raise ValueError(f"unknown optimization level {opt_level}")
+
+        self.pipeline = PIPELINES[opt_level]
+        self.timings = []
+
+    # Generates IR for `code` without interning terms, which is left to the
+    # `cse` pass.
+    def gen_ir(self, code: str) -> Program:
+        start = time.perf_counter()
+        program_ast = Parser(Scanner(code)).parse_program()
+        ir_gen = IrGen(program_ast, intern_terms=False, **self.pipeline.irgen_options)
+        program = ir_gen.gen_program()
+        seconds = time.perf_counter() - start
+
+        self.timings.append(PassTiming("irgen", seconds, 0, len(program.instructions)))
+
+        return program
+
+    def run_ir_passes(self, program: Program) -> Program:
+        cache = AnalysisCache(IR_ANALYSES)
+
+        for name in schedule_passes(self.pipeline.ir_passes, IR_PASSES):
+            ir_pass = IR_PASSES[name]
+            program = self.timed(name, program, lambda p: cache.run_pass(ir_pass, p))
+
+        return program
+
+    # `avx2` only has an effect in pipelines that vectorize, and only on
+    # arithmetic that is left after the IR passes, which -O2 folds away.
+    def lower(
+        self,
+        program: Program,
+        buffer_output: bool = False,
+        freestanding: bool = False,
+        avx2: bool = False,
+    ) -> X86_64_Program:
+        code_gen = X86_64_CodeGen(
+            program,
+            buffer_output=buffer_output,
+            freestanding=freestanding,
+            avx2=avx2,
+            **self.pipeline.codegen_options,
+        )
+
+        return self.timed("x86-64-codegen", program, lambda _: code_gen.generate())
+
+    def run_machine_passes(self, program: X86_64_Program) -> X86_64_Program:
+        cache = AnalysisCache(MACHINE_ANALYSES)
+
+        for name in schedule_passes(self.pipeline.machine_passes, MACHINE_PASSES):
+            machine_pass = MACHINE_PASSES[name]
+            program = self.timed(
+                name, program, lambda p: cache.run_pass(machine_pass, p)
+            )
+
+        return program
+
+    def timed(self, name: str, program, run: Callable[[Any], Any]):
+        start = time.perf_counter()
+        new_program = run(program)
+        seconds = time.perf_counter() - start
+
+        self.timings.append(
+            PassTiming(
+                name, seconds, len(program.instructions), len(new_program.instructions)
+            )
+        )
+
+        return new_program
+
+
+def format_pass_timings(timings: list[PassTiming]) -> str:
+    lines = [f"{'time (ms)':>10}  {'instrs':>15}  {'delta':>7}  pass"]
+
+    for timing in timings:
+        instrs = f"{timing.instrs_before} -> {timing.instrs_after}"
+        delta = timing.instrs_after - timing.instrs_before
+        lines.append(
+            f"{timing.seconds * 1e3:10.3f}  {instrs:>15}  {delta:>+7}  {timing.name}"
+        )
+
+    total = sum(timing.seconds for timing in timings)
+    lines.append(f"{total * 1e3:10.3f}  {'':>15}  {'':>7}  total")
+
+    return "\n".join(lines)
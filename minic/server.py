@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+
+# A daemon that keeps the compiler imported and warm, and compiles sources it
+# receives over a Unix domain socket. See minic.client for the protocol and a
+# client.
+#
+# Usage: python -m minic.server socket_path [-j jobs] [--idle-timeout seconds]
+#                                            [--cache]
+
+import dataclasses
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+
+from minic.client import recv_message, send_message
+from minic.driver import (CompileOptions, available_cpus, compile_source,
+                          format_error)
+
+# Options that requests may set. Objects and IR aren't text, so they aren't
+# served.
+REQUEST_OPTIONS = ("opt_level", "buffer_output", "freestanding", "avx2")
+
+# The type each of those options must have. JSON booleans are ints in Python,
+# so values are checked against the exact type.
+OPTION_TYPES = {
+    field.name: field.type
+    for field in dataclasses.fields(CompileOptions)
+    if field.name in REQUEST_OPTIONS
+}
+
+CACHE_SIZE = 1024
+
+
+# Handles each connection in a thread, which waits for the pool of worker
+# processes to compile its requests, so that compiling doesn't hold the GIL
+# of the server.
+class CompileServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        socket_path: Path,
+        jobs: Optional[int] = None,
+        idle_timeout: Optional[float] = None,
+        cache: bool = False,
+    ):
+        self.socket_path = socket_path
+        self.idle_timeout = idle_timeout
+        # Results by source and options, in least recently used order. It's
+        # shared by all connections, and only used when enabled.
+        self.cache = OrderedDict() if cache else None
+        self.cache_hits = 0
+        self.lock = threading.Lock()
+        self.active_requests = 0
+        self.last_request_time = time.monotonic()
+
+        remove_stale_socket(socket_path)
+        super().__init__(str(socket_path), CompileRequestHandler)
+        self.executor = ProcessPoolExecutor(max_workers=jobs or available_cpus())
+
+    # Serves until `shutdown` is called, or the server is idle for longer
+    # than its timeout, then closes the socket and stops the workers.
+    def serve(self):
+        if self.idle_timeout is not None:
+            threading.Thread(target=self.shut_down_when_idle, daemon=True).start()
+
+        try:
+            self.serve_forever()
+        finally:
+            self.server_close()
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(cancel_futures=True)
+        self.socket_path.unlink(missing_ok=True)
+
+    def shut_down_when_idle(self):
+        while True:
+            with self.lock:
+                idle = self.active_requests == 0
+                deadline = self.last_request_time + self.idle_timeout
+            now = time.monotonic()
+
+            if idle and now >= deadline:
+                self.shutdown()
+                return
+
+            time.sleep(max(deadline - now, 0.05))
+
+    def handle_request_message(self, request: Any) -> dict[str, str]:
+        with self.lock:
+            self.active_requests += 1
+        try:
+            return self.compile(request)
+        finally:
+            with self.lock:
+                self.active_requests -= 1
+                self.last_request_time = time.monotonic()
+
+    def compile(self, request: Any) -> dict[str, str]:
+        try:
+            code, options = parse_request(request)
+        except ValueError as error:
+            return {"error": str(error)}
+
+        key = (code, options)
+        if self.cache is not None:
+            with self.lock:
+                response = self.cache.get(key)
+                if response is not None:
+                    self.cache.move_to_end(key)
+                    self.cache_hits += 1
+                    return response
+
+        response = self.executor.submit(compile_response, code, options).result()
+
+        if self.cache is not None:
+            with self.lock:
+                self.cache[key] = response
+                if len(self.cache) > CACHE_SIZE:
+                    self.cache.popitem(last=False)
+
+        return response
+
+
+class CompileRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while (message := recv_message(self.request)) is not None:
+            send_message(self.request, self.server.handle_request_message(message))
+
+
+def parse_request(request: Any) -> tuple[str, CompileOptions]:
+    if not isinstance(request, dict) or not isinstance(request.get("source"), str):
+        raise ValueError("request has no source")
+
+    options = request.get("options", {})
+    if not isinstance(options, dict):
+        raise ValueError("request options aren't an object")
+
+    unknown = set(options) - set(REQUEST_OPTIONS)
+    if unknown:
+        raise ValueError(f"unknown options: {', '.join(sorted(unknown))}")
+
+    for name, value in options.items():
+        option_type = OPTION_TYPES[name]
+        if type(value) is not option_type:
+            raise ValueError(
+                f"option {name} must be {option_type.__name__},"
+                f" not {type(value).__name__}"
+            )
+
+    return request["source"], dataclasses.replace(CompileOptions(), **options)
+
+
+# Runs in the worker processes.
+def compile_response(code: str, options: CompileOptions) -> dict[str, str]:
+    try:
+        return {"assembly": compile_source(code, options)}
+    except Exception as error:
+        return {"error": format_error(error)}
+
+
+# Removes the socket of a server that is no longer running, which happens
+# when it's killed, and fails if one is still listening on it.
+def remove_stale_socket(socket_path: Path):
+    if not socket_path.exists():
+        return
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(socket_path))
+        except ConnectionRefusedError:
+            socket_path.unlink()
+            return
+
+    raise OSError(f"a server is already listening on {socket_path}")
+
+
+def main():
+    import argparse
+
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("socket_path", type=Path)
+    arg_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="number of worker processes (default: CPUs)",
+    )
+    arg_parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        help="shut down after this many seconds without requests",
+    )
+    arg_parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="reuse the results of requests seen before",
+    )
+    args = arg_parser.parse_args()
+
+    server = CompileServer(
+        args.socket_path,
+        jobs=args.jobs,
+        idle_timeout=args.idle_timeout,
+        cache=args.cache,
+    )
+
+    # `shutdown` waits for the serving loop, which runs in this thread, so
+    # it's called from another one.
+    def shut_down(signum, frame):
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGTERM, shut_down)
+    signal.signal(signal.SIGINT, shut_down)
+
+    print(f"serving on {args.socket_path} (pid {os.getpid()})", flush=True)
+    server.serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+from typing import IO, Iterator
+
+from minic import ast
+from minic.ir import Program
+from minic.ir_gen import IrGen
+from minic.parser import Parser
+from minic.scanner import Scanner
+from minic.x86_64 import Imm, Mov, Push, R, Sub, X86_64_Instr, X86_64_Program
+from minic.x86_64_code_gen import X86_64_CodeGen
+from minic.x86_64_emit import AsmEmitter, write_lines
+
+READ_CHUNK_SIZE = 65536
+
+# The prologue is written before the size of the stack frame is known, so
+# its `sub` is padded to the width of the largest size, and patched in place.
+FRAME_SIZE_LINE_WIDTH = len(f"    {Sub(R.Rsp, Imm(2**31 - 1)).dump()}")
+
+
+# Lowers a program one statement at a time, with the local lowerings of -O1.
+# Passes over the whole program, and the coalescing and prerendering of
+# prints, need more than a statement at once, so they don't run.
+#
+# Once a statement is translated, only the registers that hold variables are
+# still live, and the slots of the others are reused by the next statements,
+# so the stack frame is as large as the variables plus the temporaries of the
+# largest statement, rather than growing with the program.
+class StreamingCodeGen(X86_64_CodeGen):
+    def __init__(self, buffer_output: bool = False, freestanding: bool = False):
+        super().__init__(
+            Program([]),
+            reduce_mul=True,
+            reduce_div=True,
+            buffer_output=buffer_output,
+            freestanding=freestanding,
+        )
+        self.ir_gen = IrGen(None, intern_terms=False, sethi_ullman=True)
+        self.free_mem_offsets = []
+
+    def translate_stmt(self, stmt: ast.Stmt) -> list[X86_64_Instr]:
+        instrs = []
+        for instr in self.ir_gen.gen_stmt(stmt):
+            translated = self.translate_instr(instr)
+            if isinstance(translated, list):
+                instrs.extend(translated)
+            else:
+                instrs.append(translated)
+
+        self.release_dead_regs()
+
+        return instrs
+
+    def release_dead_regs(self):
+        live_regs = set(self.ir_gen.reg_by_var.values())
+
+        for reg in [reg for reg in self.mem_offset_by_reg if reg not in live_regs]:
+            self.free_mem_offsets.append(self.mem_offset_by_reg.pop(reg))
+            self.literal_by_reg.pop(reg, None)
+
+    def create_mem_offset_for_reg(self, reg, size):
+        if not self.free_mem_offsets:
+            return super().create_mem_offset_for_reg(reg, size)
+
+        assert reg not in self.mem_offset_by_reg
+
+        mem_offset = self.free_mem_offsets.pop()
+        self.mem_offset_by_reg[reg] = mem_offset
+
+        return mem_offset
+
+    # Always reserves the stack frame, even while it's still empty.
+    def gen_prologue(self) -> list[X86_64_Instr]:
+        header = [
+            Push(R.Rbp),
+            Mov(R.Rbp, R.Rsp),
+            Sub(R.Rsp, Imm(self.allocated_size)),
+        ]
+
+        if self.buffer_output and not self.freestanding:
+            header += self.setup_stdout_buffer()
+
+        return header
+
+
+# Compiles the minic source read from `in_file` into assembly written to
+# `out_file`, as it's parsed, so that neither the source, its IR nor the
+# assembly are ever in memory whole. `out_file` is binary, and seekable so
+# that the size of the stack frame can be patched in at the end.
+def compile_streaming(
+    in_file: IO[str],
+    out_file: IO[bytes],
+    buffer_output: bool = False,
+    freestanding: bool = False,
+):
+    code_gen = StreamingCodeGen(buffer_output=buffer_output, freestanding=freestanding)
+    program = X86_64_Program(instructions=[], freestanding=freestanding)
+    emitter = AsmEmitter()
+
+    write_lines(out_file, program.dump_prelude())
+
+    frame_size_pos = None
+    for instr in code_gen.gen_prologue():
+        if isinstance(instr, Sub):
+            frame_size_pos = out_file.tell()
+            write_lines(out_file, [frame_size_line(instr)])
+        else:
+            emitter.write_instrs(out_file, [instr])
+
+    for stmt in Parser(Scanner(read_chars(in_file))).iter_stmts():
+        emitter.write_instrs(out_file, code_gen.translate_stmt(stmt))
+
+    emitter.write_instrs(out_file, code_gen.gen_epilogue())
+    write_lines(out_file, program.dump_postlude())
+
+    end_pos = out_file.tell()
+    out_file.seek(frame_size_pos)
+    write_lines(out_file, [frame_size_line(Sub(R.Rsp, Imm(code_gen.allocated_size)))])
+    out_file.seek(end_pos)
+
+
+def frame_size_line(instr: Sub) -> str:
+    return f"    {instr.dump()}".ljust(FRAME_SIZE_LINE_WIDTH)
+
+
+def read_chars(in_file: IO[str]) -> Iterator[str]:
+    while chunk := in_file.read(READ_CHUNK_SIZE):
+        yield from chunk
@@ -1,6 +1,8 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum, auto
-from typing import Union
+from typing import Optional, Union
+
+from minic.x86_64_runtime import RUNTIME_ASM
 
 
 class R(Enum):
@@ -8,11 +10,41 @@ class R(Enum):
     Edi = auto()
     Rax = auto()
     Rbp = auto()
+    Rcx = auto()
     Rdi = auto()
     Rdx = auto()
     Rip = auto()
     Rsi = auto()
     Rsp = auto()
+    R8 = auto()
+    R9 = auto()
+
+    # Members are singletons, so hashing their identity is enough, and much
+    # cheaper than Enum's hash of the member name.
+    __hash__ = object.__hash__
+
+    def dump(self) -> str:
+        return self.name.lower()
+
+
+# 128-bit SIMD registers, each the low half of the Ymm register with the same
+# number.
+class Xmm(Enum):
+    Xmm0 = auto()
+    Xmm1 = auto()
+
+    __hash__ = object.__hash__
+
+    def dump(self) -> str:
+        return self.name.lower()
+
+
+# 256-bit SIMD registers, only available with AVX.
+class Ymm(Enum):
+    Ymm0 = auto()
+    Ymm1 = auto()
+
+    __hash__ = object.__hash__
 
     def dump(self) -> str:
         return self.name.lower()
@@ -36,11 +68,17 @@ class Label:
 
 class Size(Enum):
     QWordPtr = auto()
+    XmmWordPtr = auto()
+    YmmWordPtr = auto()
 
     def dump(self) -> str:
         match self:
-            case QWordPtr:
+            case Size.QWordPtr:
                 return "QWORD PTR"
+            case Size.XmmWordPtr:
+                return "XMMWORD PTR"
+            case Size.YmmWordPtr:
+                return "YMMWORD PTR"
 
 
 @dataclass
@@ -52,6 +90,8 @@ class MemOffset:
     def dump(self) -> str:
         if isinstance(self.displacement, Label):
             disp = f" + {self.displacement.dump()}"
+        elif self.displacement == 0:
+            disp = ""
         else:
             disp = (
                 f"+{self.displacement}"
@@ -62,6 +102,16 @@ class MemOffset:
         return f"{self.size.dump()} [{self.base.dump()}{disp}]"
 
 
+@dataclass(frozen=True)
+class ScaledIndex:
+    base: R
+    index: R
+    scale: int
+
+    def dump(self) -> str:
+        return f"[{self.base.dump()}+{self.index.dump()}*{self.scale}]"
+
+
 class X86_64_Instr:
     def dump(self) -> str:
         raise NotImplementedError()
@@ -95,7 +145,7 @@ class Mov(X86_64_Instr):
 @dataclass(frozen=True)
 class Lea(X86_64_Instr):
     dst: Union[R, MemOffset]
-    src: Union[R, Imm, MemOffset, Label]
+    src: Union[R, Imm, MemOffset, ScaledIndex, Label]
 
     def dump(self) -> str:
         return f"lea {self.dst.dump()}, {self.src.dump()}"
@@ -119,12 +169,51 @@ class Sub(X86_64_Instr):
         return f"sub {self.dst.dump()}, {self.src.dump()}"
 
 
+@dataclass(frozen=True)
+class Shl(X86_64_Instr):
+    dst: Union[R, MemOffset]
+    src: Imm
+
+    def dump(self) -> str:
+        return f"shl {self.dst.dump()}, {self.src.dump()}"
+
+
+@dataclass(frozen=True)
+class Sar(X86_64_Instr):
+    dst: Union[R, MemOffset]
+    src: Imm
+
+    def dump(self) -> str:
+        return f"sar {self.dst.dump()}, {self.src.dump()}"
+
+
+@dataclass(frozen=True)
+class Shr(X86_64_Instr):
+    dst: Union[R, MemOffset]
+    src: Imm
+
+    def dump(self) -> str:
+        return f"shr {self.dst.dump()}, {self.src.dump()}"
+
+
+@dataclass(frozen=True)
+class Neg(X86_64_Instr):
+    dst: Union[R, MemOffset]
+
+    def dump(self) -> str:
+        return f"neg {self.dst.dump()}"
+
+
 @dataclass(frozen=True)
 class Imul(X86_64_Instr):
     dst: Union[R, MemOffset]
-    src: Union[R, Imm, MemOffset]
+    # The one-operand form multiplies `rax` by `dst` into `rdx:rax`.
+    src: Optional[Union[R, Imm, MemOffset]] = None
 
     def dump(self) -> str:
+        if self.src is None:
+            return f"imul {self.dst.dump()}"
+
         return f"imul {self.dst.dump()}, {self.src.dump()}"
 
 
@@ -156,25 +245,186 @@ class Call(X86_64_Instr):
         return f"call {self.target.dump()}"
 
 
+# Packed 64-bit integer instructions. The SSE2 forms overwrite their first
+# operand, and need 16-byte alignment for memory operands other than in
+# moves, so operands are always loaded with `movdqu` first.
+
+
+@dataclass(frozen=True)
+class Movdqu(X86_64_Instr):
+    dst: Union[Xmm, MemOffset]
+    src: Union[Xmm, MemOffset]
+
+    def dump(self) -> str:
+        return f"movdqu {self.dst.dump()}, {self.src.dump()}"
+
+
+# Loads the low lane and clears the high one.
+@dataclass(frozen=True)
+class Movq(X86_64_Instr):
+    dst: Xmm
+    src: MemOffset
+
+    def dump(self) -> str:
+        return f"movq {self.dst.dump()}, {self.src.dump()}"
+
+
+# Loads the high lane and keeps the low one.
+@dataclass(frozen=True)
+class Movhps(X86_64_Instr):
+    dst: Xmm
+    src: MemOffset
+
+    def dump(self) -> str:
+        return f"movhps {self.dst.dump()}, {self.src.dump()}"
+
+
+@dataclass(frozen=True)
+class Paddq(X86_64_Instr):
+    dst: Xmm
+    src: Xmm
+
+    def dump(self) -> str:
+        return f"paddq {self.dst.dump()}, {self.src.dump()}"
+
+
+@dataclass(frozen=True)
+class Psubq(X86_64_Instr):
+    dst: Xmm
+    src: Xmm
+
+    def dump(self) -> str:
+        return f"psubq {self.dst.dump()}, {self.src.dump()}"
+
+
+# The VEX-encoded forms take a separate destination, and leave the upper half
+# of the Ymm register zeroed when writing an Xmm one. Mixing them with the
+# SSE2 forms while the upper halves are dirty is slow, so code that uses them
+# uses no SSE2 forms, and clears the upper halves before calling out.
+
+
+@dataclass(frozen=True)
+class Vmovdqu(X86_64_Instr):
+    dst: Union[Xmm, Ymm, MemOffset]
+    src: Union[Xmm, Ymm, MemOffset]
+
+    def dump(self) -> str:
+        return f"vmovdqu {self.dst.dump()}, {self.src.dump()}"
+
+
+@dataclass(frozen=True)
+class Vmovq(X86_64_Instr):
+    dst: Xmm
+    src: MemOffset
+
+    def dump(self) -> str:
+        return f"vmovq {self.dst.dump()}, {self.src.dump()}"
+
+
+# Takes the low lane from `low` and loads the high lane from `src`.
+@dataclass(frozen=True)
+class Vmovhps(X86_64_Instr):
+    dst: Xmm
+    low: Xmm
+    src: MemOffset
+
+    def dump(self) -> str:
+        return f"vmovhps {self.dst.dump()}, {self.low.dump()}, {self.src.dump()}"
+
+
+# Loads a 64-bit value into every lane.
+@dataclass(frozen=True)
+class Vpbroadcastq(X86_64_Instr):
+    dst: Union[Xmm, Ymm]
+    src: MemOffset
+
+    def dump(self) -> str:
+        return f"vpbroadcastq {self.dst.dump()}, {self.src.dump()}"
+
+
+@dataclass(frozen=True)
+class Vpaddq(X86_64_Instr):
+    dst: Union[Xmm, Ymm]
+    left: Union[Xmm, Ymm]
+    right: Union[Xmm, Ymm]
+
+    def dump(self) -> str:
+        return f"vpaddq {self.dst.dump()}, {self.left.dump()}, {self.right.dump()}"
+
+
+@dataclass(frozen=True)
+class Vpsubq(X86_64_Instr):
+    dst: Union[Xmm, Ymm]
+    left: Union[Xmm, Ymm]
+    right: Union[Xmm, Ymm]
+
+    def dump(self) -> str:
+        return f"vpsubq {self.dst.dump()}, {self.left.dump()}, {self.right.dump()}"
+
+
+@dataclass(frozen=True)
+class Vzeroupper(X86_64_Instr):
+    def dump(self) -> str:
+        return "vzeroupper"
+
+
 @dataclass(frozen=True)
 class X86_64_Program:
     instructions: list[X86_64_Instr]
+    strings: dict[Label, str] = field(default_factory=dict)
+    rodata: dict[Label, str] = field(default_factory=dict)
+    freestanding: bool = False
 
     def dump(self) -> str:
+        output = self.dump_prelude()
+
+        for instr in self.instructions:
+            dumped = instr.dump()
+            output.append(f"    {dumped}")
+
+        output += self.dump_postlude()
+
+        return "\n".join(output) + "\n"
+
+    # The lines before the instructions of `main`.
+    def dump_prelude(self) -> list[str]:
         output = [
             ".intel_syntax noprefix",
             "",
             ".data",
             ".PRINTF_FMT_LLD:",
             '    .string "%lld\\n"',
+        ]
+
+        for label, string in self.strings.items():
+            output.append(f"{label.dump()}:")
+            output.append(f"    .string {quote_string(string)}")
+
+        if self.rodata:
+            output.append("")
+            output.append(".section .rodata")
+
+        for label, string in self.rodata.items():
+            output.append(f"{label.dump()}:")
+            output.append(f"    .ascii {quote_string(string)}")
+
+        output += [
             "",
             ".text",
             ".global main",
             "main:",
         ]
 
-        for instr in self.instructions:
-            dumped = instr.dump()
-            output.append(f"    {dumped}")
+        return output
 
-        return "\n".join(output) + "\n"
+    # The lines after the instructions of `main`.
+    def dump_postlude(self) -> list[str]:
+        if self.freestanding:
+            return ["", RUNTIME_ASM]
+
+        return []
+
+
+def quote_string(string: str) -> str:
+    escaped = string.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'"{escaped}"'
@@ -1,19 +1,73 @@
-from minic.ir import (BinOp, BinOpInstr, Instr, LoadLiteralInstr, LoadRegInstr,
-                      PrintInstr, Program, Reg)
+from typing import Optional
+
+from minic.ir import (INT64_MIN, BinOp, BinOpInstr, Instr, LoadLiteralInstr,
+                      LoadRegInstr, PrintInstr, Program, Reg, eval_bin_op,
+                      wrap_int64)
 from minic.x86_64 import (Add, Call, Cqo, Idiv, Imm, Imul, Label, Lea,
                           MemOffset, Mov, Pop, Push, R, Ret, Size, Sub,
-                          X86_64_Program)
+                          Vzeroupper, X86_64_Instr, X86_64_Program, Ymm)
+from minic.x86_64_encoder import fits_int32
+from minic.x86_64_slp import (AVX2_WIDTH, SSE2_WIDTH, Pack, pack_instructions,
+                              plan_slot_blocks, vectorize_pack)
+from minic.x86_64_strength_reduction import (div_by_const_instrs,
+                                             mul_by_const_instrs)
+
+PRINTF_ARG_REGS = [R.Rsi, R.Rdx, R.Rcx, R.R8, R.R9]
+
+# From stdio.h.
+IOFBF = 0
+
+STDOUT_BUFFER_SIZE = 65536
 
 
 class X86_64_CodeGen:
-    def __init__(self, program: Program):
+    def __init__(
+        self,
+        program: Program,
+        reduce_mul: bool = False,
+        reduce_div: bool = False,
+        coalesce_prints: bool = False,
+        buffer_output: bool = False,
+        freestanding: bool = False,
+        prerender_prints: bool = False,
+        vectorize: bool = False,
+        avx2: bool = False,
+    ):
         self.program = program
+        self.reduce_mul = reduce_mul
+        self.reduce_div = reduce_div
+        self.coalesce_prints = coalesce_prints
+        self.buffer_output = buffer_output
+        self.freestanding = freestanding
+        self.prerender_prints = prerender_prints
+        self.vectorize = vectorize
+        self.avx2 = avx2
         self.mem_offset_by_reg = {}
+        self.block_by_reg = {}
+        self.planned_mem_offset_by_reg = {}
+        self.literal_by_reg = {}
+        self.known_value_by_reg = {}
+        self.strings = {}
+        self.rodata = {}
         self.allocated_size = 0
 
     def generate(self):
         translated = self.translate_instructions()
 
+        instrs = [*self.gen_prologue(), *translated, *self.gen_epilogue()]
+        if self.avx2:
+            instrs = clear_upper_halves(instrs)
+
+        return X86_64_Program(
+            instructions=instrs,
+            strings=self.strings,
+            rodata=self.rodata,
+            freestanding=self.freestanding,
+        )
+
+    # Both depend on the size of the stack frame, so they're generated once
+    # every instruction has its slot.
+    def gen_prologue(self) -> list[X86_64_Instr]:
         header = [
             Push(R.Rbp),
             Mov(R.Rbp, R.Rsp),
@@ -22,6 +76,12 @@ class X86_64_CodeGen:
         if self.allocated_size:
             header.append(Sub(R.Rsp, Imm(self.allocated_size)))
 
+        if self.buffer_output and not self.freestanding:
+            header += self.setup_stdout_buffer()
+
+        return header
+
+    def gen_epilogue(self) -> list[X86_64_Instr]:
         footer = [
             Mov(R.Eax, Imm(0)),
             Pop(R.Rbp),
@@ -31,33 +91,208 @@ class X86_64_CodeGen:
         if self.allocated_size:
             footer.insert(1, Add(R.Rsp, Imm(self.allocated_size)))
 
-        return X86_64_Program(
-            instructions=[
-                *header,
-                *translated,
-                *footer,
-            ]
-        )
+        return footer
 
     def translate_instructions(self):
         instrs = []
+        print_arg_regs = []
+        prerendered = []
+
+        if self.vectorize:
+            width = AVX2_WIDTH if self.avx2 else SSE2_WIDTH
+            items = pack_instructions(self.program, width)
+            self.block_by_reg = plan_slot_blocks(items)
+        else:
+            items = self.program.instructions
+
+        for instr in items:
+            if isinstance(instr, Pack):
+                if self.prerender_prints:
+                    for member in instr.instrs:
+                        self.fold_known_value(member)
+
+                instrs.extend(self.translate_pack(instr.op, instr.instrs))
+                continue
+
+            if self.prerender_prints:
+                self.fold_known_value(instr)
+
+                if (
+                    isinstance(instr, PrintInstr)
+                    and instr.arg_reg in self.known_value_by_reg
+                ):
+                    if print_arg_regs:
+                        instrs.extend(self.translate_prints(print_arg_regs))
+                        print_arg_regs = []
+
+                    prerendered.append(f"{self.known_value_by_reg[instr.arg_reg]}\n")
+                    continue
+
+                if prerendered and (
+                    isinstance(instr, PrintInstr) or self.may_trap(instr)
+                ):
+                    instrs.extend(self.translate_prerendered("".join(prerendered)))
+                    prerendered = []
+
+            if (
+                self.coalesce_prints
+                and not self.freestanding
+                and isinstance(instr, PrintInstr)
+            ):
+                print_arg_regs.append(instr.arg_reg)
+                if len(print_arg_regs) == len(PRINTF_ARG_REGS):
+                    instrs.extend(self.translate_prints(print_arg_regs))
+                    print_arg_regs = []
+                continue
+
+            if print_arg_regs:
+                instrs.extend(self.translate_prints(print_arg_regs))
+                print_arg_regs = []
 
-        for instr in self.program.instructions:
             translated = self.translate_instr(instr)
             if isinstance(translated, list):
                 instrs.extend(translated)
             else:
                 instrs.append(translated)
 
+        if print_arg_regs:
+            instrs.extend(self.translate_prints(print_arg_regs))
+
+        if prerendered:
+            instrs.extend(self.translate_prerendered("".join(prerendered)))
+
         return instrs
 
+    # Computes the lanes of a pack with vector instructions, or the halves of
+    # the pack, or each lane on its own, whichever the cost model allows.
+    def translate_pack(self, op: BinOp, instrs: tuple[BinOpInstr, ...]):
+        out_slots = [self.get_planned_mem_offset(instr.out_reg) for instr in instrs]
+
+        if None not in out_slots:
+            vectorized = vectorize_pack(
+                op,
+                out_slots,
+                [self.get_mem_offset_for_reg(instr.left_reg) for instr in instrs],
+                [self.get_mem_offset_for_reg(instr.right_reg) for instr in instrs],
+                self.avx2,
+            )
+            if vectorized is not None:
+                for instr in instrs:
+                    self.create_mem_offset_for_reg(instr.out_reg, Size.QWordPtr)
+                return vectorized
+
+        if len(instrs) > SSE2_WIDTH:
+            half = len(instrs) // 2
+            return [
+                *self.translate_pack(op, instrs[:half]),
+                *self.translate_pack(op, instrs[half:]),
+            ]
+
+        translated = []
+        for instr in instrs:
+            translated.extend(self.translate_instr(instr))
+
+        return translated
+
+    def fold_known_value(self, instr: Instr):
+        match instr:
+            case LoadLiteralInstr(out_reg, value):
+                self.known_value_by_reg[out_reg] = wrap_int64(value)
+
+            case LoadRegInstr(out_reg, in_reg) if in_reg in self.known_value_by_reg:
+                self.known_value_by_reg[out_reg] = self.known_value_by_reg[in_reg]
+
+            case BinOpInstr(out_reg, op, left_reg, right_reg):
+                left = self.known_value_by_reg.get(left_reg)
+                right = self.known_value_by_reg.get(right_reg)
+                if left is None or right is None or self.may_trap(instr):
+                    return
+
+                self.known_value_by_reg[out_reg] = eval_bin_op(op, left, right)
+
+    # Whether `instr` may raise SIGFPE, in which case the output prerendered so
+    # far has to be written before it runs.
+    def may_trap(self, instr: Instr) -> bool:
+        match instr:
+            case BinOpInstr(_, BinOp.Div, left_reg, right_reg):
+                divisor = self.known_value_by_reg.get(right_reg, 0)
+                dividend = self.known_value_by_reg.get(left_reg, INT64_MIN)
+                return divisor == 0 or (divisor == -1 and dividend == INT64_MIN)
+
+        return False
+
+    # Writes the output of constant prints from a .rodata blob with one call.
+    def translate_prerendered(self, output: str):
+        blob_label = Label(f".PRINT_BLOB_{len(self.rodata)}")
+        self.rodata[blob_label] = output
+        blob_mem_offset = MemOffset(Size.QWordPtr, R.Rip, blob_label)
+
+        if self.freestanding:
+            return [
+                Lea(R.Rdi, blob_mem_offset),
+                Mov(R.Rsi, Imm(len(output))),
+                Call(Label("minic_write")),
+            ]
+
+        return [
+            Lea(R.Rdi, blob_mem_offset),
+            Mov(R.Rsi, Imm(1)),
+            Mov(R.Rdx, Imm(len(output))),
+            Mov(R.Rcx, MemOffset(Size.QWordPtr, R.Rip, Label("stdout@GOTPCREL"))),
+            Mov(R.Rcx, MemOffset(Size.QWordPtr, R.Rcx, 0)),
+            Call(Label("fwrite")),
+        ]
+
+    # Prints several values with a single printf call, passing them in the
+    # argument registers left after the format string.
+    def translate_prints(self, arg_regs: list[Reg]):
+        if len(arg_regs) == 1:
+            return self.translate_instr(PrintInstr(arg_regs[0]))
+
+        fmt_label = Label(f".PRINTF_FMT_LLD_{len(arg_regs)}")
+        self.strings[fmt_label] = "%lld\n" * len(arg_regs)
+
+        return [
+            *(
+                Mov(printf_arg_reg, self.get_mem_offset_for_reg(arg_reg))
+                for printf_arg_reg, arg_reg in zip(PRINTF_ARG_REGS, arg_regs)
+            ),
+            Lea(R.Rdi, MemOffset(Size.QWordPtr, R.Rip, fmt_label)),
+            Mov(R.Eax, Imm(0)),
+            Call(Label("printf")),
+        ]
+
+    # Makes stdout fully buffered, so that output is only written when the
+    # buffer fills up or when the program exits.
+    def setup_stdout_buffer(self):
+        return [
+            Mov(R.Rdi, MemOffset(Size.QWordPtr, R.Rip, Label("stdout@GOTPCREL"))),
+            Mov(R.Rdi, MemOffset(Size.QWordPtr, R.Rdi, 0)),
+            Mov(R.Rsi, Imm(0)),
+            Mov(R.Rdx, Imm(IOFBF)),
+            Mov(R.Rcx, Imm(STDOUT_BUFFER_SIZE)),
+            Call(Label("setvbuf")),
+        ]
+
     def translate_instr(self, instr: Instr):
         match instr:
             case LoadLiteralInstr(out_reg, value):
+                self.literal_by_reg[out_reg] = value
                 out_mem_offset = self.create_mem_offset_for_reg(out_reg, Size.QWordPtr)
+
+                # Stores to memory only take a sign-extended 32-bit immediate.
+                if not fits_int32(value):
+                    return [
+                        Mov(R.Rax, Imm(value)),
+                        Mov(out_mem_offset, R.Rax),
+                    ]
+
                 return Mov(out_mem_offset, Imm(value))
 
             case LoadRegInstr(out_reg, in_reg):
+                if in_reg in self.literal_by_reg:
+                    self.literal_by_reg[out_reg] = self.literal_by_reg[in_reg]
+
                 in_mem_offset = self.get_mem_offset_for_reg(in_reg)
                 out_mem_offset = self.create_mem_offset_for_reg(out_reg, Size.QWordPtr)
 
@@ -84,8 +319,8 @@ class X86_64_CodeGen:
                 right_mem_offset = self.get_mem_offset_for_reg(right_reg)
 
                 return [
-                    Mov(R.Rdx, left_mem_offset),
-                    Mov(R.Rax, right_mem_offset),
+                    Mov(R.Rax, left_mem_offset),
+                    Mov(R.Rdx, right_mem_offset),
                     Sub(R.Rax, R.Rdx),
                     Mov(out_mem_offset, R.Rax),
                 ]
@@ -95,6 +330,11 @@ class X86_64_CodeGen:
                 left_mem_offset = self.get_mem_offset_for_reg(left_reg)
                 right_mem_offset = self.get_mem_offset_for_reg(right_reg)
 
+                if self.reduce_mul:
+                    reduced = self.reduce_mul_by_const(left_reg, right_reg)
+                    if reduced is not None:
+                        return [*reduced, Mov(out_mem_offset, R.Rax)]
+
                 return [
                     Mov(R.Rdx, left_mem_offset),
                     Mov(R.Rax, right_mem_offset),
@@ -107,6 +347,15 @@ class X86_64_CodeGen:
                 left_mem_offset = self.get_mem_offset_for_reg(left_reg)
                 right_mem_offset = self.get_mem_offset_for_reg(right_reg)
 
+                if self.reduce_div and right_reg in self.literal_by_reg:
+                    div_instrs = div_by_const_instrs(self.literal_by_reg[right_reg])
+                    if div_instrs is not None:
+                        return [
+                            Mov(R.Rax, left_mem_offset),
+                            *div_instrs,
+                            Mov(out_mem_offset, R.Rax),
+                        ]
+
                 return [
                     Mov(R.Rax, left_mem_offset),
                     Cqo(),
@@ -114,6 +363,14 @@ class X86_64_CodeGen:
                     Mov(out_mem_offset, R.Rax),
                 ]
 
+            case PrintInstr(arg_reg) if self.freestanding:
+                arg_mem_offset = self.get_mem_offset_for_reg(arg_reg)
+
+                return [
+                    Mov(R.Rdi, arg_mem_offset),
+                    Call(Label("minic_print_lld")),
+                ]
+
             case PrintInstr(arg_reg):
                 arg_mem_offset = self.get_mem_offset_for_reg(arg_reg)
 
@@ -129,9 +386,26 @@ class X86_64_CodeGen:
 
         assert False
 
+    def reduce_mul_by_const(self, left_reg: Reg, right_reg: Reg):
+        for var_reg, const_reg in [(left_reg, right_reg), (right_reg, left_reg)]:
+            if const_reg not in self.literal_by_reg:
+                continue
+
+            mul_instrs = mul_by_const_instrs(self.literal_by_reg[const_reg])
+            if mul_instrs is not None:
+                return [Mov(R.Rax, self.get_mem_offset_for_reg(var_reg)), *mul_instrs]
+
+        return None
+
     def create_mem_offset_for_reg(self, reg: Reg, size: Size) -> MemOffset:
         assert reg not in self.mem_offset_by_reg
 
+        mem_offset = self.get_planned_mem_offset(reg)
+        if mem_offset is not None:
+            del self.planned_mem_offset_by_reg[reg]
+            self.mem_offset_by_reg[reg] = mem_offset
+            return mem_offset
+
         self.allocated_size += size_to_bytes(size)
         mem_offset = MemOffset(size, R.Rbp, -self.allocated_size)
         self.mem_offset_by_reg[reg] = mem_offset
@@ -143,6 +417,40 @@ class X86_64_CodeGen:
 
         return self.mem_offset_by_reg[reg]
 
+    # Returns the slot that `reg` will get, if it's part of a block of slots
+    # laid out for vector moves. The whole block is allocated when the first
+    # of its registers asks, with the first lane at the lowest address.
+    def get_planned_mem_offset(self, reg: Reg) -> Optional[MemOffset]:
+        if reg not in self.planned_mem_offset_by_reg and reg in self.block_by_reg:
+            block = self.block_by_reg[reg]
+            self.allocated_size += 8 * len(block)
+            for lane, lane_reg in enumerate(block):
+                self.planned_mem_offset_by_reg[lane_reg] = MemOffset(
+                    Size.QWordPtr, R.Rbp, -self.allocated_size + 8 * lane
+                )
+
+        return self.planned_mem_offset_by_reg.get(reg)
+
+
+# Clears the upper halves of the Ymm registers before calls and returns, after
+# they are written, so that SSE code in the callee or caller doesn't pay for
+# the transition.
+def clear_upper_halves(instrs: list[X86_64_Instr]) -> list[X86_64_Instr]:
+    cleared = []
+    dirty = False
+
+    for instr in instrs:
+        if isinstance(instr, (Call, Ret)) and dirty:
+            cleared.append(Vzeroupper())
+            dirty = False
+
+        cleared.append(instr)
+        dirty = dirty or any(
+            isinstance(getattr(instr, name), Ymm) for name in instr.__dataclass_fields__
+        )
+
+    return cleared
+
 
 def size_to_bytes(size: Size):
     match size:
@@ -0,0 +1,202 @@
+from dataclasses import fields
+from itertools import islice
+from operator import attrgetter
+from typing import IO, Callable, Iterable
+
+from minic.x86_64 import (Add, Call, Cqo, Idiv, Imm, Imul, Lea, MemOffset, Mov,
+                          Movdqu, Movhps, Movq, Neg, Paddq, Pop, Psubq, Push,
+                          R, Ret, Sar, Shl, Shr, Size, Sub, Vmovdqu, Vmovhps,
+                          Vmovq, Vpaddq, Vpbroadcastq, Vpsubq, Vzeroupper,
+                          X86_64_Instr, X86_64_Program, Xmm, Ymm)
+
+# Lines are rendered, encoded and written this many at a time, so that
+# neither the output nor a list of all its lines is built in memory.
+BATCH_SIZE = 4096
+
+REG_TYPES = (R, Xmm, Ymm)
+REG_NAMES = {reg: reg.dump() for regs in REG_TYPES for reg in regs}
+
+# Looking up enum members, and hashing sizes, is slow.
+QWORD_PTR = Size.QWordPtr
+QWORD_PTR_NAME = QWORD_PTR.dump()
+
+# Instructions whose `dump` is their class name in lowercase, followed by
+# their fields in order, which is how renderers lay out lines. Others are
+# rendered with their `dump`.
+FIELD_LAYOUT_INSTRS = frozenset(
+    {
+        Push,
+        Pop,
+        Mov,
+        Lea,
+        Add,
+        Sub,
+        Shl,
+        Sar,
+        Shr,
+        Neg,
+        # Without `src`, it's the one-operand form.
+        Imul,
+        Idiv,
+        Cqo,
+        Ret,
+        Call,
+        Movdqu,
+        Movq,
+        Movhps,
+        Paddq,
+        Psubq,
+        Vmovdqu,
+        Vmovq,
+        Vmovhps,
+        Vpbroadcastq,
+        Vpaddq,
+        Vpsubq,
+        Vzeroupper,
+    }
+)
+
+Renderer = Callable[[X86_64_Instr], str]
+
+
+# Writes the same text as X86_64_Program.dump, faster.
+#
+# Each instruction class in FIELD_LAYOUT_INSTRS gets a renderer, made on first
+# use, that builds its line with a single f-string. Registers, and stack slots after their first
+# use, are looked up by identity rather than rendered, since the code
+# generator hands out the same object for every use of a stack slot. Memory
+# operands are mutable, so they aren't hashable, and the emitter keeps the
+# slots it memoizes alive, so that their identities can't be reused by other
+# objects. A streaming code generator reuses its slots, so that stays
+# bounded.
+class AsmEmitter:
+    def __init__(self):
+        self.renderer_by_type = RendererTable(self.make_renderer)
+        self.rendered_by_id = {id(reg): name for reg, name in REG_NAMES.items()}
+        self.rendered_by_operand = {}
+        self.mem_offsets = []
+
+    def write_program(self, program: X86_64_Program, out_file: IO[bytes]):
+        write_lines(out_file, program.dump_prelude())
+        self.write_instrs(out_file, program.instructions)
+        write_lines(out_file, program.dump_postlude())
+
+    def write_instrs(self, out_file: IO[bytes], instrs: Iterable[X86_64_Instr]):
+        renderer_by_type = self.renderer_by_type
+        instrs = iter(instrs)
+
+        while batch := [
+            renderer_by_type[type(instr)](instr) for instr in islice(instrs, BATCH_SIZE)
+        ]:
+            write_lines(out_file, batch)
+
+    def make_renderer(self, instr_type: type) -> Renderer:
+        if instr_type not in FIELD_LAYOUT_INSTRS:
+            return lambda instr: f"    {instr.dump()}"
+
+        prefix = f"    {instr_type.__name__.lower()}"
+        names = [field.name for field in fields(instr_type)]
+        get_rendered = self.rendered_by_id.get
+        render_operand = self.render_operand
+
+        if not names:
+            return lambda instr: prefix
+
+        if names == ["dst", "src"]:
+
+            def render_binary(instr: X86_64_Instr) -> str:
+                dst = instr.dst
+                rendered_dst = get_rendered(id(dst)) or render_operand(dst)
+
+                # Like the `src` of `imul`, which is optional.
+                src = instr.src
+                if src is None:
+                    return f"{prefix} {rendered_dst}"
+
+                rendered_src = get_rendered(id(src)) or render_operand(src)
+                return f"{prefix} {rendered_dst}, {rendered_src}"
+
+            return render_binary
+
+        if len(names) == 1:
+            get_operand = attrgetter(names[0])
+
+            def render_unary(instr: X86_64_Instr) -> str:
+                operand = get_operand(instr)
+                rendered = get_rendered(id(operand)) or render_operand(operand)
+                return f"{prefix} {rendered}"
+
+            return render_unary
+
+        getters = [attrgetter(name) for name in names]
+
+        def render(instr: X86_64_Instr) -> str:
+            operands = ", ".join(render_operand(get(instr)) for get in getters)
+            return f"{prefix} {operands}"
+
+        return render
+
+    def render_operand(self, operand) -> str:
+        operand_type = type(operand)
+
+        if operand_type is Imm:
+            return str(operand.value)
+
+        if operand_type is MemOffset:
+            # Labels in memory operands are made for each use.
+            if type(operand.displacement) is not int:
+                return operand.dump()
+
+            rendered = self.rendered_by_id.get(id(operand))
+            if rendered is None:
+                rendered = render_mem_offset(operand)
+                self.rendered_by_id[id(operand)] = rendered
+                self.mem_offsets.append(operand)
+            return rendered
+
+        if operand_type in REG_TYPES:
+            return REG_NAMES[operand]
+
+        # Labels and scaled indices are made for each use, but they're
+        # hashable.
+        rendered = self.rendered_by_operand.get(operand)
+        if rendered is None:
+            rendered = self.rendered_by_operand[operand] = operand.dump()
+        return rendered
+
+
+# Renders qword memory operands without MemOffset.dump, whose lookups of enum
+# members and sign formatting cost more than the rest of an instruction.
+def render_mem_offset(mem_offset: MemOffset) -> str:
+    displacement = mem_offset.displacement
+    if mem_offset.size is not QWORD_PTR:
+        return mem_offset.dump()
+
+    base = REG_NAMES[mem_offset.base]
+    if displacement < 0:
+        return f"{QWORD_PTR_NAME} [{base}{displacement}]"
+    if displacement > 0:
+        return f"{QWORD_PTR_NAME} [{base}+{displacement}]"
+
+    return f"{QWORD_PTR_NAME} [{base}]"
+
+
+# Makes the renderer of each instruction class the first time it's needed.
+class RendererTable(dict):
+    def __init__(self, make_renderer: Callable[[type], Renderer]):
+        super().__init__()
+        self.make_renderer = make_renderer
+
+    def __missing__(self, instr_type: type) -> Renderer:
+        renderer = self[instr_type] = self.make_renderer(instr_type)
+        return renderer
+
+
+def write_lines(out_file: IO[bytes], lines: list[str]):
+    if lines:
+        out_file.write(("\n".join(lines) + "\n").encode())
+
+
+# Writes `program` as assembly, byte for byte like its `dump`.
+def write_program(program: X86_64_Program, out_file: IO[bytes]):
+    AsmEmitter().write_program(program, out_file)
@@ -0,0 +1,328 @@
+import struct
+from dataclasses import dataclass
+from enum import Enum, auto
+from typing import Optional, Union
+
+from minic.x86_64 import (Add, Call, Cqo, Idiv, Imm, Imul, Label, Lea,
+                          MemOffset, Mov, Movdqu, Movhps, Movq, Neg, Paddq,
+                          Pop, Psubq, Push, R, Ret, Sar, ScaledIndex, Shl, Shr,
+                          Sub, Vmovdqu, Vmovhps, Vmovq, Vpaddq, Vpbroadcastq,
+                          Vpsubq, Vzeroupper, X86_64_Instr, Xmm, Ymm)
+
+REG_NUMBERS = {
+    R.Rax: 0,
+    R.Eax: 0,
+    R.Rcx: 1,
+    R.Rdx: 2,
+    R.Rsp: 4,
+    R.Rbp: 5,
+    R.Rsi: 6,
+    R.Rdi: 7,
+    R.Edi: 7,
+    R.R8: 8,
+    R.R9: 9,
+    Xmm.Xmm0: 0,
+    Xmm.Xmm1: 1,
+    Ymm.Ymm0: 0,
+    Ymm.Ymm1: 1,
+}
+
+REGS_32 = {R.Eax, R.Edi}
+
+SCALE_BITS = {1: 0, 2: 1, 4: 2, 8: 3}
+
+# The `pp` field of VEX prefixes, which stands for a legacy prefix.
+VEX_NO_PREFIX = 0b00
+VEX_66 = 0b01
+VEX_F3 = 0b10
+
+# The `mmmmm` field of VEX prefixes, which selects the opcode map.
+VEX_MAP_0F = 0b00001
+VEX_MAP_0F38 = 0b00010
+
+GOTPCREL_SUFFIX = "@GOTPCREL"
+
+
+class RelocKind(Enum):
+    Pc32 = auto()
+    Plt32 = auto()
+    GotPcRel = auto()
+
+
+@dataclass(frozen=True)
+class Relocation:
+    offset: int
+    symbol: str
+    kind: RelocKind
+    addend: int
+
+
+# Encodes instructions into machine code. References to labels are left as
+# zeroes and recorded as relocations, to be resolved by a linker or loader.
+class X86_64_Encoder:
+    def __init__(self):
+        self.code = bytearray()
+        self.relocations = []
+
+    def encode(self, instrs: list[X86_64_Instr]):
+        for instr in instrs:
+            self.encode_instr(instr)
+
+        return self
+
+    def encode_instr(self, instr: X86_64_Instr):
+        match instr:
+            case Push(R() as src):
+                self.emit_opcode_plus_reg(0x50, src)
+            case Pop(R() as dst):
+                self.emit_opcode_plus_reg(0x58, dst)
+            case Mov(R() as dst, R() as src):
+                self.emit_rm(b"\x89", src, dst, wide=dst not in REGS_32)
+            case Mov(R() as dst, Imm(value)) if dst in REGS_32:
+                self.emit_opcode_plus_reg(0xB8, dst, wide=False)
+                self.code += pack_imm32(value & 0xFFFFFFFF, signed=False)
+            case Mov(R() as dst, Imm(value)) if fits_int32(value):
+                self.emit_rm(b"\xC7", 0, dst, imm=pack_imm32(value))
+            case Mov(R() as dst, Imm(value)):
+                self.emit_opcode_plus_reg(0xB8, dst, wide=True)
+                self.code += struct.pack("<Q", value & 0xFFFFFFFFFFFFFFFF)
+            case Mov(R() as dst, MemOffset() as src):
+                self.emit_rm(b"\x8B", dst, src)
+            case Mov(MemOffset() as dst, R() as src):
+                self.emit_rm(b"\x89", src, dst)
+            case Mov(MemOffset() as dst, Imm(value)) if fits_int32(value):
+                self.emit_rm(b"\xC7", 0, dst, imm=pack_imm32(value))
+            case Lea(R() as dst, MemOffset() | ScaledIndex() as src):
+                self.emit_rm(b"\x8D", dst, src)
+            case Add(dst, src):
+                self.emit_alu(0x01, 0x03, 0, dst, src)
+            case Sub(dst, src):
+                self.emit_alu(0x29, 0x2B, 5, dst, src)
+            case Imul(dst, None):
+                self.emit_rm(b"\xF7", 5, dst)
+            case Imul(R() as dst, R() | MemOffset() as src):
+                self.emit_rm(b"\x0F\xAF", dst, src)
+            case Idiv(src):
+                self.emit_rm(b"\xF7", 7, src)
+            case Neg(dst):
+                self.emit_rm(b"\xF7", 3, dst)
+            case Shl(dst, Imm(count)):
+                self.emit_shift(4, dst, count)
+            case Shr(dst, Imm(count)):
+                self.emit_shift(5, dst, count)
+            case Sar(dst, Imm(count)):
+                self.emit_shift(7, dst, count)
+            case Cqo():
+                self.code += b"\x48\x99"
+            case Ret():
+                self.code += b"\xC3"
+            case Call(Label(symbol)):
+                self.code += b"\xE8"
+                self.add_relocation(symbol, RelocKind.Plt32, -4)
+                self.code += bytes(4)
+            case Movdqu(Xmm() as dst, MemOffset() as src):
+                self.emit_rm(b"\x0F\x6F", dst, src, wide=False, prefix=b"\xF3")
+            case Movdqu(MemOffset() as dst, Xmm() as src):
+                self.emit_rm(b"\x0F\x7F", src, dst, wide=False, prefix=b"\xF3")
+            case Movq(dst, src):
+                self.emit_rm(b"\x0F\x7E", dst, src, wide=False, prefix=b"\xF3")
+            case Movhps(dst, src):
+                self.emit_rm(b"\x0F\x16", dst, src, wide=False)
+            case Paddq(dst, src):
+                self.emit_rm(b"\x0F\xD4", dst, src, wide=False, prefix=b"\x66")
+            case Psubq(dst, src):
+                self.emit_rm(b"\x0F\xFB", dst, src, wide=False, prefix=b"\x66")
+            case Vmovdqu(Xmm() | Ymm() as dst, MemOffset() as src):
+                self.emit_vex(0x6F, dst, src, pp=VEX_F3, wide=isinstance(dst, Ymm))
+            case Vmovdqu(MemOffset() as dst, Xmm() | Ymm() as src):
+                self.emit_vex(0x7F, src, dst, pp=VEX_F3, wide=isinstance(src, Ymm))
+            case Vmovq(dst, src):
+                self.emit_vex(0x7E, dst, src, pp=VEX_F3)
+            case Vmovhps(dst, low, src):
+                self.emit_vex(0x16, dst, src, extra=low)
+            case Vpbroadcastq(dst, src):
+                self.emit_vex(
+                    0x59,
+                    dst,
+                    src,
+                    pp=VEX_66,
+                    vex_map=VEX_MAP_0F38,
+                    wide=isinstance(dst, Ymm),
+                )
+            case Vpaddq(dst, left, right):
+                self.emit_vex(
+                    0xD4, dst, right, extra=left, pp=VEX_66, wide=isinstance(dst, Ymm)
+                )
+            case Vpsubq(dst, left, right):
+                self.emit_vex(
+                    0xFB, dst, right, extra=left, pp=VEX_66, wide=isinstance(dst, Ymm)
+                )
+            case Vzeroupper():
+                self.code += b"\xC5\xF8\x77"
+            case _:
+                raise NotImplementedError(f"cannot encode `{instr.dump()}`")
+
+    def emit_alu(self, rm_reg_op, reg_rm_op, imm_ext, dst, src):
+        match dst, src:
+            case R() | MemOffset(), R():
+                self.emit_rm(bytes([rm_reg_op]), src, dst)
+            case R(), MemOffset():
+                self.emit_rm(bytes([reg_rm_op]), dst, src)
+            case R() | MemOffset(), Imm(value) if fits_int8(value):
+                self.emit_rm(b"\x83", imm_ext, dst, imm=struct.pack("<b", value))
+            case R() | MemOffset(), Imm(value) if fits_int32(value):
+                self.emit_rm(b"\x81", imm_ext, dst, imm=pack_imm32(value))
+            case _:
+                raise NotImplementedError(f"cannot encode operands {dst}, {src}")
+
+    def emit_shift(self, ext: int, dst, count: int):
+        if count == 1:
+            self.emit_rm(b"\xD1", ext, dst)
+        else:
+            self.emit_rm(b"\xC1", ext, dst, imm=bytes([count & 63]))
+
+    def emit_opcode_plus_reg(self, opcode: int, reg: R, wide: bool = False):
+        num = REG_NUMBERS[reg]
+        rex = (0x08 if wide else 0) | (num >> 3)
+        if rex:
+            self.code.append(0x40 | rex)
+        self.code.append(opcode + (num & 7))
+
+    # Emits `opcode` with a ModRM byte whose reg field is `reg` (a register or
+    # an opcode extension) and whose r/m field addresses `rm`. A mandatory
+    # `prefix` goes before the REX prefix.
+    def emit_rm(
+        self,
+        opcode: bytes,
+        reg: Union[R, Xmm, int],
+        rm: Union[R, Xmm, MemOffset, ScaledIndex],
+        wide: bool = True,
+        imm: bytes = b"",
+        prefix: bytes = b"",
+    ):
+        reg_num = REG_NUMBERS[reg] if not isinstance(reg, int) else reg
+        rm_rex, tail, reloc = encode_rm(reg_num, rm)
+        rex = (0x08 if wide else 0) | ((reg_num >> 3) << 2) | rm_rex
+
+        self.code += prefix
+        if rex:
+            self.code.append(0x40 | rex)
+        self.code += opcode
+        self.emit_tail(tail, imm, reloc)
+
+    # Emits a VEX-encoded instruction, with the ModRM byte built like in
+    # `emit_rm`. `extra` is the additional source register, and `wide`
+    # selects 256-bit operands.
+    def emit_vex(
+        self,
+        opcode: int,
+        reg: Union[Xmm, Ymm],
+        rm: Union[Xmm, Ymm, MemOffset],
+        extra: Union[Xmm, Ymm, None] = None,
+        pp: int = VEX_NO_PREFIX,
+        vex_map: int = VEX_MAP_0F,
+        wide: bool = False,
+    ):
+        reg_num = REG_NUMBERS[reg]
+        rm_rex, tail, reloc = encode_rm(reg_num, rm)
+        # The register extension bits and `vvvv` are stored inverted.
+        not_r = (~reg_num >> 3) & 1
+        not_x = (~rm_rex >> 1) & 1
+        not_b = ~rm_rex & 1
+        not_vvvv = ~(0 if extra is None else REG_NUMBERS[extra]) & 0xF
+        vvvv_l_pp = (not_vvvv << 3) | (int(wide) << 2) | pp
+
+        if vex_map == VEX_MAP_0F and not_x and not_b:
+            self.code += bytes([0xC5, (not_r << 7) | vvvv_l_pp])
+        else:
+            self.code += bytes(
+                [0xC4, (not_r << 7) | (not_x << 6) | (not_b << 5) | vex_map, vvvv_l_pp]
+            )
+        self.code.append(opcode)
+        self.emit_tail(tail, b"", reloc)
+
+    def emit_tail(self, tail: bytes, imm: bytes, reloc):
+        instr_tail_start = len(self.code)
+        self.code += tail
+        self.code += imm
+
+        if reloc is not None:
+            offset, symbol = reloc
+            reloc_offset = instr_tail_start + offset
+            # RIP points to the end of the instruction, past any immediate.
+            addend = reloc_offset - len(self.code)
+            if symbol.endswith(GOTPCREL_SUFFIX):
+                symbol = symbol.removesuffix(GOTPCREL_SUFFIX)
+                kind = RelocKind.GotPcRel
+            else:
+                kind = RelocKind.Pc32
+            self.relocations.append(Relocation(reloc_offset, symbol, kind, addend))
+
+    def add_relocation(self, symbol: str, kind: RelocKind, addend: int):
+        self.relocations.append(Relocation(len(self.code), symbol, kind, addend))
+
+
+# Returns the REX bits, the bytes from the ModRM byte on, and the position and
+# symbol of a RIP-relative displacement, for an instruction whose r/m operand
+# is `rm`.
+def encode_rm(reg_num: int, rm) -> tuple[int, bytes, Optional[tuple[int, str]]]:
+    rex = 0
+    modrm_reg = (reg_num & 7) << 3
+    tail = bytearray()
+    reloc = None
+
+    match rm:
+        case R() | Xmm() | Ymm():
+            num = REG_NUMBERS[rm]
+            rex |= num >> 3
+            tail.append(0xC0 | modrm_reg | (num & 7))
+
+        case MemOffset(_, R.Rip, Label(symbol)):
+            tail.append(modrm_reg | 0b101)
+            reloc = (len(tail), symbol)
+            tail += bytes(4)
+
+        case MemOffset(_, base, int(disp)):
+            num = REG_NUMBERS[base]
+            rex |= num >> 3
+            if disp == 0 and num & 7 != 5:
+                mod, disp_bytes = 0b00, b""
+            elif fits_int8(disp):
+                mod, disp_bytes = 0b01, struct.pack("<b", disp)
+            else:
+                mod, disp_bytes = 0b10, pack_imm32(disp)
+
+            tail.append((mod << 6) | modrm_reg | (num & 7))
+            if num & 7 == 4:
+                tail.append(0x24)
+            tail += disp_bytes
+
+        case ScaledIndex(base, index, scale):
+            base_num = REG_NUMBERS[base]
+            index_num = REG_NUMBERS[index]
+            rex |= (index_num >> 3) << 1 | base_num >> 3
+            mod = 0b01 if base_num & 7 == 5 else 0b00
+
+            tail.append((mod << 6) | modrm_reg | 0b100)
+            tail.append(
+                (SCALE_BITS[scale] << 6) | ((index_num & 7) << 3) | (base_num & 7)
+            )
+            if mod == 0b01:
+                tail.append(0)
+
+        case _:
+            raise NotImplementedError(f"cannot encode operand {rm}")
+
+    return rex, bytes(tail), reloc
+
+
+def fits_int8(value: int) -> bool:
+    return -(2**7) <= value < 2**7
+
+
+def fits_int32(value: int) -> bool:
+    return -(2**31) <= value < 2**31
+
+
+def pack_imm32(value: int, signed: bool = True) -> bytes:
+    return struct.pack("<i" if signed else "<I", value)
@@ -0,0 +1,64 @@
+from typing import Optional
+
+from minic.ir import wrap_int64
+from minic.x86_64 import (Add, Imm, Imul, Lea, Mov, Neg, R, Sar, ScaledIndex,
+                          Shl, Shr, Sub, X86_64_Instr)
+
+MASK64 = 2**64 - 1
+
+
+# Interprets straight-line sequences of register-only instructions. Register
+# values are kept as unsigned 64-bit integers.
+class X86_64_Interp:
+    def __init__(self, regs: Optional[dict[R, int]] = None):
+        self.regs = {reg: value & MASK64 for reg, value in (regs or {}).items()}
+
+    def run(self, instrs: list[X86_64_Instr]):
+        for instr in instrs:
+            self.execute(instr)
+
+        return self
+
+    def get(self, reg: R) -> int:
+        return wrap_int64(self.regs.get(reg, 0))
+
+    def execute(self, instr: X86_64_Instr):
+        match instr:
+            case Mov(dst, src):
+                self.write(dst, self.read(src))
+            case Lea(dst, ScaledIndex(base, index, scale)):
+                self.write(dst, self.read(base) + self.read(index) * scale)
+            case Add(dst, src):
+                self.write(dst, self.read(dst) + self.read(src))
+            case Sub(dst, src):
+                self.write(dst, self.read(dst) - self.read(src))
+            case Imul(src, None):
+                product = wrap_int64(self.read(R.Rax)) * wrap_int64(self.read(src))
+                self.write(R.Rax, product)
+                self.write(R.Rdx, product >> 64)
+            case Imul(dst, src):
+                self.write(dst, self.read(dst) * self.read(src))
+            case Shl(dst, Imm(count)):
+                self.write(dst, self.read(dst) << (count & 63))
+            case Sar(dst, Imm(count)):
+                self.write(dst, wrap_int64(self.read(dst)) >> (count & 63))
+            case Shr(dst, Imm(count)):
+                self.write(dst, self.read(dst) >> (count & 63))
+            case Neg(dst):
+                self.write(dst, -self.read(dst))
+            case _:
+                raise NotImplementedError(instr)
+
+    def read(self, operand) -> int:
+        match operand:
+            case R():
+                return self.regs.get(operand, 0)
+            case Imm(value):
+                return value & MASK64
+
+        raise NotImplementedError(operand)
+
+    def write(self, operand, value: int):
+        assert isinstance(operand, R)
+
+        self.regs[operand] = value & MASK64
@@ -0,0 +1,46 @@
+from dataclasses import replace
+from typing import Optional
+
+from minic.x86_64 import MemOffset, Mov, R, Size, X86_64_Program
+from minic.x86_64_encoder import REGS_32
+
+
+# Rewrites a load from a stack slot right after a store of a register to it
+# into a move from that register, or drops it when it loads the same register
+# back. Code generation stores every result and reloads the operands of the
+# next instruction, so this pair is very common.
+def forward_stores(program: X86_64_Program) -> X86_64_Program:
+    instrs = []
+    changed = False
+
+    for instr in program.instructions:
+        stored_reg = get_stored_reg(instrs[-1]) if instrs else None
+
+        if (
+            stored_reg is not None
+            and isinstance(instr, Mov)
+            and isinstance(instr.dst, R)
+            and instr.dst not in REGS_32
+            and instr.src == instrs[-1].dst
+        ):
+            changed = True
+            if instr.dst == stored_reg:
+                continue
+            instr = Mov(instr.dst, stored_reg)
+
+        instrs.append(instr)
+
+    if not changed:
+        return program
+
+    return replace(program, instructions=instrs)
+
+
+def get_stored_reg(instr) -> Optional[R]:
+    match instr:
+        case Mov(MemOffset(Size.QWordPtr, R.Rbp, int()), R() as src) if (
+            src not in REGS_32
+        ):
+            return src
+
+    return None
@@ -0,0 +1,147 @@
+OUT_BUF_SIZE = 65536
+
+# Longest line printed for an int64: a sign, 19 digits and a newline.
+MAX_LINE_SIZE = 21
+
+SYS_WRITE = 1
+SYS_EXIT_GROUP = 231
+
+STDOUT_FILENO = 1
+
+DIGIT_PAIRS = "".join(f"{i:02}" for i in range(100))
+
+# Freestanding replacement for the parts of libc used by generated programs.
+# Output goes to a .bss buffer that is written with raw syscalls when it fills
+# up and when the program exits.
+RUNTIME_ASM = f"""\
+.bss
+.balign 16
+.MINIC_OUT_BUF:
+    .skip {OUT_BUF_SIZE}
+.MINIC_OUT_LEN:
+    .skip 8
+
+.section .rodata
+.MINIC_DIGIT_PAIRS:
+    .ascii "{DIGIT_PAIRS}"
+
+.text
+.global _start
+_start:
+    xor ebp, ebp
+    call main
+    mov edi, eax
+    call minic_exit
+
+minic_print_lld:
+    push rbx
+    push rdi
+    cmp QWORD PTR [rip + .MINIC_OUT_LEN], {OUT_BUF_SIZE - MAX_LINE_SIZE}
+    jbe 1f
+    call minic_flush
+1:
+    pop rdi
+    sub rsp, 32
+    lea r8, [rsp+31]
+    mov BYTE PTR [r8], 10
+    mov rax, rdi
+    test rax, rax
+    jns 2f
+    neg rax
+2:
+    lea r10, [rip + .MINIC_DIGIT_PAIRS]
+    movabs rbx, 0x28F5C28F5C28F5C3
+3:
+    cmp rax, 100
+    jb 4f
+    mov r11, rax
+    shr rax, 2
+    mul rbx
+    shr rdx, 2
+    imul rax, rdx, 100
+    sub r11, rax
+    mov rax, rdx
+    movzx ecx, WORD PTR [r10+r11*2]
+    sub r8, 2
+    mov WORD PTR [r8], cx
+    jmp 3b
+4:
+    cmp rax, 10
+    jb 5f
+    movzx ecx, WORD PTR [r10+rax*2]
+    sub r8, 2
+    mov WORD PTR [r8], cx
+    jmp 6f
+5:
+    add eax, 48
+    dec r8
+    mov BYTE PTR [r8], al
+6:
+    test rdi, rdi
+    jns 7f
+    dec r8
+    mov BYTE PTR [r8], 45
+7:
+    lea rcx, [rsp+32]
+    sub rcx, r8
+    mov rax, QWORD PTR [rip + .MINIC_OUT_LEN]
+    lea rdi, [rip + .MINIC_OUT_BUF]
+    add rdi, rax
+    add rax, rcx
+    mov QWORD PTR [rip + .MINIC_OUT_LEN], rax
+    mov rsi, r8
+    rep movsb
+    add rsp, 32
+    pop rbx
+    ret
+
+minic_write:
+    push rdi
+    push rsi
+    mov rax, QWORD PTR [rip + .MINIC_OUT_LEN]
+    add rax, rsi
+    cmp rax, {OUT_BUF_SIZE}
+    jbe 1f
+    call minic_flush
+1:
+    pop rdx
+    pop rsi
+    cmp rdx, {OUT_BUF_SIZE}
+    jbe 2f
+    jmp minic_write_stdout
+2:
+    mov rcx, rdx
+    mov rax, QWORD PTR [rip + .MINIC_OUT_LEN]
+    lea rdi, [rip + .MINIC_OUT_BUF]
+    add rdi, rax
+    add rax, rcx
+    mov QWORD PTR [rip + .MINIC_OUT_LEN], rax
+    rep movsb
+    ret
+
+minic_flush:
+    lea rsi, [rip + .MINIC_OUT_BUF]
+    mov rdx, QWORD PTR [rip + .MINIC_OUT_LEN]
+    mov QWORD PTR [rip + .MINIC_OUT_LEN], 0
+
+minic_write_stdout:
+    test rdx, rdx
+    jz 1f
+    mov edi, {STDOUT_FILENO}
+    mov eax, {SYS_WRITE}
+    syscall
+    test rax, rax
+    js 1f
+    add rsi, rax
+    sub rdx, rax
+    jmp minic_write_stdout
+1:
+    ret
+
+minic_exit:
+    push rdi
+    call minic_flush
+    pop rdi
+    mov eax, {SYS_EXIT_GROUP}
+    syscall
+"""
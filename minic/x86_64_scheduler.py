@@ -0,0 +1,589 @@
+import heapq
+from bisect import bisect_left
+from dataclasses import dataclass, replace
+from enum import Enum, auto
+from typing import Optional
+
+from minic.x86_64 import (Add, Call, Cqo, Idiv, Imul, Lea, MemOffset, Mov,
+                          Movdqu, Movhps, Movq, Neg, Paddq, Pop, Psubq, Push,
+                          R, Ret, Sar, ScaledIndex, Shl, Shr, Size, Sub,
+                          Vmovdqu, Vmovhps, Vmovq, Vpaddq, Vpbroadcastq,
+                          Vpsubq, Vzeroupper, X86_64_Instr, X86_64_Program,
+                          Xmm, Ymm)
+from minic.x86_64_strength_reduction import IMUL_COST
+
+
+class Unit(Enum):
+    Alu = auto()
+    Mul = auto()
+    Div = auto()
+    Load = auto()
+    Store = auto()
+
+
+@dataclass(frozen=True)
+class InstrTiming:
+    # Cycles until the result can be read.
+    latency: int
+    # Cycles until the unit can start another instruction.
+    throughput: int
+    unit: Unit
+
+
+# Roughly an Ice Lake core: four instructions issue per cycle, and 64-bit
+# divisions tie up a single, partly pipelined divider.
+ISSUE_WIDTH = 4
+
+UNIT_COUNTS = {
+    Unit.Alu: 4,
+    Unit.Mul: 1,
+    Unit.Div: 1,
+    Unit.Load: 2,
+    Unit.Store: 1,
+}
+
+ALU_TIMING = InstrTiming(latency=1, throughput=1, unit=Unit.Alu)
+# The latency of a store is the one of forwarding it to a later load.
+STORE_TIMING = InstrTiming(latency=4, throughput=1, unit=Unit.Store)
+LOAD_LATENCY = 5
+
+TIMING_BY_TYPE = {
+    Mov: ALU_TIMING,
+    Lea: ALU_TIMING,
+    Add: ALU_TIMING,
+    Sub: ALU_TIMING,
+    Shl: ALU_TIMING,
+    Sar: ALU_TIMING,
+    Shr: ALU_TIMING,
+    Neg: ALU_TIMING,
+    Cqo: ALU_TIMING,
+    Imul: InstrTiming(latency=IMUL_COST, throughput=1, unit=Unit.Mul),
+    Idiv: InstrTiming(latency=15, throughput=10, unit=Unit.Div),
+    Movdqu: ALU_TIMING,
+    Movq: ALU_TIMING,
+    Movhps: ALU_TIMING,
+    Paddq: ALU_TIMING,
+    Psubq: ALU_TIMING,
+    Vmovdqu: ALU_TIMING,
+    Vmovq: ALU_TIMING,
+    Vmovhps: ALU_TIMING,
+    Vpbroadcastq: ALU_TIMING,
+    Vpaddq: ALU_TIMING,
+    Vpsubq: ALU_TIMING,
+}
+
+# The registers code generation uses as scratch between stack slots. They are
+# all caller-saved, so no value stays in them across a call.
+SCRATCH_REGS = (R.Rax, R.Rcx, R.Rdx, R.Rsi, R.Rdi, R.R8, R.R9)
+
+CALL_ARG_REGS = (R.Rdi, R.Rsi, R.Rdx, R.Rcx, R.R8, R.R9, R.Rax)
+
+REG_64_BY_REG_32 = {R.Eax: R.Rax, R.Edi: R.Rdi}
+
+# Writing an Xmm register writes the Ymm register it's part of.
+YMM_BY_XMM = {Xmm.Xmm0: Ymm.Ymm0, Xmm.Xmm1: Ymm.Ymm1}
+
+SLOTS_BY_SIZE = {Size.QWordPtr: 1, Size.XmmWordPtr: 2, Size.YmmWordPtr: 4}
+
+
+# A stack slot is identified by its offset from `rbp`. Reads through other
+# registers may alias any slot, and reads relative to `rip` only see
+# read-only data.
+ANY_SLOT = "any"
+
+
+@dataclass
+class InstrEffects:
+    reads: set[R]
+    writes: set[R]
+    # Registers read or written implicitly, or through their 32-bit name,
+    # which can't be renamed.
+    pinned: set[R]
+    mem_reads: set
+    mem_writes: set
+
+
+# Reorders the instructions between calls, and between the instructions that
+# set up or tear down the stack frame, so that independent work runs while
+# slow instructions are in flight.
+#
+# Code generation reuses `rax` and `rdx` for every IR instruction, which
+# orders each one after the previous. The live ranges that don't have to be
+# in a specific register are renamed first, among the scratch registers free
+# at that point.
+def schedule_instructions(program: X86_64_Program) -> X86_64_Program:
+    instrs = []
+    region = []
+    region_effects = []
+
+    for instr in program.instructions:
+        effects = get_instr_effects(instr)
+
+        if is_barrier(instr, effects):
+            instrs += schedule_region(region, region_effects, instr)
+            instrs.append(instr)
+            region = []
+            region_effects = []
+        else:
+            region.append(instr)
+            region_effects.append(effects)
+
+    instrs += schedule_region(region, region_effects, None)
+
+    if instrs == program.instructions:
+        return program
+
+    return replace(program, instructions=instrs)
+
+
+def is_barrier(instr: X86_64_Instr, effects: InstrEffects) -> bool:
+    return (
+        type(instr) in (Call, Push, Pop, Ret, Vzeroupper)
+        or R.Rsp in effects.writes
+        or R.Rbp in effects.writes
+        or ANY_SLOT in effects.mem_writes
+    )
+
+
+def schedule_region(
+    region: list[X86_64_Instr],
+    effects: list[InstrEffects],
+    barrier: Optional[X86_64_Instr],
+) -> list[X86_64_Instr]:
+    if len(region) < 2:
+        return region
+
+    region, effects = rename_scratch_regs(region, effects, get_live_out(barrier))
+    timings = [get_timing(instr, effects[idx]) for idx, instr in enumerate(region)]
+    succs = build_dependency_dag(effects, timings)
+
+    return [region[idx] for idx in list_schedule(timings, succs)]
+
+
+# The registers that the barrier ending a region may read. Without one, the
+# region ends the program and every register may be read.
+def get_live_out(barrier: Optional[X86_64_Instr]) -> set[R]:
+    match barrier:
+        case None:
+            return set(SCRATCH_REGS)
+        case Call():
+            return set(CALL_ARG_REGS)
+        # Only placed right before a call or a return.
+        case Vzeroupper():
+            return set(CALL_ARG_REGS)
+        case Ret():
+            return {R.Rax}
+
+    return get_instr_effects(barrier).reads
+
+
+def get_instr_effects(instr: X86_64_Instr) -> InstrEffects:
+    effects = InstrEffects(set(), set(), set(), set(), set())
+
+    match instr:
+        case Mov(dst, src):
+            add_read(effects, src)
+            add_write(effects, dst)
+        case Lea(dst, src):
+            add_address_read(effects, src)
+            add_write(effects, dst)
+        case Add(dst, src) | Sub(dst, src) | Imul(dst, src) if src is not None:
+            add_read(effects, dst)
+            add_read(effects, src)
+            add_write(effects, dst)
+        case Shl(dst, _) | Sar(dst, _) | Shr(dst, _) | Neg(dst):
+            add_read(effects, dst)
+            add_write(effects, dst)
+        case Imul(src, None):
+            add_read(effects, src)
+            add_implicit(effects, reads=(R.Rax,), writes=(R.Rax, R.Rdx))
+        case Idiv(src):
+            add_read(effects, src)
+            add_implicit(effects, reads=(R.Rax, R.Rdx), writes=(R.Rax, R.Rdx))
+        case Cqo():
+            add_implicit(effects, reads=(R.Rax,), writes=(R.Rdx,))
+        case Push(src):
+            add_implicit(effects, reads=(src, R.Rsp), writes=(R.Rsp,))
+        case Pop(dst):
+            add_implicit(effects, reads=(R.Rsp,), writes=(dst, R.Rsp))
+        case Ret() | Call():
+            add_implicit(effects, reads=(R.Rsp,), writes=(R.Rsp,))
+        case (
+            Movdqu(dst, src)
+            | Movq(dst, src)
+            | Vmovdqu(dst, src)
+            | Vmovq(dst, src)
+            | Vpbroadcastq(dst, src)
+        ):
+            add_read(effects, src)
+            add_write(effects, dst)
+        case Movhps(dst, src) | Paddq(dst, src) | Psubq(dst, src):
+            add_read(effects, dst)
+            add_read(effects, src)
+            add_write(effects, dst)
+        case (
+            Vmovhps(dst, left, right)
+            | Vpaddq(dst, left, right)
+            | Vpsubq(dst, left, right)
+        ):
+            add_read(effects, left)
+            add_read(effects, right)
+            add_write(effects, dst)
+        case Vzeroupper():
+            effects.writes.update(Ymm)
+
+    return effects
+
+
+def add_read(effects: InstrEffects, operand):
+    match operand:
+        case R():
+            add_reg(effects.reads, effects, operand)
+        case Xmm() | Ymm():
+            effects.reads.add(YMM_BY_XMM.get(operand, operand))
+        case MemOffset():
+            add_address_read(effects, operand)
+            effects.mem_reads.update(get_slots(operand))
+
+
+def add_write(effects: InstrEffects, operand):
+    match operand:
+        case R():
+            add_reg(effects.writes, effects, operand)
+        case Xmm() | Ymm():
+            effects.writes.add(YMM_BY_XMM.get(operand, operand))
+        case MemOffset():
+            add_address_read(effects, operand)
+            effects.mem_writes.update(get_slots(operand))
+
+
+def add_address_read(effects: InstrEffects, operand):
+    match operand:
+        case MemOffset(_, base, _) if base != R.Rip:
+            add_reg(effects.reads, effects, base)
+        case ScaledIndex(base, index, _):
+            add_reg(effects.reads, effects, base)
+            add_reg(effects.reads, effects, index)
+
+
+def add_reg(regs: set[R], effects: InstrEffects, reg: R):
+    if reg in REG_64_BY_REG_32:
+        reg = REG_64_BY_REG_32[reg]
+        effects.pinned.add(reg)
+    regs.add(reg)
+
+
+def add_implicit(effects: InstrEffects, reads=(), writes=()):
+    effects.reads.update(reads)
+    effects.writes.update(writes)
+    effects.pinned.update(reads)
+    effects.pinned.update(writes)
+
+
+# Vector moves access a block of consecutive slots.
+def get_slots(mem_offset: MemOffset) -> tuple:
+    match mem_offset:
+        case MemOffset(size, R.Rbp, int(displacement)):
+            return tuple(displacement + 8 * lane for lane in range(SLOTS_BY_SIZE[size]))
+        case MemOffset(_, R.Rip, _):
+            return (None,)
+
+    return (ANY_SLOT,)
+
+
+def get_timing(instr: X86_64_Instr, effects: InstrEffects) -> InstrTiming:
+    if effects.mem_writes:
+        return STORE_TIMING
+
+    timing = TIMING_BY_TYPE[type(instr)]
+    if not effects.mem_reads:
+        return timing
+
+    if timing is ALU_TIMING:
+        return InstrTiming(LOAD_LATENCY, throughput=1, unit=Unit.Load)
+
+    return replace(timing, latency=timing.latency + LOAD_LATENCY)
+
+
+# A value in a register, from the instruction that writes it to the last one
+# that reads it.
+@dataclass
+class LiveRange:
+    reg: R
+    # -1 for values live into the region.
+    start: int
+    end: int
+    instr_idxs: list[int]
+    pinned: bool = False
+
+
+# Moves the live ranges of scratch registers that aren't pinned to a register
+# to the scratch register that has been free for the longest, so that
+# unrelated computations don't wait on each other to free `rax` and `rdx`.
+# Returns `region` and its effects unchanged if some live range finds no
+# free register.
+def rename_scratch_regs(
+    region: list[X86_64_Instr], effects: list[InstrEffects], live_out: set[R]
+) -> tuple[list[X86_64_Instr], list[InstrEffects]]:
+    live_ranges = find_live_ranges(effects, live_out)
+
+    pinned_by_reg = {reg: [] for reg in SCRATCH_REGS}
+    for live_range in live_ranges:
+        if live_range.pinned:
+            pinned_by_reg[live_range.reg].append((live_range.start, live_range.end))
+
+    pinned_starts_by_reg = {
+        reg: [start for start, _ in ranges] for reg, ranges in pinned_by_reg.items()
+    }
+    free_from = {reg: -1 for reg in SCRATCH_REGS}
+    reg_by_reg_by_instr = {}
+
+    for live_range in live_ranges:
+        if live_range.pinned:
+            free_from[live_range.reg] = max(free_from[live_range.reg], live_range.end)
+            continue
+
+        candidates = [
+            reg
+            for reg in SCRATCH_REGS
+            if free_from[reg] < live_range.start
+            and not overlaps_pinned(
+                pinned_by_reg[reg], pinned_starts_by_reg[reg], live_range
+            )
+        ]
+        if not candidates:
+            return region, effects
+
+        reg = min(candidates, key=lambda reg: free_from[reg])
+        free_from[reg] = live_range.end
+        if reg == live_range.reg:
+            continue
+
+        for instr_idx in live_range.instr_idxs:
+            reg_by_reg_by_instr.setdefault(instr_idx, {})[live_range.reg] = reg
+
+    renamed = list(region)
+    renamed_effects = list(effects)
+    for instr_idx, reg_by_reg in reg_by_reg_by_instr.items():
+        renamed[instr_idx] = rename_regs(region[instr_idx], reg_by_reg)
+        renamed_effects[instr_idx] = rename_effects(effects[instr_idx], reg_by_reg)
+
+    return renamed, renamed_effects
+
+
+# Live ranges are sorted by start. Every instruction that refers to a
+# register belongs to exactly one of its live ranges, since an instruction
+# that both reads and writes a register extends the live range it reads.
+def find_live_ranges(effects: list[InstrEffects], live_out: set[R]) -> list[LiveRange]:
+    live_ranges = []
+    open_by_reg = {}
+
+    def open_live_range(reg: R, start: int) -> LiveRange:
+        live_range = LiveRange(reg, start, start, [], pinned=start < 0)
+        open_by_reg[reg] = live_range
+        live_ranges.append(live_range)
+        return live_range
+
+    for instr_idx, instr_effects in enumerate(effects):
+        for reg in instr_effects.reads:
+            if reg not in SCRATCH_REGS:
+                continue
+            live_range = open_by_reg.get(reg) or open_live_range(reg, -1)
+            live_range.end = instr_idx
+            live_range.instr_idxs.append(instr_idx)
+
+        for reg in instr_effects.writes:
+            if reg not in SCRATCH_REGS:
+                continue
+            if reg in instr_effects.reads:
+                live_range = open_by_reg[reg]
+            else:
+                live_range = open_live_range(reg, instr_idx)
+                live_range.instr_idxs.append(instr_idx)
+            live_range.end = instr_idx
+
+        for reg in instr_effects.pinned:
+            if reg in open_by_reg:
+                open_by_reg[reg].pinned = True
+
+    for reg in live_out:
+        if reg in open_by_reg:
+            open_by_reg[reg].pinned = True
+            open_by_reg[reg].end = len(effects)
+
+    # Registers are iterated in an arbitrary order, so ties are broken by
+    # register to keep the result deterministic.
+    live_ranges.sort(key=lambda live_range: (live_range.start, live_range.reg.value))
+
+    return live_ranges
+
+
+def overlaps_pinned(
+    pinned: list[tuple[int, int]], pinned_starts: list[int], live_range: LiveRange
+) -> bool:
+    # Pinned live ranges of the same register don't overlap, so only the
+    # last one starting before the end of `live_range` can reach into it.
+    idx = bisect_left(pinned_starts, live_range.end + 1) - 1
+
+    return idx >= 0 and pinned[idx][1] >= live_range.start
+
+
+def rename_regs(instr: X86_64_Instr, reg_by_reg: dict[R, R]) -> X86_64_Instr:
+    return type(instr)(
+        *(
+            rename_operand(getattr(instr, name), reg_by_reg)
+            for name in instr.__dataclass_fields__
+        )
+    )
+
+
+# Pinned registers are never renamed, and renaming doesn't change which stack
+# slots an instruction accesses.
+def rename_effects(effects: InstrEffects, reg_by_reg: dict[R, R]) -> InstrEffects:
+    return replace(
+        effects,
+        reads={reg_by_reg.get(reg, reg) for reg in effects.reads},
+        writes={reg_by_reg.get(reg, reg) for reg in effects.writes},
+    )
+
+
+def rename_operand(operand, reg_by_reg: dict[R, R]):
+    match operand:
+        case R():
+            return reg_by_reg.get(operand, operand)
+        case MemOffset(size, base, displacement):
+            return MemOffset(size, reg_by_reg.get(base, base), displacement)
+        case ScaledIndex(base, index, scale):
+            return ScaledIndex(
+                reg_by_reg.get(base, base), reg_by_reg.get(index, index), scale
+            )
+
+    return operand
+
+
+# Returns, for each instruction, the later instructions that depend on it
+# along with how many cycles they have to wait. Reads wait for the latency of
+# the write they read; writes only have to stay after the earlier reads and
+# writes of the same register or stack slot. No instruction reads the flags,
+# so writes to them aren't ordered.
+def build_dependency_dag(
+    effects: list[InstrEffects], timings: list[InstrTiming]
+) -> list[list[tuple[int, int]]]:
+    succs = [[] for _ in effects]
+    latencies = [timing.latency for timing in timings]
+    last_write_by_loc = {}
+    reads_by_loc = {}
+    slot_writes = []
+    any_slot_reads = []
+
+    def read_loc(instr_idx: int, loc):
+        write_idx = last_write_by_loc.get(loc)
+        if write_idx is not None:
+            succs[write_idx].append((instr_idx, latencies[write_idx]))
+        reads_by_loc.setdefault(loc, []).append(instr_idx)
+
+    def write_loc(instr_idx: int, loc):
+        write_idx = last_write_by_loc.get(loc)
+        if write_idx is not None:
+            succs[write_idx].append((instr_idx, 0))
+        for read_idx in reads_by_loc.pop(loc, ()):
+            if read_idx != instr_idx:
+                succs[read_idx].append((instr_idx, 0))
+        last_write_by_loc[loc] = instr_idx
+
+    for instr_idx, instr_effects in enumerate(effects):
+        for reg in instr_effects.reads:
+            read_loc(instr_idx, reg)
+
+        for slot in instr_effects.mem_reads:
+            if slot == ANY_SLOT:
+                for write_idx in slot_writes:
+                    succs[write_idx].append((instr_idx, latencies[write_idx]))
+                any_slot_reads.append(instr_idx)
+            elif slot is not None:
+                read_loc(instr_idx, ("slot", slot))
+
+        for reg in instr_effects.writes:
+            write_loc(instr_idx, reg)
+
+        for slot in instr_effects.mem_writes:
+            for read_idx in any_slot_reads:
+                succs[read_idx].append((instr_idx, 0))
+            write_loc(instr_idx, ("slot", slot))
+            slot_writes.append(instr_idx)
+
+    return succs
+
+
+# Issues instructions cycle by cycle, among those whose operands are ready
+# and whose unit is free, picking first the ones with the longest chain of
+# latencies after them. Ties keep the original order.
+def list_schedule(
+    timings: list[InstrTiming], succs: list[list[tuple[int, int]]]
+) -> list[int]:
+    num_instrs = len(timings)
+
+    heights = [0] * num_instrs
+    num_preds = [0] * num_instrs
+    for instr_idx in reversed(range(num_instrs)):
+        heights[instr_idx] = timings[instr_idx].latency + max(
+            (heights[succ] for succ, _ in succs[instr_idx]), default=0
+        )
+        for succ, _ in succs[instr_idx]:
+            num_preds[succ] += 1
+
+    ready_cycles = [0] * num_instrs
+    busy_until_by_unit = {unit: [0] * count for unit, count in UNIT_COUNTS.items()}
+    # Instructions whose operands are ready, by the unit they run on, so that
+    # a busy unit doesn't hold up the others.
+    ready_by_unit = {unit: [] for unit in UNIT_COUNTS}
+    # Instructions whose operands are not ready yet, by the cycle they are.
+    waiting = []
+    order = []
+    cycle = 0
+
+    def make_ready(instr_idx: int):
+        ready = ready_by_unit[timings[instr_idx].unit]
+        heapq.heappush(ready, (-heights[instr_idx], instr_idx))
+
+    for instr_idx in range(num_instrs):
+        if not num_preds[instr_idx]:
+            make_ready(instr_idx)
+
+    while len(order) < num_instrs:
+        while waiting and waiting[0][0] <= cycle:
+            make_ready(heapq.heappop(waiting)[1])
+
+        for _ in range(ISSUE_WIDTH):
+            best = None
+            for unit, ready in ready_by_unit.items():
+                if (
+                    ready
+                    and (best is None or ready[0] < best[0])
+                    and min(busy_until_by_unit[unit]) <= cycle
+                ):
+                    best = (ready[0], unit)
+            if best is None:
+                break
+
+            _, instr_idx = heapq.heappop(ready_by_unit[best[1]])
+            timing = timings[instr_idx]
+            busy_until = busy_until_by_unit[timing.unit]
+            busy_until[busy_until.index(min(busy_until))] = cycle + timing.throughput
+            order.append(instr_idx)
+
+            for succ, latency in succs[instr_idx]:
+                ready_cycles[succ] = max(ready_cycles[succ], cycle + latency)
+                num_preds[succ] -= 1
+                if num_preds[succ]:
+                    continue
+                if ready_cycles[succ] <= cycle:
+                    make_ready(succ)
+                else:
+                    heapq.heappush(waiting, (ready_cycles[succ], succ))
+
+        cycle += 1
+        if waiting and not any(ready_by_unit.values()):
+            cycle = max(cycle, waiting[0][0])
+
+    return order
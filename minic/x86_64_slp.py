@@ -0,0 +1,191 @@
+from dataclasses import dataclass
+from typing import Optional, Union
+
+from minic.ir import BinOp, BinOpInstr, Instr, Program, Reg
+from minic.ir_ssa import instr_uses
+from minic.x86_64 import (MemOffset, Movdqu, Movhps, Movq, Paddq, Psubq, R,
+                          Size, Vmovdqu, Vmovhps, Vmovq, Vpaddq, Vpbroadcastq,
+                          Vpsubq, X86_64_Instr, Xmm, Ymm)
+
+# Operations with a packed 64-bit form. Packed multiplication of 64-bit lanes
+# needs AVX-512.
+PACKED_OPS = (BinOp.Add, BinOp.Sub)
+
+SSE2_WIDTH = 2
+AVX2_WIDTH = 4
+
+# Costs are in micro-ops. A scalar operation loads both operands from their
+# stack slots, computes and stores its result.
+SCALAR_COST = 4
+VECTOR_LOAD_COST = 1
+# `movq` and `movhps`, which loads and shuffles.
+VECTOR_GATHER_COST = 3
+VECTOR_OP_COST = 1
+VECTOR_STORE_COST = 1
+
+
+# Independent operations with the same operator, whose results are computed
+# together, one per lane.
+@dataclass(frozen=True)
+class Pack:
+    op: BinOp
+    instrs: tuple[BinOpInstr, ...]
+
+    @property
+    def out_regs(self) -> tuple[Reg, ...]:
+        return tuple(instr.out_reg for instr in self.instrs)
+
+    @property
+    def left_regs(self) -> tuple[Reg, ...]:
+        return tuple(instr.left_reg for instr in self.instrs)
+
+    @property
+    def right_regs(self) -> tuple[Reg, ...]:
+        return tuple(instr.right_reg for instr in self.instrs)
+
+
+# Groups additions and subtractions into packs of up to `width` lanes. An
+# operation is held back until it fills a pack with others of the same
+# operator, or until an instruction reads one of the held back results. The
+# operations have no side effects and can't trap, so holding them back past
+# other instructions doesn't change what the program does.
+def pack_instructions(program: Program, width: int) -> list[Union[Instr, Pack]]:
+    items = []
+    pending_by_op = {op: [] for op in PACKED_OPS}
+    pending_op_by_reg = {}
+
+    def flush(op: BinOp):
+        pending = pending_by_op[op]
+        pending_by_op[op] = []
+        for instr in pending:
+            del pending_op_by_reg[instr.out_reg.idx]
+
+        # Lanes are only packed in widths that the vector registers have.
+        while len(pending) >= SSE2_WIDTH:
+            lanes = AVX2_WIDTH if len(pending) >= AVX2_WIDTH else SSE2_WIDTH
+            items.append(Pack(op, tuple(pending[:lanes])))
+            pending = pending[lanes:]
+        items.extend(pending)
+
+    for instr in program.instructions:
+        for reg in instr_uses(instr):
+            op = pending_op_by_reg.get(reg.idx)
+            if op is not None:
+                flush(op)
+
+        if type(instr) is BinOpInstr and instr.op in PACKED_OPS:
+            pending_by_op[instr.op].append(instr)
+            pending_op_by_reg[instr.out_reg.idx] = instr.op
+            if len(pending_by_op[instr.op]) == width:
+                flush(instr.op)
+        else:
+            items.append(instr)
+
+    for op in PACKED_OPS:
+        flush(op)
+
+    return items
+
+
+# Chooses registers whose stack slots are laid out next to each other, in
+# lane order, so that they are loaded or stored with a single vector move.
+# The results of each pack always are, and so are its operands, unless some
+# of them are the same register or already laid out otherwise.
+def plan_slot_blocks(items: list[Union[Instr, Pack]]) -> dict[Reg, tuple[Reg, ...]]:
+    block_by_reg = {}
+
+    for item in items:
+        if not isinstance(item, Pack):
+            continue
+
+        for regs in (item.out_regs, item.left_regs, item.right_regs):
+            if len(set(regs)) == len(regs) and not any(
+                reg in block_by_reg for reg in regs
+            ):
+                for reg in regs:
+                    block_by_reg[reg] = regs
+
+    return block_by_reg
+
+
+# Returns the instructions that compute a pack from the stack slots of its
+# operands into the stack slots of its results, or None when that costs as
+# much as computing each lane with scalar code, or can't be done.
+def vectorize_pack(
+    op: BinOp,
+    out_slots: list[MemOffset],
+    left_slots: list[MemOffset],
+    right_slots: list[MemOffset],
+    avx2: bool,
+) -> Optional[list[X86_64_Instr]]:
+    width = len(out_slots)
+    if width == AVX2_WIDTH and not avx2:
+        return None
+    if not is_contiguous(out_slots):
+        return None
+
+    wide = width == AVX2_WIDTH
+    left_vec = Ymm.Ymm0 if wide else Xmm.Xmm0
+    right_vec = Ymm.Ymm1 if wide else Xmm.Xmm1
+    left_load = load_vector(left_vec, left_slots, avx2)
+    right_load = load_vector(right_vec, right_slots, avx2)
+    if left_load is None or right_load is None:
+        return None
+
+    (left_instrs, left_cost), (right_instrs, right_cost) = left_load, right_load
+    cost = left_cost + right_cost + VECTOR_OP_COST + VECTOR_STORE_COST
+    if cost >= width * SCALAR_COST:
+        return None
+
+    out_block = vector_mem_offset(out_slots[0], width)
+    if avx2:
+        vector_op = Vpaddq if op == BinOp.Add else Vpsubq
+        compute = [
+            vector_op(left_vec, left_vec, right_vec),
+            Vmovdqu(out_block, left_vec),
+        ]
+    else:
+        vector_op = Paddq if op == BinOp.Add else Psubq
+        compute = [
+            vector_op(left_vec, right_vec),
+            Movdqu(out_block, left_vec),
+        ]
+
+    return [*left_instrs, *right_instrs, *compute]
+
+
+# Returns the instructions that load `slots` into the lanes of `vec`, and
+# their cost, or None for wide vectors whose slots are scattered.
+def load_vector(
+    vec: Union[Xmm, Ymm], slots: list[MemOffset], avx2: bool
+) -> Optional[tuple[list[X86_64_Instr], int]]:
+    width = len(slots)
+
+    if is_contiguous(slots):
+        block = vector_mem_offset(slots[0], width)
+        load = Vmovdqu(vec, block) if avx2 else Movdqu(vec, block)
+        return [load], VECTOR_LOAD_COST
+
+    if avx2 and all(slot == slots[0] for slot in slots):
+        return [Vpbroadcastq(vec, slots[0])], VECTOR_LOAD_COST
+
+    if width != SSE2_WIDTH:
+        return None
+
+    if avx2:
+        return [Vmovq(vec, slots[0]), Vmovhps(vec, vec, slots[1])], VECTOR_GATHER_COST
+
+    return [Movq(vec, slots[0]), Movhps(vec, slots[1])], VECTOR_GATHER_COST
+
+
+def is_contiguous(slots: list[MemOffset]) -> bool:
+    return all(
+        slot.base == R.Rbp and slot.displacement == slots[0].displacement + 8 * lane
+        for lane, slot in enumerate(slots)
+    )
+
+
+def vector_mem_offset(first_slot: MemOffset, width: int) -> MemOffset:
+    size = Size.YmmWordPtr if width == AVX2_WIDTH else Size.XmmWordPtr
+
+    return MemOffset(size, first_slot.base, first_slot.displacement)
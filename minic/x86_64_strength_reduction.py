@@ -0,0 +1,269 @@
+import json
+from functools import cache
+from pathlib import Path
+from typing import Optional
+
+from minic.ir import INT64_MAX, INT64_MIN, wrap_int64
+from minic.x86_64 import (Add, Imm, Imul, Lea, Mov, Neg, R, Sar, ScaledIndex,
+                          Shl, Shr, Sub, X86_64_Instr)
+
+IMUL_COST = 3
+
+LEA_FACTORS = (3, 5, 9)
+
+# Multiplication sequences found by the superoptimizer in x86_64_superopt, for
+# the values where they beat the decompositions below. Tables of another
+# version are ignored.
+MUL_TABLE_PATH = Path(__file__).with_name("x86_64_mul_table.json")
+MUL_TABLE_VERSION = 1
+
+
+def instr_cost(instr: X86_64_Instr) -> int:
+    match instr:
+        # Register to register moves are eliminated at register renaming.
+        case Mov(R(), R()):
+            return 0
+        case Mov() | Shl() | Sar() | Shr() | Lea() | Add() | Sub() | Neg():
+            return 1
+        case Imul():
+            return IMUL_COST
+
+    assert False
+
+
+def seq_cost(instrs) -> int:
+    return sum(instr_cost(instr) for instr in instrs)
+
+
+# Sequences are ranked by cost, then by length.
+def seq_key(instrs) -> tuple[int, int]:
+    return (seq_cost(instrs), len(instrs))
+
+
+# Multiplies `rax` by `value` in place, possibly clobbering `rdx`. Returns None
+# when a plain `imul` is at least as cheap as any known sequence.
+@cache
+def mul_by_const_instrs(value: int) -> Optional[tuple[X86_64_Instr, ...]]:
+    decomposed = decompose_mul_by_const(value)
+    superoptimized = read_mul_table(MUL_TABLE_PATH).get(value)
+
+    if superoptimized is None or (
+        decomposed is not None and seq_key(decomposed) <= seq_key(superoptimized)
+    ):
+        return decomposed
+
+    return superoptimized
+
+
+@cache
+def decompose_mul_by_const(value: int) -> Optional[tuple[X86_64_Instr, ...]]:
+    if not INT64_MIN <= value <= INT64_MAX:
+        return None
+
+    best = min(_mul_candidates(value), key=seq_key, default=None)
+
+    if best is None or seq_cost(best) >= IMUL_COST:
+        return None
+
+    return best
+
+
+def _mul_candidates(value: int):
+    if value == 0:
+        yield (Mov(R.Rax, Imm(0)),)
+        return
+
+    if value < 0:
+        if (instrs := decompose_mul_by_const(-value)) is not None:
+            yield (*instrs, Neg(R.Rax))
+        return
+
+    if value == 1:
+        yield ()
+        return
+
+    if _is_power_of_two(value):
+        yield (Shl(R.Rax, Imm(value.bit_length() - 1)),)
+
+    for factor in LEA_FACTORS:
+        if value % factor == 0:
+            rest = decompose_mul_by_const(value // factor)
+            if rest is not None:
+                yield (Lea(R.Rax, ScaledIndex(R.Rax, R.Rax, factor - 1)), *rest)
+
+    # x * (1 + scale * factor) == x + scale * (x * factor)
+    for scale in (2, 4, 8):
+        factor, remainder = divmod(value - 1, scale)
+        if remainder == 0 and factor in LEA_FACTORS:
+            yield (
+                Lea(R.Rdx, ScaledIndex(R.Rax, R.Rax, factor - 1)),
+                Lea(R.Rax, ScaledIndex(R.Rax, R.Rdx, scale)),
+            )
+
+    if _is_power_of_two(value - 1):
+        yield (
+            Mov(R.Rdx, R.Rax),
+            Shl(R.Rax, Imm((value - 1).bit_length() - 1)),
+            Add(R.Rax, R.Rdx),
+        )
+
+    if _is_power_of_two(value + 1):
+        yield (
+            Mov(R.Rdx, R.Rax),
+            Shl(R.Rax, Imm((value + 1).bit_length() - 1)),
+            Sub(R.Rax, R.Rdx),
+        )
+
+
+@cache
+def read_mul_table(path: Path) -> dict[int, tuple[X86_64_Instr, ...]]:
+    try:
+        table = json.loads(path.read_text())
+    except FileNotFoundError:
+        return {}
+
+    if table.get("version") != MUL_TABLE_VERSION:
+        return {}
+
+    return {
+        int(value): tuple(decode_instr(encoded) for encoded in instrs)
+        for value, instrs in table["mul"].items()
+    }
+
+
+# Table entries encode instructions as their mnemonic followed by their
+# operands, with registers by name and immediates and scales as integers.
+def encode_instr(instr: X86_64_Instr) -> list:
+    match instr:
+        case Lea(dst, ScaledIndex(base, index, scale)):
+            return ["lea", dst.dump(), base.dump(), index.dump(), scale]
+        case Shl(dst, Imm(count)):
+            return ["shl", dst.dump(), count]
+        case Neg(dst):
+            return ["neg", dst.dump()]
+        case Mov(R() as dst, R() as src) | Add(dst, src) | Sub(dst, src):
+            return [type(instr).__name__.lower(), dst.dump(), src.dump()]
+
+    raise NotImplementedError(instr)
+
+
+def decode_instr(encoded: list) -> X86_64_Instr:
+    match encoded:
+        case ["lea", dst, base, index, scale]:
+            return Lea(
+                decode_reg(dst), ScaledIndex(decode_reg(base), decode_reg(index), scale)
+            )
+        case ["shl", dst, int(count)]:
+            return Shl(decode_reg(dst), Imm(count))
+        case ["neg", dst]:
+            return Neg(decode_reg(dst))
+        case ["mov" | "add" | "sub" as mnemonic, dst, src]:
+            instr_type = {"mov": Mov, "add": Add, "sub": Sub}[mnemonic]
+            return instr_type(decode_reg(dst), decode_reg(src))
+
+    raise ValueError(f"invalid instruction in table: {encoded}")
+
+
+def decode_reg(name: str) -> R:
+    return R[name.capitalize()]
+
+
+def _is_power_of_two(value: int) -> bool:
+    return value > 0 and value & (value - 1) == 0
+
+
+# Divides `rax` by `value` in place with C truncation semantics, possibly
+# clobbering `rcx` and `rdx`. Returns None for a zero divisor, so that `idiv`
+# keeps trapping.
+@cache
+def div_by_const_instrs(value: int) -> Optional[tuple[X86_64_Instr, ...]]:
+    if value == 0 or not INT64_MIN <= value <= INT64_MAX:
+        return None
+
+    if value == 1:
+        return ()
+
+    if value == -1:
+        return (Neg(R.Rax),)
+
+    if _is_power_of_two(abs(value)):
+        instrs = _div_by_power_of_two_instrs(abs(value).bit_length() - 1)
+        return (*instrs, Neg(R.Rax)) if value < 0 else instrs
+
+    return _div_by_magic_instrs(value)
+
+
+def _div_by_power_of_two_instrs(shift: int) -> tuple[X86_64_Instr, ...]:
+    # Biases negative dividends by `2**shift - 1` so that the arithmetic shift
+    # rounds toward zero.
+    if shift == 1:
+        bias = (Mov(R.Rdx, R.Rax), Shr(R.Rdx, Imm(63)))
+    else:
+        bias = (
+            Mov(R.Rdx, R.Rax),
+            Sar(R.Rdx, Imm(63)),
+            Shr(R.Rdx, Imm(64 - shift)),
+        )
+
+    return (*bias, Add(R.Rax, R.Rdx), Sar(R.Rax, Imm(shift)))
+
+
+def _div_by_magic_instrs(value: int) -> tuple[X86_64_Instr, ...]:
+    magic, shift = div_magic(value)
+
+    instrs = [
+        Mov(R.Rcx, R.Rax),
+        Mov(R.Rax, Imm(magic)),
+        Imul(R.Rcx),
+    ]
+
+    if value > 0 and magic < 0:
+        instrs.append(Add(R.Rdx, R.Rcx))
+    elif value < 0 and magic > 0:
+        instrs.append(Sub(R.Rdx, R.Rcx))
+
+    if shift:
+        instrs.append(Sar(R.Rdx, Imm(shift)))
+
+    # Adds one to negative quotients to truncate toward zero.
+    instrs += [
+        Mov(R.Rax, R.Rdx),
+        Shr(R.Rax, Imm(63)),
+        Add(R.Rax, R.Rdx),
+    ]
+
+    return tuple(instrs)
+
+
+# Computes the signed magic multiplier and post-shift for dividing by `value`,
+# following Hacker's Delight, figure 10-1, for 64-bit words.
+@cache
+def div_magic(value: int) -> tuple[int, int]:
+    assert 2 <= abs(value) and not _is_power_of_two(abs(value))
+
+    two63 = 2**63
+    abs_value = abs(value)
+    t = two63 + (1 if value < 0 else 0)
+    abs_nc = t - 1 - t % abs_value
+    p = 63
+    q1, r1 = divmod(two63, abs_nc)
+    q2, r2 = divmod(two63, abs_value)
+
+    while True:
+        p += 1
+        q1, r1 = 2 * q1, 2 * r1
+        if r1 >= abs_nc:
+            q1, r1 = q1 + 1, r1 - abs_nc
+        q2, r2 = 2 * q2, 2 * r2
+        if r2 >= abs_value:
+            q2, r2 = q2 + 1, r2 - abs_value
+
+        delta = abs_value - r2
+        if not (q1 < delta or (q1 == delta and r1 == 0)):
+            break
+
+    magic = q2 + 1
+    if value < 0:
+        magic = -magic
+
+    return wrap_int64(magic), p - 64
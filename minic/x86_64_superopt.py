@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+
+# Finds the cheapest sequences that multiply `rax` by a constant, for the
+# table that strength reduction consults at compile time. The search runs
+# offline, and its results are checked against the IR's multiplication.
+#
+# Usage: python -m minic.x86_64_superopt [table_path]
+
+import heapq
+import itertools
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+from minic.ir import INT64_MAX, INT64_MIN, BinOp, eval_bin_op, wrap_int64
+from minic.x86_64 import (Add, Imm, Lea, Mov, Neg, R, ScaledIndex, Shl, Sub,
+                          X86_64_Instr)
+from minic.x86_64_interp import X86_64_Interp
+from minic.x86_64_strength_reduction import (IMUL_COST, MUL_TABLE_PATH,
+                                             MUL_TABLE_VERSION,
+                                             decompose_mul_by_const,
+                                             encode_instr, seq_cost, seq_key)
+
+# The operand and the result are in `rax`, and `rdx` is scratch, like in the
+# decompositions of strength reduction.
+REGS = (R.Rax, R.Rdx)
+SCALES = (1, 2, 4, 8)
+SHIFTS = range(1, 64)
+
+# Only sequences cheaper than `imul` are worth using. Register moves cost
+# nothing, so the length needs a bound of its own.
+MAX_COST = IMUL_COST - 1
+MAX_LENGTH = 4
+
+# Candidates are checked on every operand in this range, on the extremes, and
+# on random operands.
+EXHAUSTIVE_INPUTS = range(-1024, 1025)
+NUM_RANDOM_INPUTS = 1000
+
+# The value of each register, as a multiple of the operand, or None while the
+# register holds garbage.
+State = tuple[Optional[int], ...]
+
+
+# Every instruction in the search adds up registers multiplied by constants,
+# so each register holds a constant multiple of the operand, modulo 2**64.
+# Running a sequence on an operand of 1 gives those constants, and sequences
+# that reach the same constants are interchangeable, so the search only
+# extends the cheapest sequence reaching each state, like Dijkstra's
+# algorithm. Returns the cheapest sequence for every reachable multiplier.
+def search_mul_sequences(
+    max_cost: int = MAX_COST, max_length: int = MAX_LENGTH
+) -> dict[int, tuple[X86_64_Instr, ...]]:
+    start = (1, None)
+    best_by_state = {start: ()}
+    counter = itertools.count()
+    heap = [((0, 0), next(counter), start)]
+
+    while heap:
+        key, _, state = heapq.heappop(heap)
+        instrs = best_by_state[state]
+        if key != seq_key(instrs):
+            continue
+
+        for instr in candidate_instrs(state):
+            new_instrs = (*instrs, instr)
+            new_key = seq_key(new_instrs)
+            if new_key[0] > max_cost or new_key[1] > max_length:
+                continue
+
+            new_state = step(state, instr)
+            best = best_by_state.get(new_state)
+            if best is None or new_key < seq_key(best):
+                best_by_state[new_state] = new_instrs
+                heapq.heappush(heap, (new_key, next(counter), new_state))
+
+    best_by_value = {}
+    for (rax, _), instrs in best_by_state.items():
+        value = wrap_int64(rax)
+        best = best_by_value.get(value)
+        if best is None or seq_key(instrs) < seq_key(best):
+            best_by_value[value] = instrs
+
+    return best_by_value
+
+
+def candidate_instrs(state: State) -> Iterator[X86_64_Instr]:
+    defined = [reg for reg, value in zip(REGS, state) if value is not None]
+
+    for dst in REGS:
+        for src in defined:
+            if src != dst:
+                yield Mov(dst, src)
+
+        for base, index in itertools.product(defined, repeat=2):
+            for scale in SCALES:
+                yield Lea(dst, ScaledIndex(base, index, scale))
+
+        if dst not in defined:
+            continue
+
+        for src in defined:
+            yield Add(dst, src)
+            yield Sub(dst, src)
+        for shift in SHIFTS:
+            yield Shl(dst, Imm(shift))
+        yield Neg(dst)
+
+
+def step(state: State, instr: X86_64_Instr) -> State:
+    interp = X86_64_Interp(
+        {reg: value for reg, value in zip(REGS, state) if value is not None}
+    )
+    interp.execute(instr)
+
+    return tuple(interp.regs[reg] if reg in interp.regs else None for reg in REGS)
+
+
+def gen_inputs(rng: random.Random) -> list[int]:
+    return [
+        *EXHAUSTIVE_INPUTS,
+        INT64_MIN,
+        INT64_MAX,
+        *(rng.randint(INT64_MIN, INT64_MAX) for _ in range(NUM_RANDOM_INPUTS)),
+    ]
+
+
+# Checks that `instrs` multiply `rax` by `value` on every input, with garbage
+# in `rdx`, so that sequences that read it before writing it fail.
+def verify_mul_sequence(
+    value: int, instrs: tuple[X86_64_Instr, ...], inputs: list[int]
+) -> bool:
+    for operand in inputs:
+        garbage = wrap_int64(operand * 0x9E3779B97F4A7C15 + 1)
+        interp = X86_64_Interp({R.Rax: operand, R.Rdx: garbage}).run(instrs)
+        if interp.get(R.Rax) != eval_bin_op(BinOp.Mul, operand, value):
+            return False
+
+    return True
+
+
+# Returns the verified sequences that beat the decompositions of strength
+# reduction, or that exist where those fall back to `imul`.
+def build_mul_table(
+    max_cost: int = MAX_COST, max_length: int = MAX_LENGTH, seed: int = 0
+) -> dict[int, tuple[X86_64_Instr, ...]]:
+    inputs = gen_inputs(random.Random(seed))
+    table = {}
+
+    for value, instrs in sorted(search_mul_sequences(max_cost, max_length).items()):
+        decomposed = decompose_mul_by_const(value)
+        if decomposed is not None and seq_key(decomposed) <= seq_key(instrs):
+            continue
+        if verify_mul_sequence(value, instrs, inputs):
+            table[value] = instrs
+
+    return table
+
+
+# Writes one entry per line, so that regenerated tables diff well.
+def write_mul_table(table: dict[int, tuple[X86_64_Instr, ...]], path: Path):
+    entries = [
+        f'    "{value}": {json.dumps([encode_instr(instr) for instr in instrs])}'
+        for value, instrs in sorted(table.items())
+    ]
+    lines = [
+        "{",
+        f'  "version": {MUL_TABLE_VERSION},',
+        '  "mul": {',
+        ",\n".join(entries),
+        "  }",
+        "}",
+    ]
+
+    path.write_text("\n".join(lines) + "\n")
+
+
+def main():
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else MUL_TABLE_PATH
+
+    start = time.perf_counter()
+    table = build_mul_table()
+    seconds = time.perf_counter() - start
+    write_mul_table(table, path)
+
+    costs = sorted({seq_cost(instrs) for instrs in table.values()})
+    print(f"{len(table)} sequences of cost {costs} in {seconds:.1f} s to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from minic.async_compiler import AsyncCompiler
+from minic.compiler import compile_minic
+from minic.driver import CompileOptions
+
+CODES = [f"a = {idx}\nprint a * 7 + {idx}\n" for idx in range(8)]
+
+
+# Counts the jobs it runs and how many run at once, and holds them until its
+# gate opens. Each job takes at least `duration` seconds.
+class GatedExecutor(ThreadPoolExecutor):
+    def __init__(self, open_gate: bool = True, duration: float = 0.0):
+        super().__init__(max_workers=8)
+        self.duration = duration
+        self.gate = threading.Event()
+        if open_gate:
+            self.gate.set()
+        self.lock = threading.Lock()
+        self.num_jobs = 0
+        self.num_running = 0
+        self.max_running = 0
+
+    def submit(self, fn, /, *args, **kwargs):
+        def run():
+            self.gate.wait()
+            with self.lock:
+                self.num_running += 1
+                self.max_running = max(self.max_running, self.num_running)
+            try:
+                time.sleep(self.duration)
+                return fn(*args, **kwargs)
+            finally:
+                with self.lock:
+                    self.num_running -= 1
+
+        with self.lock:
+            self.num_jobs += 1
+        return super().submit(run)
+
+
+def test_compile_like_the_compiler():
+    async def compile_all():
+        compiler = AsyncCompiler()
+        return await asyncio.gather(*(compiler.compile(code) for code in CODES))
+
+    assert asyncio.run(compile_all()) == [compile_minic(code) for code in CODES]
+
+
+def test_compile_in_a_process_pool():
+    options = CompileOptions(opt_level=2, buffer_output=True)
+
+    async def compile_all():
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            compiler = AsyncCompiler(executor)
+            return await asyncio.gather(
+                *(compiler.compile(code, options) for code in CODES[:3])
+            )
+
+    assert asyncio.run(compile_all()) == [
+        compile_minic(code, buffer_output=True, opt_level=2) for code in CODES[:3]
+    ]
+
+
+def test_raise_compile_errors():
+    async def compile_invalid():
+        await AsyncCompiler().compile("print y\n")
+
+    with pytest.raises(KeyError):
+        asyncio.run(compile_invalid())
+
+
+def test_bound_the_number_of_concurrent_compilations():
+    executor = GatedExecutor()
+
+    async def compile_all():
+        compiler = AsyncCompiler(executor, max_concurrency=2)
+        await asyncio.gather(*(compiler.compile(code) for code in CODES))
+
+    asyncio.run(compile_all())
+    executor.shutdown()
+
+    # Two stages per compilation.
+    assert executor.num_jobs == 2 * len(CODES)
+    assert executor.max_running <= 2
+
+
+def test_bound_concurrency_while_requests_time_out():
+    executor = GatedExecutor(duration=0.3)
+    codes = [f"a = {idx}\nprint a + 1\n" for idx in range(20)]
+
+    async def compile_with_timeout(compiler, code, delay):
+        await asyncio.sleep(delay)
+        with pytest.raises(asyncio.TimeoutError):
+            await compiler.compile(code, timeout=0.05)
+
+    async def compile_all():
+        compiler = AsyncCompiler(executor, max_concurrency=2)
+        await asyncio.gather(
+            *(
+                compile_with_timeout(compiler, code, idx * 0.02)
+                for idx, code in enumerate(codes)
+            )
+        )
+        # Wait for the jobs that were already running.
+        while executor.num_running:
+            await asyncio.sleep(0.05)
+
+    asyncio.run(compile_all())
+    executor.shutdown()
+
+    assert executor.max_running <= 2
+
+
+def test_share_identical_compilations_in_flight():
+    executor = GatedExecutor()
+
+    async def compile_twice():
+        compiler = AsyncCompiler(executor)
+        results = await asyncio.gather(
+            compiler.compile(CODES[0]),
+            compiler.compile(CODES[0]),
+            compiler.compile(CODES[0], CompileOptions(opt_level=0)),
+        )
+        return results, compiler.in_flight
+
+    results, in_flight = asyncio.run(compile_twice())
+    executor.shutdown()
+
+    assert results[0] == results[1] == compile_minic(CODES[0])
+    assert results[2] == compile_minic(CODES[0], opt_level=0)
+    assert executor.num_jobs == 4
+    assert in_flight == {}
+
+
+def test_time_out_and_stop_before_the_next_stage():
+    executor = GatedExecutor(open_gate=False)
+
+    async def compile_with_timeout():
+        compiler = AsyncCompiler(executor)
+        with pytest.raises(asyncio.TimeoutError):
+            await compiler.compile(CODES[0], timeout=0.05)
+        assert compiler.in_flight == {}
+
+        executor.gate.set()
+        await asyncio.sleep(0.1)
+
+    asyncio.run(compile_with_timeout())
+    executor.shutdown()
+
+    assert executor.num_jobs == 1
+
+
+def test_keep_compiling_for_the_remaining_waiters_when_one_cancels():
+    executor = GatedExecutor(open_gate=False)
+
+    async def cancel_one():
+        compiler = AsyncCompiler(executor)
+        cancelled = asyncio.ensure_future(compiler.compile(CODES[0]))
+        waiting = asyncio.ensure_future(compiler.compile(CODES[0]))
+        await asyncio.sleep(0.01)
+
+        cancelled.cancel()
+        await asyncio.sleep(0.01)
+        executor.gate.set()
+
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        return await waiting
+
+    assert asyncio.run(cancel_one()) == compile_minic(CODES[0])
+    executor.shutdown()
@@ -0,0 +1,151 @@
+from hypothesis import given
+from hypothesis import strategies as st
+from minic.compiler import gen_ir_program
+from minic.dataflow import (LIVENESS, REACHING_DEFS, BasicBlock, Cfg,
+                            DataflowProblem, Direction, Meet,
+                            bitset_from_indices, build_cfg, compute_liveness,
+                            compute_reaching_defs, iter_bits, iter_live_after,
+                            measure_register_pressure, regs_in, solve)
+from minic.ir import (BinOp, BinOpInstr, LoadLiteralInstr, LoadRegInstr,
+                      PrintInstr, Program, Reg)
+
+
+def bits(*indices: int) -> int:
+    return bitset_from_indices(indices, 64)
+
+
+@given(st.sets(st.integers(min_value=0, max_value=5000)))
+def test_bitset_round_trips_indices(indices):
+    bitset = bitset_from_indices(indices, 5001)
+
+    assert bitset == sum(1 << idx for idx in indices)
+    assert list(iter_bits(bitset)) == sorted(indices)
+
+
+def test_straight_line_program_is_one_block():
+    program = gen_ir_program("a = 1\nprint a + 2\n")
+
+    cfg = build_cfg(program)
+
+    assert len(cfg.blocks) == 1
+    assert cfg.blocks[0].instructions == program.instructions
+
+
+def test_nothing_is_live_across_a_whole_program():
+    result = compute_liveness(gen_ir_program("a = 1\nb = a * 3\nprint b\n"))
+
+    assert result.in_facts == [0]
+    assert result.out_facts == [0]
+
+
+def test_live_registers_after_each_instruction():
+    program = Program(
+        instructions=[
+            LoadLiteralInstr(Reg(0), 1),
+            LoadLiteralInstr(Reg(1), 2),
+            BinOpInstr(Reg(2), BinOp.Add, Reg(0), Reg(1)),
+            LoadRegInstr(Reg(3), Reg(0)),
+            PrintInstr(Reg(2)),
+        ]
+    )
+    cfg = build_cfg(program)
+
+    live_after = [
+        live.regs() for _, live in iter_live_after(cfg.blocks[0], 0, cfg.num_regs)
+    ]
+
+    assert live_after[::-1] == [
+        {Reg(0)},
+        {Reg(0), Reg(1)},
+        {Reg(0), Reg(2)},
+        {Reg(2)},
+        set(),
+    ]
+
+
+def test_count_registers_live_at_the_end_of_a_block():
+    block = BasicBlock([BinOpInstr(Reg(2), BinOp.Add, Reg(0), Reg(1))])
+
+    walk = iter_live_after(block, bits(2, 5), 6)
+
+    _, live = next(walk)
+    assert live.regs() == {Reg(2), Reg(5)}
+    assert live.count == 2
+
+    assert list(walk) == []
+    assert live.regs() == {Reg(0), Reg(1), Reg(5)}
+    assert live.count == 3
+
+
+def test_all_definitions_reach_the_end_of_a_program():
+    result = compute_reaching_defs(gen_ir_program("a = 1\nprint a + 2\n"))
+
+    assert regs_in(result.out_facts[0]) == {Reg(0), Reg(1), Reg(2), Reg(3)}
+
+
+def loop_cfg() -> Cfg:
+    # 0: r0 = 1
+    # 1: print r0; r1 = r0 + r0    (loops back to itself, then exits to 2)
+    # 2: print r1
+    return Cfg(
+        blocks=[
+            BasicBlock([LoadLiteralInstr(Reg(0), 1)], succs=[1]),
+            BasicBlock(
+                [PrintInstr(Reg(0)), BinOpInstr(Reg(1), BinOp.Add, Reg(0), Reg(0))],
+                succs=[1, 2],
+            ),
+            BasicBlock([PrintInstr(Reg(1))]),
+        ],
+        num_regs=2,
+    )
+
+
+def test_liveness_around_a_loop():
+    result = solve(loop_cfg(), LIVENESS)
+
+    assert result.in_facts == [bits(), bits(0), bits(1)]
+    assert result.out_facts == [bits(0), bits(0, 1), bits()]
+
+
+def test_reaching_definitions_around_a_loop():
+    result = solve(loop_cfg(), REACHING_DEFS)
+
+    assert result.in_facts == [bits(), bits(0, 1), bits(0, 1)]
+
+
+def test_intersection_meet_keeps_facts_on_every_path():
+    # Registers defined on every path to a block, with 0 -> {1, 2} -> 3.
+    cfg = Cfg(
+        blocks=[
+            BasicBlock([LoadLiteralInstr(Reg(0), 1)], succs=[1, 2]),
+            BasicBlock([LoadLiteralInstr(Reg(1), 2)], succs=[3]),
+            BasicBlock([LoadLiteralInstr(Reg(2), 3)], succs=[3]),
+            BasicBlock([PrintInstr(Reg(0))]),
+        ],
+        num_regs=3,
+    )
+    must_defs = DataflowProblem(
+        Direction.Forward, Meet.Intersection, REACHING_DEFS.gen_kill
+    )
+
+    result = solve(cfg, must_defs)
+
+    assert result.in_facts[3] == bits(0)
+
+
+def test_measure_register_pressure():
+    program = Program(
+        instructions=[
+            LoadLiteralInstr(Reg(0), 1),
+            LoadLiteralInstr(Reg(1), 2),
+            LoadLiteralInstr(Reg(2), 3),
+            BinOpInstr(Reg(3), BinOp.Add, Reg(1), Reg(2)),
+            BinOpInstr(Reg(4), BinOp.Add, Reg(0), Reg(3)),
+            PrintInstr(Reg(4)),
+        ]
+    )
+
+    pressure = measure_register_pressure(program, num_machine_regs=2)
+
+    assert pressure.peak == 3
+    assert pressure.spills == 1
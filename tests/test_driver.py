@@ -0,0 +1,118 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from minic.atomic import atomic_output
+from minic.compiler import compile_minic, compile_minic_object
+from minic.driver import (CompileOptions, compile_files, compile_source,
+                          expand_paths)
+from minic.ir_serial import IR_SUFFIX
+
+CODES = [f"a = {idx}\nprint a * 7 + {idx}\n" for idx in range(6)]
+
+
+def write_sources(tmp_path, codes):
+    paths = []
+    for idx, code in enumerate(codes):
+        path = tmp_path / f"file{idx}.mc"
+        path.write_text(code)
+        paths.append(path)
+
+    return paths
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_compile_files_to_assembly_next_to_them(tmp_path, jobs):
+    paths = write_sources(tmp_path, CODES)
+
+    results = compile_files(paths, CompileOptions(), jobs=jobs)
+
+    assert [result.path for result in results] == paths
+    for result, code in zip(results, CODES):
+        assert result.error is None
+        assert result.out_path == result.path.with_suffix(".S")
+        assert result.out_path.read_text() == compile_minic(code)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        CompileOptions(opt_level=0, freestanding=True),
+        CompileOptions(buffer_output=True),
+        CompileOptions(opt_level=2, avx2=True),
+    ],
+)
+def test_compile_source_like_the_compiler(options):
+    assert compile_source(CODES[0], options) == compile_minic(
+        CODES[0],
+        buffer_output=options.buffer_output,
+        freestanding=options.freestanding,
+        opt_level=options.opt_level,
+        avx2=options.avx2,
+    )
+
+
+def test_compile_files_to_objects_and_ir(tmp_path):
+    paths = write_sources(tmp_path, CODES[:2])
+
+    obj_results = compile_files(paths, CompileOptions(emit_obj=True), jobs=2)
+    ir_results = compile_files(paths, CompileOptions(emit_ir=True), jobs=2)
+
+    assert obj_results[0].out_path.read_bytes() == compile_minic_object(CODES[0])
+    assert [result.out_path.suffix for result in ir_results] == [IR_SUFFIX] * 2
+
+
+def test_report_failures_without_stopping_the_batch(tmp_path):
+    paths = write_sources(tmp_path, [CODES[0], "x = \n", "print y\n", CODES[1]])
+    paths.append(tmp_path / "missing.mc")
+
+    results = compile_files(paths, CompileOptions(), jobs=2)
+
+    assert [result.error is None for result in results] == [
+        True,
+        False,
+        False,
+        True,
+        False,
+    ]
+    assert results[2].error == "KeyError: 'y'"
+    assert results[4].error.startswith("FileNotFoundError")
+    assert results[3].out_path.exists()
+
+
+def test_leave_no_partial_output_behind(tmp_path):
+    path = tmp_path / "out.S"
+    path.write_text("old\n")
+
+    with pytest.raises(RuntimeError):
+        with atomic_output(path) as out_file:
+            out_file.write(b"partial")
+            raise RuntimeError()
+
+    assert path.read_text() == "old\n"
+    assert os.listdir(tmp_path) == ["out.S"]
+
+    with atomic_output(path) as out_file:
+        out_file.write(b"new\n")
+
+    assert path.read_text() == "new\n"
+    assert os.listdir(tmp_path) == ["out.S"]
+
+    # Outputs get the permissions of files written without atomic_output.
+    (tmp_path / "plain.S").write_text("")
+    assert path.stat().st_mode == (tmp_path / "plain.S").stat().st_mode
+
+
+def test_expand_glob_patterns(tmp_path):
+    paths = write_sources(tmp_path, CODES[:3])
+    (tmp_path / "sub").mkdir()
+    nested = tmp_path / "sub" / "nested.mc"
+    nested.write_text(CODES[0])
+
+    expanded, unmatched = expand_paths(
+        [f"{tmp_path}/*.mc", f"{tmp_path}/**/nested.mc", "plain.mc", "*.none"]
+    )
+
+    assert expanded == [*paths, nested, Path("plain.mc")]
+    assert unmatched == ["*.none"]
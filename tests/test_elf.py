@@ -0,0 +1,44 @@
+import shutil
+import struct
+import subprocess
+
+import pytest
+from minic.compiler import compile_minic_object
+from minic.elf import EM_X86_64, ET_REL, write_elf_object
+from minic.x86_64 import X86_64_Program
+
+
+def test_write_relocatable_x86_64_object():
+    obj = compile_minic_object("print 42\n")
+
+    ident, e_type, e_machine = struct.unpack_from("<16sHH", obj)
+
+    assert ident[:4] == b"\x7fELF"
+    assert ident[4:6] == bytes([2, 1])
+    assert (e_type, e_machine) == (ET_REL, EM_X86_64)
+    assert b"main\0" in obj
+    assert b"42\n" in obj
+
+
+def test_reject_freestanding_programs():
+    with pytest.raises(NotImplementedError):
+        write_elf_object(X86_64_Program(instructions=[], freestanding=True))
+
+
+@pytest.mark.skipif(shutil.which("cc") is None, reason="needs a C toolchain")
+def test_link_and_run_object(tmp_path):
+    code = """
+    a = 7
+    b = a * 10 - 3
+    print b
+    print b / 4
+    print 0 - b
+    """
+    obj_path = tmp_path / "prog.o"
+    exe_path = tmp_path / "prog"
+    obj_path.write_bytes(compile_minic_object(code, buffer_output=True))
+
+    subprocess.run(["cc", "-o", exe_path, obj_path], check=True)
+    result = subprocess.run([exe_path], capture_output=True, check=True)
+
+    assert result.stdout == b"67\n16\n-67\n"
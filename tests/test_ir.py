@@ -0,0 +1,24 @@
+from minic.ir import BinOp, eval_bin_op, wrap_int64
+
+
+def test_wrap_int64():
+    assert wrap_int64(2**63) == -(2**63)
+    assert wrap_int64(-(2**63) - 1) == 2**63 - 1
+    assert wrap_int64(42) == 42
+
+
+def test_eval_bin_op_wraps_around():
+    assert eval_bin_op(BinOp.Add, 2**63 - 1, 1) == -(2**63)
+    assert eval_bin_op(BinOp.Sub, -(2**63), 1) == 2**63 - 1
+    assert eval_bin_op(BinOp.Mul, 2**32, 2**32) == 0
+
+
+def test_eval_bin_op_truncates_division_toward_zero():
+    assert eval_bin_op(BinOp.Div, 7, 2) == 3
+    assert eval_bin_op(BinOp.Div, -7, 2) == -3
+    assert eval_bin_op(BinOp.Div, 7, -2) == -3
+    assert eval_bin_op(BinOp.Div, -7, -2) == 3
+
+
+def test_eval_bin_op_subtracts_right_from_left():
+    assert eval_bin_op(BinOp.Sub, 15, 20) == -5
@@ -0,0 +1,93 @@
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+from minic.compiler import run_minic
+from minic.ir import INT64_MAX, INT64_MIN, BinOp, eval_bin_op
+
+np = pytest.importorskip("numpy")
+
+from minic.ir_batch import eval_bin_op_columns, eval_minic_batch
+
+int64s = st.integers(min_value=INT64_MIN, max_value=INT64_MAX)
+
+
+def test_eval_one_output_array_per_print():
+    code = """
+    x = 0
+    y = x * 3 - 1
+    print y
+    print y / 2
+    print 42
+    """
+    xs = np.array([0, 1, 2, -5], dtype=np.int64)
+
+    outputs = eval_minic_batch(code, {"x": xs})
+
+    assert len(outputs) == 3
+    assert outputs[0].tolist() == [-1, 2, 5, -16]
+    assert outputs[1].tolist() == [0, 1, 2, -8]
+    assert outputs[2].tolist() == [42] * 4
+
+
+def test_bind_only_the_first_assignment():
+    code = "a = 1\nprint a\na = a + 10\nprint a\n"
+
+    outputs = eval_minic_batch(code, {"a": np.array([5, 6], dtype=np.int64)})
+
+    assert [output.tolist() for output in outputs] == [[5, 6], [15, 16]]
+
+
+def minic_literal(value: int) -> str:
+    return str(value) if value >= 0 else f"(0 - {-value})"
+
+
+def test_match_scalar_runs_for_each_row():
+    code = "c = a * b + 7\nprint c / (b - 3)\nprint c - a\n"
+    rows = [(1, 2), (-4, 9), (100, -100)]
+    a_values = np.array([a for a, _ in rows], dtype=np.int64)
+    b_values = np.array([b for _, b in rows], dtype=np.int64)
+
+    outputs = eval_minic_batch("a = 0\nb = 0\n" + code, {"a": a_values, "b": b_values})
+
+    for idx, (a, b) in enumerate(rows):
+        scalar_code = f"a = {minic_literal(a)}\nb = {minic_literal(b)}\n" + code
+
+        assert [f"{output[idx]}\n" for output in outputs] == run_minic(
+            scalar_code
+        ).splitlines(keepends=True)
+
+
+def test_division_by_zero_in_any_row_raises():
+    with pytest.raises(ZeroDivisionError):
+        eval_minic_batch("a = 1\nprint 10 / a\n", {"a": np.array([1, 0])})
+
+
+def test_reject_unknown_variables():
+    with pytest.raises(ValueError):
+        eval_minic_batch("print 1\n", {"a": np.array([1], dtype=np.int64)})
+
+
+def test_reject_arrays_of_different_lengths():
+    with pytest.raises(ValueError):
+        eval_minic_batch(
+            "a = 1\nb = 2\nprint a + b\n",
+            {
+                "a": np.array([1], dtype=np.int64),
+                "b": np.array([1, 2], dtype=np.int64),
+            },
+        )
+
+
+@given(
+    op=st.sampled_from(BinOp),
+    pairs=st.lists(st.tuples(int64s, int64s), min_size=1, max_size=20),
+)
+def test_eval_bin_op_columns_matches_eval_bin_op(op, pairs):
+    if op == BinOp.Div:
+        pairs = [(left, right) for left, right in pairs if right != 0]
+    left = np.array([left for left, _ in pairs], dtype=np.int64)
+    right = np.array([right for _, right in pairs], dtype=np.int64)
+
+    result = eval_bin_op_columns(op, left, right)
+
+    assert result.tolist() == [eval_bin_op(op, *pair) for pair in pairs]
@@ -0,0 +1,55 @@
+from hypothesis import given
+from hypothesis import strategies as st
+from minic.compiler import gen_ir_program
+from minic.ir import (INT64_MAX, BinOp, BinOpInstr, LoadLiteralInstr,
+                      LoadRegInstr, PrintInstr, Program, Reg)
+from minic.ir_compact import (NO_REG, OP_LOAD_LITERAL, OP_MUL, OP_PRINT,
+                              compact_program, expand_program)
+
+
+def test_store_instructions_in_parallel_arrays():
+    program = Program(
+        instructions=[
+            LoadLiteralInstr(Reg(0), 6),
+            BinOpInstr(Reg(1), BinOp.Mul, Reg(0), Reg(0)),
+            PrintInstr(Reg(1)),
+        ]
+    )
+
+    compact = compact_program(program)
+
+    assert len(compact) == 3
+    assert list(compact) == [
+        (OP_LOAD_LITERAL, 0, NO_REG, NO_REG, 6),
+        (OP_MUL, 1, 0, 0, 0),
+        (OP_PRINT, NO_REG, 1, NO_REG, 0),
+    ]
+    assert compact.nbytes() == 3 * (1 + 4 + 4 + 4 + 8)
+
+
+def test_wrap_literals_to_int64():
+    program = Program(instructions=[LoadLiteralInstr(Reg(0), 2**63)])
+
+    assert list(compact_program(program).imms) == [-(2**63)]
+
+
+def test_round_trip_generated_program():
+    program = gen_ir_program("a = 3\nb = a * 7 - a / 2\nprint b + a\nc = b\n")
+
+    assert expand_program(compact_program(program)) == program
+
+
+regs = st.builds(Reg, st.integers(min_value=0, max_value=2**31 - 1))
+instrs = st.one_of(
+    st.builds(LoadLiteralInstr, regs, st.integers(min_value=0, max_value=INT64_MAX)),
+    st.builds(LoadRegInstr, regs, regs),
+    st.builds(BinOpInstr, regs, st.sampled_from(BinOp), regs, regs),
+    st.builds(PrintInstr, regs),
+)
+
+
+@given(st.lists(instrs))
+def test_round_trip_any_program(instructions):
+    program = Program(instructions=instructions)
+
+    assert expand_program(compact_program(program)) == program
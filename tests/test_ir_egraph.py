@@ -0,0 +1,170 @@
+from hypothesis import given, settings
+from hypothesis import strategies as st
+from minic.compiler import gen_unoptimized_ir_program, run_minic
+from minic.ir import BinOp, BinOpInstr, LoadLiteralInstr, PrintInstr
+from minic.ir_egraph import (
+    EGraph,
+    LiteralNode,
+    OpNode,
+    program_cost,
+    rewrite_with_egraph,
+    saturate,
+)
+from minic.ir_eval import run_ir
+from minic.ir_opt import eliminate_common_subexprs
+
+
+# Operands divided by one aren't literals, so that the rewrites have to apply
+# to them as unknown values.
+def gen_ir(code: str):
+    return eliminate_common_subexprs(gen_unoptimized_ir_program(code))
+
+
+def count_ops(program, op: BinOp) -> int:
+    return sum(
+        isinstance(instr, BinOpInstr) and instr.op == op
+        for instr in program.instructions
+    )
+
+
+def test_factor_out_a_common_multiplicand():
+    program = gen_ir("a = 7 / 1\nb = 5 / 1\nc = 3 / 1\nprint a * b + a * c\n")
+
+    rewritten = rewrite_with_egraph(program)
+
+    assert count_ops(program, BinOp.Mul) == 2
+    assert count_ops(rewritten, BinOp.Mul) == 1
+    assert run_ir(rewritten) == run_ir(program) == "56\n"
+
+
+def test_cancel_an_addition_and_a_subtraction():
+    program = gen_ir("a = 7 / 1\nb = 5 / 1\nprint (a + b) - b\n")
+
+    rewritten = rewrite_with_egraph(program)
+
+    assert count_ops(rewritten, BinOp.Add) == 0
+    assert count_ops(rewritten, BinOp.Sub) == 0
+    assert run_ir(rewritten) == "7\n"
+
+
+def test_combine_multiplications_by_literals():
+    program = gen_ir("a = 7 / 1\nx = a * 9 - a\nprint x + x\n")
+
+    rewritten = rewrite_with_egraph(program)
+
+    assert count_ops(rewritten, BinOp.Mul) == 1
+    assert any(
+        isinstance(instr, LoadLiteralInstr) and instr.value == 16
+        for instr in rewritten.instructions
+    )
+    assert run_ir(rewritten) == "112\n"
+
+
+def test_saturate_a_small_egraph():
+    egraph = EGraph()
+    a = egraph.add(
+        OpNode(BinOp.Div, egraph.add(LiteralNode(7)), egraph.add(LiteralNode(1)))
+    )
+    zero = egraph.add(LiteralNode(0))
+    a_plus_zero = egraph.add(OpNode(BinOp.Add, zero, a))
+
+    saturate(egraph, node_limit=100, iteration_limit=4, match_limit=100, time_limit=1.0)
+
+    assert egraph.find(a_plus_zero) == egraph.find(a)
+
+
+def test_stay_correct_at_a_small_node_limit():
+    program = gen_ir(
+        "a = 2 / 1\nb = 3 / 1\nc = 4 / 1\nx = (a + b) * (b + c) * (c + a)\n"
+        "print x * (a + b + c)\n"
+    )
+    rewritten = rewrite_with_egraph(program, node_limit=50)
+
+    assert run_ir(rewritten) == run_ir(program)
+
+
+def test_leave_the_program_unchanged_at_the_time_limit():
+    program = gen_ir("a = 7 / 1\nb = 5 / 1\nc = 3 / 1\nprint a * b + a * c\n")
+
+    assert rewrite_with_egraph(program, time_limit=0.0) is program
+
+
+def test_stop_at_the_match_limit():
+    program = gen_ir(
+        "a = 2 / 1\nb = 3 / 1\nc = 4 / 1\nx = (a + b) * (b + c) * (c + a)\n"
+        "print x * (a + b + c)\n"
+    )
+    rewritten = rewrite_with_egraph(program, match_limit=5)
+
+    assert (
+        rewritten.instructions
+        == rewrite_with_egraph(program, match_limit=5).instructions
+    )
+    assert run_ir(rewritten) == run_ir(program)
+
+
+def test_keep_divisions_that_may_trap_after_earlier_prints():
+    program = gen_ir("a = 7 / 1\nprint a + 0\nprint a / 0\nprint a * 1\n")
+
+    instrs = rewrite_with_egraph(program).instructions
+    print_idxs = [
+        idx for idx, instr in enumerate(instrs) if isinstance(instr, PrintInstr)
+    ]
+    div_by_zero_idx = max(
+        idx
+        for idx, instr in enumerate(instrs)
+        if isinstance(instr, BinOpInstr) and instr.op == BinOp.Div
+    )
+
+    assert len(print_idxs) == 3
+    assert print_idxs[0] < div_by_zero_idx < print_idxs[1]
+
+
+def test_leave_programs_without_cheaper_forms_unchanged():
+    program = rewrite_with_egraph(gen_ir("a = 7 / 1\nprint a + 1\n"))
+
+    assert rewrite_with_egraph(program) is program
+
+
+def test_rewritten_programs_cost_less():
+    program = gen_ir("a = 7 / 1\nb = 5 / 1\nx = a * b + b * a\nprint x - x + x\n")
+
+    assert program_cost(rewrite_with_egraph(program)) < program_cost(program)
+
+
+st_operands = st.sampled_from(["a", "b", "c"]) | st.integers(
+    min_value=0, max_value=2**62
+).map(str)
+
+st_exprs = st.recursive(
+    st_operands,
+    lambda inner: st.one_of(
+        st.tuples(inner, st.sampled_from("+-*"), inner).map(
+            lambda parts: f"({parts[0]} {parts[1]} {parts[2]})"
+        ),
+        # Only divide by nonzero literals, so that programs don't trap.
+        st.tuples(inner, st.sampled_from(["1", "3", "(0 - 7)"])).map(
+            lambda parts: f"({parts[0]} / {parts[1]})"
+        ),
+    ),
+    max_leaves=8,
+)
+
+
+@given(
+    literals=st.lists(
+        st.integers(min_value=0, max_value=2**62), min_size=3, max_size=3
+    ),
+    exprs=st.lists(st_exprs, min_size=1, max_size=6),
+)
+@settings(max_examples=25, deadline=None)
+def test_match_ir_semantics(literals, exprs):
+    lines = [f"{name} = {value} / 1" for name, value in zip("abc", literals)]
+    for idx, expr in enumerate(exprs):
+        name = "abc"[idx % 3]
+        lines += [f"{name} = {expr}", f"print {name}"]
+    code = "\n".join(lines) + "\n"
+
+    rewritten = rewrite_with_egraph(gen_ir(code), node_limit=2000)
+
+    assert run_ir(rewritten) == run_minic(code, opt_level=0)
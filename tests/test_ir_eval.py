@@ -0,0 +1,58 @@
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+from minic.compiler import gen_ir_program, run_minic
+from minic.ir import (INT64_MAX, INT64_MIN, BinOp, BinOpInstr,
+                      LoadLiteralInstr, PrintInstr, Program, Reg, eval_bin_op)
+from minic.ir_eval import compile_ir, run_ir
+
+int64s = st.integers(min_value=INT64_MIN, max_value=INT64_MAX)
+
+
+def bin_op_program(op: BinOp, left: int, right: int) -> Program:
+    return Program(
+        instructions=[
+            LoadLiteralInstr(Reg(0), left),
+            LoadLiteralInstr(Reg(1), right),
+            BinOpInstr(Reg(2), op, Reg(0), Reg(1)),
+            PrintInstr(Reg(2)),
+        ]
+    )
+
+
+def test_run_program():
+    code = """
+    a = 7
+    b = a * 10 - 3
+    print b
+    print b / 4
+    print 0 - b
+    """
+
+    assert run_minic(code) == "67\n16\n-67\n"
+
+
+def test_run_empty_program():
+    assert run_ir(Program(instructions=[])) == ""
+
+
+def test_compiled_program_can_run_again():
+    compiled = compile_ir(gen_ir_program("a = 2\nprint a * a\n"))
+
+    assert compiled.run() == compiled.run() == "4\n"
+
+
+def test_division_by_zero_raises():
+    with pytest.raises(ZeroDivisionError):
+        run_ir(bin_op_program(BinOp.Div, 1, 0))
+
+
+@given(op=st.sampled_from(BinOp), left=int64s, right=int64s)
+def test_match_eval_bin_op(op, left, right):
+    program = bin_op_program(op, left, right)
+
+    if op == BinOp.Div and right == 0:
+        with pytest.raises(ZeroDivisionError):
+            run_ir(program)
+    else:
+        assert run_ir(program) == f"{eval_bin_op(op, left, right)}\n"
@@ -291,12 +291,51 @@ def test_do_not_eliminate_common_subexpressions_when_var_changes():
     ]
 
 
-def _gen_ir(code: str):
+def test_generate_the_operand_that_needs_more_registers_first():
+    code = """
+    print 1 - (2 * 3)
+    """
+
+    program = _gen_ir(code, sethi_ullman=True)
+
+    assert program.instructions == [
+        # 2 * 3
+        LoadLiteralInstr(out_reg=Reg(0), value=2),
+        LoadLiteralInstr(out_reg=Reg(1), value=3),
+        BinOpInstr(
+            out_reg=Reg(2),
+            op=BinOp.Mul,
+            left_reg=Reg(0),
+            right_reg=Reg(1),
+        ),
+        # 1 - (2 * 3)
+        LoadLiteralInstr(out_reg=Reg(3), value=1),
+        BinOpInstr(
+            out_reg=Reg(4),
+            op=BinOp.Sub,
+            left_reg=Reg(3),
+            right_reg=Reg(2),
+        ),
+        PrintInstr(arg_reg=Reg(4)),
+    ]
+
+
+def test_generate_left_operand_first_when_needs_are_equal():
+    code = """
+    print (1 + 2) / (3 + 4)
+    """
+
+    with_sethi_ullman = _gen_ir(code, sethi_ullman=True)
+
+    assert with_sethi_ullman.instructions == _gen_ir(code).instructions
+
+
+def _gen_ir(code: str, **ir_gen_options):
     from minic.parser import Parser
     from minic.scanner import Scanner
 
     scanner = Scanner(code)
     parser = Parser(scanner=scanner)
-    ir_gen = IrGen(parser.parse_program())
+    ir_gen = IrGen(parser.parse_program(), **ir_gen_options)
 
     return ir_gen.gen_program()
@@ -0,0 +1,135 @@
+from minic.compiler import gen_unoptimized_ir_program
+from minic.ir import (INT64_MIN, BinOp, BinOpInstr, LoadLiteralInstr,
+                      LoadRegInstr, PrintInstr, Program, Reg)
+from minic.ir_gen import IrGen
+from minic.ir_opt import (compute_ssa, eliminate_common_subexprs,
+                          eliminate_dead_code, fold_constants,
+                          propagate_copies)
+from minic.parser import Parser
+from minic.scanner import Scanner
+
+
+def test_cse_matches_interning_in_ir_gen():
+    code = """
+    a = 2
+    b = 2
+    c = a * b + a * b
+    a = 3
+    print a * b
+    print c / 2
+    """
+    interned = IrGen(Parser(Scanner(code)).parse_program()).gen_program()
+
+    program = eliminate_common_subexprs(gen_unoptimized_ir_program(code))
+
+    assert len(program.instructions) == len(interned.instructions)
+    assert [type(instr) for instr in program.instructions] == [
+        type(instr) for instr in interned.instructions
+    ]
+
+
+def test_cse_reuses_first_register_of_a_term():
+    program = Program(
+        instructions=[
+            LoadLiteralInstr(Reg(0), 5),
+            LoadLiteralInstr(Reg(1), 5),
+            BinOpInstr(Reg(2), BinOp.Add, Reg(0), Reg(1)),
+            BinOpInstr(Reg(3), BinOp.Add, Reg(1), Reg(0)),
+            PrintInstr(Reg(3)),
+        ]
+    )
+
+    assert eliminate_common_subexprs(program).instructions == [
+        LoadLiteralInstr(Reg(0), 5),
+        BinOpInstr(Reg(2), BinOp.Add, Reg(0), Reg(0)),
+        PrintInstr(Reg(2)),
+    ]
+
+
+def test_passes_return_the_same_program_when_nothing_changes():
+    program = Program(
+        instructions=[
+            LoadLiteralInstr(Reg(0), 5),
+            PrintInstr(Reg(0)),
+        ]
+    )
+    ssa = compute_ssa(program)
+
+    assert eliminate_common_subexprs(program) is program
+    assert propagate_copies(program, ssa) is program
+    assert fold_constants(program, ssa) is program
+    assert eliminate_dead_code(program, ssa) is program
+
+
+def test_propagate_copies_reads_the_original_register():
+    program = Program(
+        instructions=[
+            LoadLiteralInstr(Reg(0), 5),
+            LoadRegInstr(Reg(1), Reg(0)),
+            LoadRegInstr(Reg(2), Reg(1)),
+            PrintInstr(Reg(2)),
+        ]
+    )
+
+    assert propagate_copies(program, compute_ssa(program)).instructions == [
+        LoadLiteralInstr(Reg(0), 5),
+        LoadRegInstr(Reg(1), Reg(0)),
+        LoadRegInstr(Reg(2), Reg(0)),
+        PrintInstr(Reg(0)),
+    ]
+
+
+def test_fold_constants_keeps_trapping_divisions():
+    program = Program(
+        instructions=[
+            LoadLiteralInstr(Reg(0), INT64_MIN),
+            LoadLiteralInstr(Reg(1), -1),
+            LoadLiteralInstr(Reg(2), 0),
+            BinOpInstr(Reg(3), BinOp.Div, Reg(0), Reg(1)),
+            BinOpInstr(Reg(4), BinOp.Div, Reg(1), Reg(2)),
+            BinOpInstr(Reg(5), BinOp.Mul, Reg(0), Reg(1)),
+        ]
+    )
+
+    assert fold_constants(program, compute_ssa(program)).instructions == [
+        *program.instructions[:5],
+        LoadLiteralInstr(Reg(5), INT64_MIN),
+    ]
+
+
+def test_dead_code_elimination_removes_unread_chains():
+    program = Program(
+        instructions=[
+            LoadLiteralInstr(Reg(0), 5),
+            LoadLiteralInstr(Reg(1), 0),
+            BinOpInstr(Reg(2), BinOp.Mul, Reg(0), Reg(0)),
+            LoadRegInstr(Reg(3), Reg(2)),
+            BinOpInstr(Reg(4), BinOp.Div, Reg(0), Reg(1)),
+            PrintInstr(Reg(0)),
+        ]
+    )
+
+    assert eliminate_dead_code(program, compute_ssa(program)).instructions == [
+        LoadLiteralInstr(Reg(0), 5),
+        LoadLiteralInstr(Reg(1), 0),
+        BinOpInstr(Reg(4), BinOp.Div, Reg(0), Reg(1)),
+        PrintInstr(Reg(0)),
+    ]
+
+
+def test_fold_constants_through_chains_of_operations():
+    program = Program(
+        instructions=[
+            LoadLiteralInstr(Reg(0), 6),
+            LoadLiteralInstr(Reg(1), 7),
+            BinOpInstr(Reg(2), BinOp.Mul, Reg(0), Reg(1)),
+            BinOpInstr(Reg(3), BinOp.Sub, Reg(2), Reg(0)),
+            PrintInstr(Reg(3)),
+        ]
+    )
+
+    assert fold_constants(program, compute_ssa(program)).instructions[2:] == [
+        LoadLiteralInstr(Reg(2), 42),
+        LoadLiteralInstr(Reg(3), 36),
+        PrintInstr(Reg(3)),
+    ]
@@ -0,0 +1,117 @@
+from hypothesis import given
+from hypothesis import strategies as st
+from minic.compiler import gen_ir_program, run_minic
+from minic.ir import (INT64_MAX, INT64_MIN, BinOp, BinOpInstr,
+                      LoadLiteralInstr, PrintInstr, Program, Reg)
+from minic.ir_eval import run_ir
+from minic.ir_reassociate import reassociate
+from minic.pass_manager import PassManager, Pipeline
+
+int64s = st.integers(min_value=INT64_MIN, max_value=INT64_MAX)
+
+
+def chain_program(op: BinOp, values: list[int], literal_idxs: set[int]):
+    # Values not in `literal_idxs` come from a division by one, so that they
+    # aren't literals to the pass.
+    instrs = [LoadLiteralInstr(Reg(0), 1)]
+    regs = []
+
+    for value in values:
+        reg = Reg(len(instrs))
+        instrs.append(LoadLiteralInstr(reg, value))
+        if len(regs) not in literal_idxs:
+            instrs.append(BinOpInstr(Reg(len(instrs)), BinOp.Div, reg, Reg(0)))
+            reg = instrs[-1].out_reg
+        regs.append(reg)
+
+    acc = regs[0]
+    for reg in regs[1:]:
+        instrs.append(BinOpInstr(Reg(len(instrs)), op, acc, reg))
+        acc = instrs[-1].out_reg
+
+    instrs.append(PrintInstr(acc))
+
+    return Program(instructions=instrs)
+
+
+def tree_height(program: Program, reg: Reg) -> int:
+    def_by_reg = {
+        instr.out_reg: instr
+        for instr in program.instructions
+        if isinstance(instr, BinOpInstr)
+    }
+
+    def height(reg: Reg) -> int:
+        instr = def_by_reg.get(reg)
+        if instr is None or instr.op == BinOp.Div:
+            return 0
+        return 1 + max(height(instr.left_reg), height(instr.right_reg))
+
+    return height(reg)
+
+
+def test_balance_a_chain_of_additions():
+    program = chain_program(BinOp.Add, list(range(8)), literal_idxs=set())
+    printed = program.instructions[-1].arg_reg
+
+    reassociated = reassociate(program)
+
+    assert tree_height(program, printed) == 7
+    assert tree_height(reassociated, printed) == 3
+    assert run_ir(reassociated) == run_ir(program) == "28\n"
+
+
+def test_group_literals_into_one_operand():
+    program = chain_program(BinOp.Mul, [2, 3, 5, 7], literal_idxs={1, 3})
+
+    reassociated = reassociate(program)
+
+    assert reassociated.instructions[-4:] == [
+        BinOpInstr(Reg(10), BinOp.Mul, Reg(5), Reg(2)),
+        LoadLiteralInstr(Reg(11), 21),
+        BinOpInstr(Reg(9), BinOp.Mul, Reg(10), Reg(11)),
+        PrintInstr(Reg(9)),
+    ]
+    assert run_ir(reassociated) == "210\n"
+
+
+def test_leave_short_chains_alone():
+    program = chain_program(BinOp.Add, [1, 2], literal_idxs=set())
+
+    assert reassociate(program) is program
+
+
+def test_keep_shared_subexpressions():
+    code = """
+    a = 1
+    b = 2
+    c = a + b
+    print c + a + b
+    print c
+    """
+    pipeline = Pipeline(
+        ir_passes=("reassociate",), codegen_options={}, machine_passes=()
+    )
+    pass_manager = PassManager()
+    pass_manager.pipeline = pipeline
+
+    program = pass_manager.run_ir_passes(gen_ir_program(code, opt_level=0))
+
+    assert run_ir(program) == "6\n3\n"
+
+
+def test_reassociate_at_o2():
+    code = "a = 7\nb = 0 - 1\nc = a / b\nprint c + a + b + 3 + c * 2 * a\n"
+
+    assert run_minic(code, opt_level=2) == run_minic(code, opt_level=0)
+
+
+@given(
+    op=st.sampled_from([BinOp.Add, BinOp.Mul]),
+    values=st.lists(int64s, min_size=1, max_size=12),
+    literal_idxs=st.sets(st.integers(min_value=0, max_value=11)),
+)
+def test_preserve_wraparound_results(op, values, literal_idxs):
+    program = chain_program(op, values, literal_idxs)
+
+    assert run_ir(reassociate(program)) == run_ir(program)
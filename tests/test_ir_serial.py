@@ -0,0 +1,73 @@
+import io
+
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+from minic.compiler import gen_ir_program
+from minic.ir import (BinOp, BinOpInstr, LoadLiteralInstr, LoadRegInstr,
+                      PrintInstr, Program, Reg)
+from minic.ir_serial import MAGIC, VERSION, iter_ir, read_ir, write_ir
+
+
+# Returns at most one byte per read, like a slow pipe.
+class TrickleStream(io.BytesIO):
+    def read(self, size=-1):
+        return super().read(1)
+
+
+def serialize(program: Program) -> bytes:
+    stream = io.BytesIO()
+    write_ir(program.instructions, stream)
+    return stream.getvalue()
+
+
+def test_serialize_with_header_and_end_marker():
+    program = Program(instructions=[LoadLiteralInstr(Reg(0), 5), PrintInstr(Reg(0))])
+
+    assert serialize(program) == MAGIC + bytes([VERSION, 0, 0, 10, 6, 0, 0x7F])
+
+
+def test_round_trip_generated_program():
+    program = gen_ir_program("a = 3\nb = a * 7 - a / 2\nprint b + a\nc = b\n")
+
+    assert read_ir(io.BytesIO(serialize(program))) == program
+
+
+def test_read_instructions_as_they_arrive():
+    program = gen_ir_program("a = 300\nprint a * a\n")
+
+    instrs = iter_ir(TrickleStream(serialize(program)))
+
+    assert next(instrs) == program.instructions[0]
+    assert list(instrs) == program.instructions[1:]
+
+
+def test_reject_truncated_stream():
+    data = serialize(gen_ir_program("print 1 + 2\n"))
+
+    with pytest.raises(ValueError):
+        read_ir(io.BytesIO(data[:-1]))
+
+
+def test_reject_other_formats_and_versions():
+    with pytest.raises(ValueError):
+        read_ir(io.BytesIO(b"\x7fELF"))
+
+    with pytest.raises(ValueError):
+        read_ir(io.BytesIO(MAGIC + bytes([VERSION + 1, 0x7F])))
+
+
+regs = st.builds(Reg, st.integers(min_value=0, max_value=2**40))
+instrs = st.one_of(
+    st.builds(LoadLiteralInstr, regs, st.integers()),
+    st.builds(LoadRegInstr, regs, regs),
+    st.builds(BinOpInstr, regs, st.sampled_from(BinOp), regs, regs),
+    st.builds(PrintInstr, regs),
+)
+
+
+@given(st.lists(instrs))
+def test_round_trip_any_program(instructions):
+    program = Program(instructions=instructions)
+
+    assert read_ir(TrickleStream(serialize(program))) == program
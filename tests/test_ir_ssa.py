@@ -0,0 +1,69 @@
+import pytest
+from minic.ir import (BinOp, BinOpInstr, LoadLiteralInstr, LoadRegInstr,
+                      PrintInstr, Program, Reg)
+from minic.ir_ssa import SsaProgram
+
+
+def sample_program() -> Program:
+    return Program(
+        instructions=[
+            LoadLiteralInstr(Reg(0), 2),
+            LoadRegInstr(Reg(1), Reg(0)),
+            BinOpInstr(Reg(2), BinOp.Mul, Reg(1), Reg(1)),
+            PrintInstr(Reg(2)),
+            PrintInstr(Reg(1)),
+        ]
+    )
+
+
+def test_record_defs_and_uses():
+    ssa = SsaProgram(sample_program())
+
+    assert ssa.get_def(Reg(1)) == LoadRegInstr(Reg(1), Reg(0))
+    assert ssa.get_def(Reg(9)) is None
+    assert ssa.get_uses(Reg(1)) == {2, 4}
+    assert not ssa.has_uses(Reg(3))
+
+
+def test_replace_all_uses_with():
+    ssa = SsaProgram(sample_program())
+
+    ssa.replace_all_uses_with(Reg(1), Reg(0))
+
+    assert not ssa.has_uses(Reg(1))
+    assert ssa.get_uses(Reg(0)) == {1, 2, 4}
+    assert ssa.to_program().instructions[2:] == [
+        BinOpInstr(Reg(2), BinOp.Mul, Reg(0), Reg(0)),
+        PrintInstr(Reg(2)),
+        PrintInstr(Reg(0)),
+    ]
+
+
+def test_erase_drops_the_uses_of_an_instruction():
+    ssa = SsaProgram(sample_program())
+
+    ssa.erase(4)
+    ssa.erase(3)
+    ssa.erase(2)
+
+    assert not ssa.has_uses(Reg(1))
+    assert ssa.get_def(Reg(2)) is None
+    assert ssa.to_program().instructions == sample_program().instructions[:2]
+
+
+def test_replace_updates_uses():
+    ssa = SsaProgram(sample_program())
+
+    ssa.replace(2, LoadLiteralInstr(Reg(2), 4))
+
+    assert ssa.get_uses(Reg(1)) == {4}
+    assert ssa.get_def(Reg(2)) == LoadLiteralInstr(Reg(2), 4)
+
+
+def test_reject_registers_written_twice():
+    program = Program(
+        instructions=[LoadLiteralInstr(Reg(0), 1), LoadLiteralInstr(Reg(0), 2)]
+    )
+
+    with pytest.raises(ValueError):
+        SsaProgram(program)
@@ -0,0 +1,59 @@
+import platform
+import sys
+
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+from minic.compiler import gen_x86_64_program, run_minic_jit
+from minic.ir import INT64_MAX, BinOp, eval_bin_op
+from minic.jit import jit_run
+from minic.x86_64 import X86_64_Program
+
+pytestmark = pytest.mark.skipif(
+    sys.platform != "linux" or platform.machine() != "x86_64",
+    reason="needs to execute x86-64 code",
+)
+
+
+def test_run_program_and_capture_output():
+    code = """
+    a = 7
+    b = a * 10 - 3
+    print b
+    print b / 4
+    print 0 - b
+    """
+
+    assert run_minic_jit(code) == "67\n16\n-67\n"
+
+
+def test_run_program_with_buffered_output():
+    assert run_minic_jit("print 1\nprint 2\n", buffer_output=True) == "1\n2\n"
+
+
+def test_run_program_without_prints():
+    assert run_minic_jit("a = 1\n") == ""
+
+
+def test_reject_freestanding_programs():
+    with pytest.raises(NotImplementedError):
+        jit_run(X86_64_Program(instructions=[], freestanding=True))
+
+
+@given(
+    a=st.integers(min_value=0, max_value=INT64_MAX),
+    b=st.integers(min_value=1, max_value=INT64_MAX),
+)
+@settings(max_examples=50)
+def test_match_ir_semantics(a, b):
+    code = f"a = {a}\nb = 0 - {b}\nprint a * b\nprint a / b\nprint b - a\n"
+    expected = "".join(
+        f"{eval_bin_op(op, left, right)}\n"
+        for op, left, right in [
+            (BinOp.Mul, a, -b),
+            (BinOp.Div, a, -b),
+            (BinOp.Sub, -b, a),
+        ]
+    )
+
+    assert jit_run(gen_x86_64_program(code)) == expected
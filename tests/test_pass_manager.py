@@ -0,0 +1,154 @@
+import pytest
+
+from minic.compiler import compile_minic, gen_ir_program, run_minic
+from minic.ir import LoadLiteralInstr, PrintInstr, Program, Reg
+from minic.ir_opt import compute_ssa
+from minic.pass_manager import (IR_ANALYSES, IR_PASSES, OPT_LEVELS, Pass,
+                                PassManager, Pipeline, format_pass_timings,
+                                schedule_passes)
+from minic.x86_64 import MemOffset, Mov, R, Size, X86_64_Program
+from minic.x86_64_peephole import forward_stores
+
+CODE = """
+a = 7
+b = a * 10 - 3
+print b
+print b / 4
+print 0 - b
+c = b * b / a
+print c
+"""
+
+
+@pytest.mark.parametrize("opt_level", OPT_LEVELS)
+def test_opt_levels_agree_on_output(opt_level):
+    assert run_minic(CODE, opt_level=opt_level) == "67\n16\n-67\n641\n"
+
+
+def test_higher_opt_levels_emit_fewer_instructions():
+    sizes = [len(compile_minic(CODE, opt_level=level)) for level in OPT_LEVELS]
+
+    assert sizes == sorted(sizes, reverse=True)
+
+
+def test_default_opt_level_interns_terms():
+    program = gen_ir_program("print 2 * 2\nprint 2 * 2\n")
+
+    assert len(program.instructions) == 4
+
+
+def test_unknown_opt_level_is_rejected():
+    with pytest.raises(ValueError):
+        PassManager(3)
+
+
+def test_schedule_required_passes_first():
+    assert schedule_passes(("cse", "const-fold", "dce"), IR_PASSES) == [
+        "cse",
+        "copy-prop",
+        "const-fold",
+        "dce",
+    ]
+
+
+def test_schedule_rejects_unknown_passes():
+    with pytest.raises(ValueError):
+        schedule_passes(("no-such-pass",), IR_PASSES)
+
+
+def test_schedule_rejects_requirement_cycles():
+    passes = {
+        "a": Pass("a", lambda program: program, requires=("b",)),
+        "b": Pass("b", lambda program: program, requires=("a",)),
+    }
+
+    with pytest.raises(ValueError):
+        schedule_passes(("a",), passes)
+
+
+def test_analyses_are_cached_until_the_program_changes(monkeypatch):
+    computed = []
+
+    def count_instrs(program):
+        computed.append(len(program.instructions))
+        return len(program.instructions)
+
+    def drop_first(program, num_instrs):
+        return Program(instructions=program.instructions[1:])
+
+    monkeypatch.setitem(IR_ANALYSES, "num-instrs", count_instrs)
+    monkeypatch.setitem(
+        IR_PASSES, "keep", Pass("keep", lambda program, n: program, ("num-instrs",))
+    )
+    monkeypatch.setitem(IR_PASSES, "drop", Pass("drop", drop_first, ("num-instrs",)))
+
+    pass_manager = PassManager()
+    pass_manager.pipeline = Pipeline(
+        ir_passes=("keep", "keep", "drop", "keep"),
+        codegen_options={},
+        machine_passes=(),
+    )
+    program = Program(instructions=[LoadLiteralInstr(Reg(0), 1), PrintInstr(Reg(0))])
+
+    pass_manager.run_ir_passes(program)
+
+    assert computed == [2, 1]
+
+
+def test_time_passes_reports_instruction_counts():
+    unoptimized = gen_ir_program(CODE, opt_level=0)
+    pass_manager = PassManager(2)
+    ir_program = pass_manager.run_ir_passes(unoptimized)
+    pass_manager.run_machine_passes(pass_manager.lower(ir_program))
+
+    names = [timing.name for timing in pass_manager.timings]
+    report = format_pass_timings(pass_manager.timings)
+
+    assert names == [
+        "cse",
+        "copy-prop",
+        "const-fold",
+        "dce",
+        "egraph",
+        "reassociate",
+        "const-fold",
+        "dce",
+        "x86-64-codegen",
+        "store-forward",
+        "schedule",
+    ]
+    assert all(name in report for name in names)
+    assert pass_manager.timings[0].instrs_before == len(unoptimized.instructions)
+    assert pass_manager.timings[7].instrs_after == len(ir_program.instructions)
+
+
+def test_forward_stores_to_the_next_load():
+    slot = MemOffset(Size.QWordPtr, R.Rbp, -8)
+    program = X86_64_Program(
+        instructions=[
+            Mov(slot, R.Rax),
+            Mov(R.Rax, slot),
+            Mov(R.Rdx, slot),
+            Mov(R.Rax, slot),
+        ]
+    )
+
+    assert forward_stores(program).instructions == [
+        Mov(slot, R.Rax),
+        Mov(R.Rdx, R.Rax),
+        Mov(R.Rax, slot),
+    ]
+
+
+def test_ssa_passes_share_one_ssa_program(monkeypatch):
+    built = []
+
+    def build_ssa(program):
+        built.append(program)
+        return compute_ssa(program)
+
+    monkeypatch.setitem(IR_ANALYSES, "ssa", build_ssa)
+
+    PassManager(2).run_ir_passes(gen_ir_program(CODE, opt_level=0))
+
+    assert len(built) == 1
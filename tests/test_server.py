@@ -0,0 +1,117 @@
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from minic.client import (CompileClient, CompileError, recv_message,
+                          send_message)
+from minic.compiler import compile_minic
+from minic.server import CompileServer
+
+CODE = "a = 6\nprint a * 7\n"
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = CompileServer(tmp_path / "sock", jobs=2, cache=True)
+    thread = threading.Thread(target=server.serve)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    thread.join()
+
+
+def test_compile_like_the_compiler(server):
+    with CompileClient(server.socket_path) as client:
+        assert client.compile(CODE) == compile_minic(CODE)
+        assert client.compile(CODE, opt_level=0, buffer_output=True) == (
+            compile_minic(CODE, opt_level=0, buffer_output=True)
+        )
+
+
+def test_report_diagnostics_and_keep_serving(server):
+    with CompileClient(server.socket_path) as client:
+        with pytest.raises(CompileError, match="KeyError: 'y'"):
+            client.compile("print y\n")
+        with pytest.raises(CompileError, match="unknown options: emit_obj"):
+            client.compile(CODE, emit_obj=True)
+
+        assert client.compile(CODE) == compile_minic(CODE)
+
+
+def test_reject_malformed_requests(server):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(server.socket_path))
+        send_message(sock, {"options": {}})
+
+        assert recv_message(sock) == {"error": "request has no source"}
+
+
+@pytest.mark.parametrize(
+    "options, error",
+    [
+        ({"opt_level": [1]}, "option opt_level must be int, not list"),
+        ({"opt_level": "2"}, "option opt_level must be int, not str"),
+        ({"opt_level": True}, "option opt_level must be int, not bool"),
+        ({"avx2": 1}, "option avx2 must be bool, not int"),
+    ],
+)
+def test_reject_options_of_the_wrong_type(server, options, error):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(str(server.socket_path))
+        send_message(sock, {"source": CODE, "options": options})
+
+        assert recv_message(sock) == {"error": error}
+
+
+def test_serve_concurrent_requests(server):
+    codes = [f"a = {idx}\nprint a * a + {idx}\n" for idx in range(16)]
+
+    def compile_on_own_connection(code):
+        with CompileClient(server.socket_path) as client:
+            return client.compile(code)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        outputs = list(executor.map(compile_on_own_connection, codes))
+
+    assert outputs == [compile_minic(code) for code in codes]
+
+
+def test_reuse_cached_results(server):
+    with CompileClient(server.socket_path) as client:
+        first = client.compile(CODE)
+        second = client.compile(CODE)
+        client.compile(CODE, opt_level=0)
+
+    assert first == second
+    assert server.cache_hits == 1
+
+
+def test_shut_down_when_idle(tmp_path):
+    socket_path = tmp_path / "sock"
+    server = CompileServer(socket_path, jobs=1, idle_timeout=0.5)
+    thread = threading.Thread(target=server.serve)
+    thread.start()
+
+    with CompileClient(socket_path) as client:
+        assert client.compile(CODE) == compile_minic(CODE)
+
+    thread.join(timeout=10)
+
+    assert not thread.is_alive()
+    assert not socket_path.exists()
+
+
+def test_replace_stale_sockets_but_not_live_ones(tmp_path, server):
+    stale_path = tmp_path / "stale"
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(str(stale_path))
+
+    stale_server = CompileServer(stale_path, jobs=1)
+    stale_server.server_close()
+
+    with pytest.raises(OSError, match="already listening"):
+        CompileServer(server.socket_path, jobs=1)
@@ -0,0 +1,109 @@
+import io
+import platform
+import shutil
+import subprocess
+import sys
+
+import pytest
+from minic.compiler import run_minic
+from minic.driver import CompileOptions, compile_file
+from minic.jit import jit_run
+from minic.parser import Parser
+from minic.scanner import Scanner
+from minic.streaming import FRAME_SIZE_LINE_WIDTH, StreamingCodeGen, compile_streaming
+from minic.x86_64 import X86_64_Program
+
+CODE = """
+a = 7
+b = a * 10 - 3
+print b
+print b / 4
+print 0 - b
+c = (a + b) * (b - a) / 3
+a = c
+print a * 9 + c
+"""
+
+
+def gen_streaming_program(code: str, **options) -> X86_64_Program:
+    code_gen = StreamingCodeGen(**options)
+    instrs = []
+    for stmt in Parser(Scanner(code)).iter_stmts():
+        instrs += code_gen.translate_stmt(stmt)
+
+    return X86_64_Program(
+        instructions=[*code_gen.gen_prologue(), *instrs, *code_gen.gen_epilogue()],
+        freestanding=code_gen.freestanding,
+    )
+
+
+def compile_streaming_to_text(code: str, **options) -> str:
+    out_file = io.BytesIO()
+    compile_streaming(io.StringIO(code), out_file, **options)
+
+    return out_file.getvalue().decode()
+
+
+@pytest.mark.skipif(
+    sys.platform != "linux" or platform.machine() != "x86_64",
+    reason="needs to execute x86-64 code",
+)
+@pytest.mark.parametrize("buffer_output", [False, True])
+def test_run_streamed_program(buffer_output):
+    program = gen_streaming_program(CODE, buffer_output=buffer_output)
+
+    assert jit_run(program) == run_minic(CODE)
+
+
+@pytest.mark.parametrize("freestanding", [False, True])
+def test_write_the_program_with_the_frame_size_patched_in(freestanding):
+    text = compile_streaming_to_text(CODE, freestanding=freestanding)
+    expected = gen_streaming_program(CODE, freestanding=freestanding).dump()
+
+    sub_line = next(line for line in text.splitlines() if "sub rsp" in line)
+    assert len(sub_line) == FRAME_SIZE_LINE_WIDTH
+    assert text.replace(sub_line, sub_line.rstrip()) == expected
+
+
+def test_frame_size_does_not_grow_with_the_program():
+    def frame_size(repeats: int) -> int:
+        code = "a = 1\n" + "a = (a + 2) * (a - 3) / 4\nprint a\n" * repeats
+        code_gen = StreamingCodeGen()
+        for stmt in Parser(Scanner(code)).iter_stmts():
+            code_gen.translate_stmt(stmt)
+
+        assert len(code_gen.mem_offset_by_reg) == 1
+        return code_gen.allocated_size
+
+    assert frame_size(500) == frame_size(2)
+
+
+def test_read_the_source_in_chunks(monkeypatch):
+    expected = compile_streaming_to_text(CODE)
+
+    monkeypatch.setattr("minic.streaming.READ_CHUNK_SIZE", 3)
+
+    assert compile_streaming_to_text(CODE) == expected
+
+
+def test_compile_file_with_stream_option(tmp_path):
+    path = tmp_path / "prog.mc"
+    path.write_text(CODE)
+
+    out_path = compile_file(path, CompileOptions(stream=True, buffer_output=True))
+
+    assert out_path == path.with_suffix(".S")
+    assert out_path.read_text() == compile_streaming_to_text(CODE, buffer_output=True)
+
+
+@pytest.mark.skipif(shutil.which("cc") is None, reason="needs a C toolchain")
+def test_assemble_and_run_streamed_file(tmp_path):
+    path = tmp_path / "prog.mc"
+    exe_path = tmp_path / "prog"
+    path.write_text(CODE)
+
+    out_path = compile_file(path, CompileOptions(stream=True))
+    subprocess.run(["cc", "-o", exe_path, out_path], check=True)
+    result = subprocess.run([exe_path], capture_output=True, check=True, text=True)
+
+    assert result.stdout == run_minic(CODE)
@@ -0,0 +1,60 @@
+from minic.x86_64 import (Label, Lea, MemOffset, Mov, R, Ret, ScaledIndex,
+                          Size, X86_64_Program)
+from minic.x86_64_runtime import RUNTIME_ASM
+
+
+def test_dump_mem_offset_without_displacement():
+    assert MemOffset(Size.QWordPtr, R.Rdi, 0).dump() == "QWORD PTR [rdi]"
+    assert MemOffset(Size.QWordPtr, R.Rbp, -8).dump() == "QWORD PTR [rbp-8]"
+
+
+def test_dump_lea_with_scaled_index():
+    instr = Lea(R.Rax, ScaledIndex(R.Rax, R.Rdx, 4))
+
+    assert instr.dump() == "lea rax, [rax+rdx*4]"
+
+
+def test_dump_program_with_extra_strings():
+    program = X86_64_Program(
+        instructions=[Mov(R.Eax, Label("x")), Ret()],
+        strings={Label(".PRINTF_FMT_LLD_2"): '%lld\n"%lld"\n'},
+    )
+
+    assert program.dump() == "\n".join(
+        [
+            ".intel_syntax noprefix",
+            "",
+            ".data",
+            ".PRINTF_FMT_LLD:",
+            '    .string "%lld\\n"',
+            ".PRINTF_FMT_LLD_2:",
+            '    .string "%lld\\n\\"%lld\\"\\n"',
+            "",
+            ".text",
+            ".global main",
+            "main:",
+            "    mov eax, x",
+            "    ret",
+            "",
+        ]
+    )
+
+
+def test_dump_freestanding_program_includes_the_runtime():
+    program = X86_64_Program(instructions=[Ret()], freestanding=True)
+
+    dumped = program.dump()
+
+    assert dumped.endswith(RUNTIME_ASM + "\n")
+    assert "_start:" in dumped
+    assert "minic_print_lld:" in dumped
+    assert '.ascii "000102030405' in dumped
+
+
+def test_dump_program_with_rodata_blobs():
+    program = X86_64_Program(
+        instructions=[Ret()],
+        rodata={Label(".PRINT_BLOB_0"): "1\n2\n"},
+    )
+
+    assert '.section .rodata\n.PRINT_BLOB_0:\n    .ascii "1\\n2\\n"\n' in program.dump()
@@ -1,8 +1,8 @@
 from minic.ir import (BinOp, BinOpInstr, LoadLiteralInstr, LoadRegInstr,
                       PrintInstr, Program, Reg)
 from minic.x86_64 import (Add, Call, Cqo, Idiv, Imm, Imul, Label, Lea,
-                          MemOffset, Mov, Pop, Push, R, Ret, Size, Sub,
-                          X86_64_Program)
+                          MemOffset, Mov, Pop, Push, R, Ret, Sar, ScaledIndex,
+                          Shl, Shr, Size, Sub, X86_64_Program)
 from minic.x86_64_code_gen import X86_64_CodeGen
 
 
@@ -54,6 +54,34 @@ def test_generate_mov_instructions_for_load_literal():
     )
 
 
+def test_load_literal_wider_than_imm32_through_rax():
+    program = Program(
+        instructions=[
+            LoadLiteralInstr(out_reg=Reg(0), value=2**31),
+        ]
+    )
+
+    code_gen = X86_64_CodeGen(program)
+    code = code_gen.generate()
+
+    assert code == X86_64_Program(
+        instructions=[
+            # Header.
+            Push(R.Rbp),
+            Mov(R.Rbp, R.Rsp),
+            Sub(R.Rsp, Imm(8)),
+            # Code
+            Mov(R.Rax, Imm(2**31)),
+            Mov(MemOffset(Size.QWordPtr, R.Rbp, -8), R.Rax),
+            # Footer.
+            Mov(R.Eax, Imm(0)),
+            Add(R.Rsp, Imm(8)),
+            Pop(R.Rbp),
+            Ret(),
+        ]
+    )
+
+
 def test_generate_mov_instructions_for_load_reg():
     program = Program(
         instructions=[
@@ -154,8 +182,8 @@ def test_generate_sub_instruction():
             # Code
             Mov(MemOffset(Size.QWordPtr, R.Rbp, -8), Imm(20)),
             Mov(MemOffset(Size.QWordPtr, R.Rbp, -16), Imm(15)),
-            Mov(R.Rdx, MemOffset(Size.QWordPtr, R.Rbp, -8)),
-            Mov(R.Rax, MemOffset(Size.QWordPtr, R.Rbp, -16)),
+            Mov(R.Rax, MemOffset(Size.QWordPtr, R.Rbp, -8)),
+            Mov(R.Rdx, MemOffset(Size.QWordPtr, R.Rbp, -16)),
             Sub(R.Rax, R.Rdx),
             Mov(MemOffset(Size.QWordPtr, R.Rbp, -24), R.Rax),
             # Footer.
@@ -276,3 +304,322 @@ def test_generate_call_to_print():
             Ret(),
         ]
     )
+
+
+def test_generate_strength_reduced_mul_by_constant():
+    program = Program(
+        instructions=[
+            LoadLiteralInstr(out_reg=Reg(0), value=20),
+            LoadRegInstr(out_reg=Reg(1), in_reg=Reg(0)),
+            LoadLiteralInstr(out_reg=Reg(2), value=10),
+            BinOpInstr(
+                out_reg=Reg(3),
+                op=BinOp.Mul,
+                left_reg=Reg(1),
+                right_reg=Reg(2),
+            ),
+        ]
+    )
+
+    code_gen = X86_64_CodeGen(program, reduce_mul=True)
+    code = code_gen.generate()
+
+    assert code == X86_64_Program(
+        instructions=[
+            # Header.
+            Push(R.Rbp),
+            Mov(R.Rbp, R.Rsp),
+            Sub(R.Rsp, Imm(32)),
+            # Code
+            Mov(MemOffset(Size.QWordPtr, R.Rbp, -8), Imm(20)),
+            Mov(R.Rax, MemOffset(Size.QWordPtr, R.Rbp, -8)),
+            Mov(MemOffset(Size.QWordPtr, R.Rbp, -16), R.Rax),
+            Mov(MemOffset(Size.QWordPtr, R.Rbp, -24), Imm(10)),
+            Mov(R.Rax, MemOffset(Size.QWordPtr, R.Rbp, -16)),
+            Lea(R.Rax, ScaledIndex(R.Rax, R.Rax, 4)),
+            Shl(R.Rax, Imm(1)),
+            Mov(MemOffset(Size.QWordPtr, R.Rbp, -32), R.Rax),
+            # Footer.
+            Mov(R.Eax, Imm(0)),
+            Add(R.Rsp, Imm(32)),
+            Pop(R.Rbp),
+            Ret(),
+        ]
+    )
+
+
+def test_generate_strength_reduced_mul_by_left_constant():
+    program = Program(
+        instructions=[
+            LoadLiteralInstr(out_reg=Reg(0), value=20),
+            LoadLiteralInstr(out_reg=Reg(1), value=1234567),
+            BinOpInstr(
+                out_reg=Reg(2),
+                op=BinOp.Mul,
+                left_reg=Reg(0),
+                right_reg=Reg(1),
+            ),
+        ]
+    )
+
+    code_gen = X86_64_CodeGen(program, reduce_mul=True)
+    code = code_gen.generate()
+
+    assert code.instructions[3:9] == [
+        Mov(MemOffset(Size.QWordPtr, R.Rbp, -8), Imm(20)),
+        Mov(MemOffset(Size.QWordPtr, R.Rbp, -16), Imm(1234567)),
+        Mov(R.Rax, MemOffset(Size.QWordPtr, R.Rbp, -16)),
+        Lea(R.Rax, ScaledIndex(R.Rax, R.Rax, 4)),
+        Shl(R.Rax, Imm(2)),
+        Mov(MemOffset(Size.QWordPtr, R.Rbp, -24), R.Rax),
+    ]
+
+
+def test_generate_imul_when_mul_constant_has_no_cheap_decomposition():
+    program = Program(
+        instructions=[
+            LoadLiteralInstr(out_reg=Reg(0), value=20),
+            LoadLiteralInstr(out_reg=Reg(1), value=15),
+            BinOpInstr(
+                out_reg=Reg(2),
+                op=BinOp.Add,
+                left_reg=Reg(0),
+                right_reg=Reg(1),
+            ),
+            LoadLiteralInstr(out_reg=Reg(3), value=1234567),
+            BinOpInstr(
+                out_reg=Reg(4),
+                op=BinOp.Mul,
+                left_reg=Reg(2),
+                right_reg=Reg(3),
+            ),
+        ]
+    )
+
+    code_gen = X86_64_CodeGen(program, reduce_mul=True)
+    code = code_gen.generate()
+
+    assert code.instructions[-8:-4] == [
+        Mov(R.Rdx, MemOffset(Size.QWordPtr, R.Rbp, -24)),
+        Mov(R.Rax, MemOffset(Size.QWordPtr, R.Rbp, -32)),
+        Imul(R.Rax, R.Rdx),
+        Mov(MemOffset(Size.QWordPtr, R.Rbp, -40), R.Rax),
+    ]
+
+
+def test_generate_shift_sequence_for_div_by_power_of_two():
+    program = Program(
+        instructions=[
+            LoadLiteralInstr(out_reg=Reg(0), value=20),
+            LoadLiteralInstr(out_reg=Reg(1), value=2),
+            BinOpInstr(
+                out_reg=Reg(2),
+                op=BinOp.Div,
+                left_reg=Reg(0),
+                right_reg=Reg(1),
+            ),
+        ]
+    )
+
+    code_gen = X86_64_CodeGen(program, reduce_div=True)
+    code = code_gen.generate()
+
+    assert code.instructions[3:11] == [
+        Mov(MemOffset(Size.QWordPtr, R.Rbp, -8), Imm(20)),
+        Mov(MemOffset(Size.QWordPtr, R.Rbp, -16), Imm(2)),
+        Mov(R.Rax, MemOffset(Size.QWordPtr, R.Rbp, -8)),
+        Mov(R.Rdx, R.Rax),
+        Shr(R.Rdx, Imm(63)),
+        Add(R.Rax, R.Rdx),
+        Sar(R.Rax, Imm(1)),
+        Mov(MemOffset(Size.QWordPtr, R.Rbp, -24), R.Rax),
+    ]
+
+
+def test_generate_single_printf_call_for_consecutive_prints():
+    program = Program(
+        instructions=[
+            LoadLiteralInstr(out_reg=Reg(0), value=1),
+            LoadLiteralInstr(out_reg=Reg(1), value=2),
+            PrintInstr(arg_reg=Reg(0)),
+            PrintInstr(arg_reg=Reg(1)),
+            PrintInstr(arg_reg=Reg(0)),
+        ]
+    )
+
+    code_gen = X86_64_CodeGen(program, coalesce_prints=True)
+    code = code_gen.generate()
+
+    assert code == X86_64_Program(
+        instructions=[
+            # Header.
+            Push(R.Rbp),
+            Mov(R.Rbp, R.Rsp),
+            Sub(R.Rsp, Imm(16)),
+            # Code
+            Mov(MemOffset(Size.QWordPtr, R.Rbp, -8), Imm(1)),
+            Mov(MemOffset(Size.QWordPtr, R.Rbp, -16), Imm(2)),
+            Mov(R.Rsi, MemOffset(Size.QWordPtr, R.Rbp, -8)),
+            Mov(R.Rdx, MemOffset(Size.QWordPtr, R.Rbp, -16)),
+            Mov(R.Rcx, MemOffset(Size.QWordPtr, R.Rbp, -8)),
+            Lea(R.Rdi, MemOffset(Size.QWordPtr, R.Rip, Label(".PRINTF_FMT_LLD_3"))),
+            Mov(R.Eax, Imm(0)),
+            Call(Label("printf")),
+            # Footer.
+            Mov(R.Eax, Imm(0)),
+            Add(R.Rsp, Imm(16)),
+            Pop(R.Rbp),
+            Ret(),
+        ],
+        strings={Label(".PRINTF_FMT_LLD_3"): "%lld\n%lld\n%lld\n"},
+    )
+
+
+def test_split_coalesced_prints_at_the_argument_register_limit():
+    program = Program(
+        instructions=[
+            LoadLiteralInstr(out_reg=Reg(0), value=1),
+            *[PrintInstr(arg_reg=Reg(0)) for _ in range(7)],
+        ]
+    )
+
+    code_gen = X86_64_CodeGen(program, coalesce_prints=True)
+    code = code_gen.generate()
+
+    calls = [instr for instr in code.instructions if isinstance(instr, Call)]
+    fmt_labels = [
+        instr.src.displacement
+        for instr in code.instructions
+        if isinstance(instr, Lea) and instr.dst == R.Rdi
+    ]
+
+    assert len(calls) == 2
+    assert fmt_labels == [Label(".PRINTF_FMT_LLD_5"), Label(".PRINTF_FMT_LLD_2")]
+
+
+def test_generate_setvbuf_call_for_buffered_output():
+    program = Program(instructions=[])
+
+    code_gen = X86_64_CodeGen(program, buffer_output=True)
+    code = code_gen.generate()
+
+    assert code.instructions[2:8] == [
+        Mov(R.Rdi, MemOffset(Size.QWordPtr, R.Rip, Label("stdout@GOTPCREL"))),
+        Mov(R.Rdi, MemOffset(Size.QWordPtr, R.Rdi, 0)),
+        Mov(R.Rsi, Imm(0)),
+        Mov(R.Rdx, Imm(0)),
+        Mov(R.Rcx, Imm(65536)),
+        Call(Label("setvbuf")),
+    ]
+
+
+def test_generate_runtime_call_to_print_when_freestanding():
+    program = Program(
+        instructions=[
+            LoadLiteralInstr(out_reg=Reg(0), value=42),
+            PrintInstr(arg_reg=Reg(0)),
+            PrintInstr(arg_reg=Reg(0)),
+        ]
+    )
+
+    code_gen = X86_64_CodeGen(program, coalesce_prints=True, freestanding=True)
+    code = code_gen.generate()
+
+    assert code == X86_64_Program(
+        instructions=[
+            # Header.
+            Push(R.Rbp),
+            Mov(R.Rbp, R.Rsp),
+            Sub(R.Rsp, Imm(8)),
+            # Code
+            Mov(MemOffset(Size.QWordPtr, R.Rbp, -8), Imm(42)),
+            Mov(R.Rdi, MemOffset(Size.QWordPtr, R.Rbp, -8)),
+            Call(Label("minic_print_lld")),
+            Mov(R.Rdi, MemOffset(Size.QWordPtr, R.Rbp, -8)),
+            Call(Label("minic_print_lld")),
+            # Footer.
+            Mov(R.Eax, Imm(0)),
+            Add(R.Rsp, Imm(8)),
+            Pop(R.Rbp),
+            Ret(),
+        ],
+        freestanding=True,
+    )
+
+
+def test_prerender_constant_prints_into_a_single_write():
+    program = Program(
+        instructions=[
+            LoadLiteralInstr(out_reg=Reg(0), value=20),
+            PrintInstr(arg_reg=Reg(0)),
+            LoadLiteralInstr(out_reg=Reg(1), value=15),
+            BinOpInstr(
+                out_reg=Reg(2),
+                op=BinOp.Sub,
+                left_reg=Reg(1),
+                right_reg=Reg(0),
+            ),
+            PrintInstr(arg_reg=Reg(2)),
+        ]
+    )
+
+    code_gen = X86_64_CodeGen(program, prerender_prints=True)
+    code = code_gen.generate()
+
+    assert code.rodata == {Label(".PRINT_BLOB_0"): "20\n-5\n"}
+    assert code.instructions[-10:-4] == [
+        Lea(R.Rdi, MemOffset(Size.QWordPtr, R.Rip, Label(".PRINT_BLOB_0"))),
+        Mov(R.Rsi, Imm(1)),
+        Mov(R.Rdx, Imm(6)),
+        Mov(R.Rcx, MemOffset(Size.QWordPtr, R.Rip, Label("stdout@GOTPCREL"))),
+        Mov(R.Rcx, MemOffset(Size.QWordPtr, R.Rcx, 0)),
+        Call(Label("fwrite")),
+    ]
+    assert not any(
+        isinstance(instr, Call) and instr.target == Label("printf")
+        for instr in code.instructions
+    )
+
+
+def test_prerendered_output_is_written_before_a_trapping_division():
+    program = Program(
+        instructions=[
+            LoadLiteralInstr(out_reg=Reg(0), value=1),
+            LoadLiteralInstr(out_reg=Reg(1), value=0),
+            PrintInstr(arg_reg=Reg(0)),
+            BinOpInstr(
+                out_reg=Reg(2),
+                op=BinOp.Div,
+                left_reg=Reg(0),
+                right_reg=Reg(1),
+            ),
+            PrintInstr(arg_reg=Reg(2)),
+            PrintInstr(arg_reg=Reg(0)),
+        ]
+    )
+
+    code_gen = X86_64_CodeGen(program, prerender_prints=True, freestanding=True)
+    code = code_gen.generate()
+
+    assert code.rodata == {
+        Label(".PRINT_BLOB_0"): "1\n",
+        Label(".PRINT_BLOB_1"): "1\n",
+    }
+    assert code.instructions[5:20] == [
+        Lea(R.Rdi, MemOffset(Size.QWordPtr, R.Rip, Label(".PRINT_BLOB_0"))),
+        Mov(R.Rsi, Imm(2)),
+        Call(Label("minic_write")),
+        Mov(R.Rax, MemOffset(Size.QWordPtr, R.Rbp, -8)),
+        Cqo(),
+        Idiv(MemOffset(Size.QWordPtr, R.Rbp, -16)),
+        Mov(MemOffset(Size.QWordPtr, R.Rbp, -24), R.Rax),
+        Mov(R.Rdi, MemOffset(Size.QWordPtr, R.Rbp, -24)),
+        Call(Label("minic_print_lld")),
+        Lea(R.Rdi, MemOffset(Size.QWordPtr, R.Rip, Label(".PRINT_BLOB_1"))),
+        Mov(R.Rsi, Imm(2)),
+        Call(Label("minic_write")),
+        # Footer.
+        Mov(R.Eax, Imm(0)),
+        Add(R.Rsp, Imm(24)),
+        Pop(R.Rbp),
+    ]
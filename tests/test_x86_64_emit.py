@@ -0,0 +1,160 @@
+import io
+import itertools
+import typing
+from dataclasses import dataclass, fields
+
+import pytest
+from minic.compiler import gen_x86_64_program
+from minic.x86_64 import (Add, Call, Cqo, Idiv, Imm, Imul, Label, Lea,
+                          MemOffset, Mov, Movdqu, Movhps, Neg, Paddq, Pop,
+                          Push, R, Ret, ScaledIndex, Shl, Size, Sub, Vmovhps,
+                          Vpaddq, Vpbroadcastq, Vzeroupper, X86_64_Instr,
+                          X86_64_Program, Xmm, Ymm)
+from minic.x86_64_emit import AsmEmitter, write_program
+
+CODE = """
+a = 7
+b = a * 10 - 3
+print b
+print b / 4
+print 0 - b
+c = (a + b) * (b - a) / 3
+d = c * 9 + a * 9 + b * 9 + c * 9
+print d
+print d / 7
+"""
+
+
+def emit(program: X86_64_Program) -> str:
+    out_file = io.BytesIO()
+    write_program(program, out_file)
+
+    return out_file.getvalue().decode()
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        dict(opt_level=0),
+        dict(opt_level=1),
+        dict(opt_level=2),
+        dict(opt_level=2, avx2=True),
+        dict(buffer_output=True),
+        dict(freestanding=True),
+    ],
+)
+def test_write_the_same_text_as_dump(options):
+    program = gen_x86_64_program(CODE, **options)
+
+    assert emit(program) == program.dump()
+
+
+def test_render_every_kind_of_operand_like_dump():
+    slot = MemOffset(Size.QWordPtr, R.Rbp, -8)
+    program = X86_64_Program(
+        instructions=[
+            Push(R.Rbp),
+            Mov(slot, Imm(-(2**40))),
+            Mov(R.Rax, MemOffset(Size.QWordPtr, R.Rbp, 16)),
+            Mov(R.Rcx, MemOffset(Size.QWordPtr, R.Rcx, 0)),
+            Mov(R.Rcx, MemOffset(Size.QWordPtr, R.Rip, Label("stdout@GOTPCREL"))),
+            Lea(R.Rax, ScaledIndex(R.Rax, R.Rdx, 8)),
+            Add(R.Rax, slot),
+            Sub(R.Rsp, Imm(16)),
+            Shl(R.Rax, Imm(3)),
+            Neg(R.Rax),
+            Imul(R.Rax, slot),
+            Imul(slot),
+            Cqo(),
+            Idiv(slot),
+            Movdqu(Xmm.Xmm0, MemOffset(Size.XmmWordPtr, R.Rbp, -32)),
+            Movhps(Xmm.Xmm1, slot),
+            Paddq(Xmm.Xmm0, Xmm.Xmm1),
+            Vpbroadcastq(Ymm.Ymm0, slot),
+            Vmovhps(Xmm.Xmm0, Xmm.Xmm1, slot),
+            Vpaddq(Ymm.Ymm0, Ymm.Ymm0, Ymm.Ymm1),
+            Vzeroupper(),
+            Call(Label("printf")),
+            Pop(R.Rbp),
+            Ret(),
+        ],
+        strings={Label(".S"): "%lld\n"},
+        rodata={Label(".R"): "1\n"},
+    )
+
+    assert emit(program) == program.dump()
+
+
+SAMPLE_OPERANDS = {
+    R: R.Rcx,
+    Xmm: Xmm.Xmm1,
+    Ymm: Ymm.Ymm1,
+    Imm: Imm(-5),
+    MemOffset: MemOffset(Size.QWordPtr, R.Rbp, -16),
+    Label: Label("f"),
+    ScaledIndex: ScaledIndex(R.Rax, R.Rdx, 8),
+    type(None): None,
+}
+
+
+# Builds instances of `instr_type` with every combination of the kinds of
+# operands its fields may hold.
+def sample_instrs(instr_type: type) -> list[X86_64_Instr]:
+    hints = typing.get_type_hints(instr_type)
+    operand_choices = [
+        [
+            SAMPLE_OPERANDS[operand_type]
+            for operand_type in typing.get_args(hints[field.name])
+            or (hints[field.name],)
+        ]
+        for field in fields(instr_type)
+    ]
+
+    return [instr_type(*operands) for operands in itertools.product(*operand_choices)]
+
+
+@pytest.mark.parametrize(
+    "instr_type", X86_64_Instr.__subclasses__(), ids=lambda cls: cls.__name__
+)
+def test_render_every_instruction_like_dump(instr_type):
+    program = X86_64_Program(instructions=sample_instrs(instr_type))
+
+    assert emit(program) == program.dump()
+
+
+def test_render_instructions_with_other_layouts_with_dump():
+    @dataclass(frozen=True)
+    class Cmovl(X86_64_Instr):
+        src: R
+        dst: R
+
+        def dump(self) -> str:
+            return f"cmovl {self.dst.dump()}, {self.src.dump()}"
+
+    program = X86_64_Program(instructions=[Cmovl(R.Rax, R.Rcx)])
+
+    assert emit(program) == program.dump()
+
+
+def test_write_instructions_in_batches(monkeypatch):
+    program = gen_x86_64_program(CODE, opt_level=0)
+    expected = emit(program)
+
+    monkeypatch.setattr("minic.x86_64_emit.BATCH_SIZE", 3)
+
+    assert emit(program) == expected
+
+
+def test_memoize_stack_slots_but_not_labels():
+    slot = MemOffset(Size.QWordPtr, R.Rbp, -8)
+    instrs = []
+    for _ in range(100):
+        instrs += [
+            Mov(R.Rax, slot),
+            Mov(R.Rcx, MemOffset(Size.QWordPtr, R.Rip, Label(".PRINTF_FMT_LLD"))),
+        ]
+
+    emitter = AsmEmitter()
+    emitter.write_instrs(io.BytesIO(), instrs)
+
+    assert emitter.mem_offsets == [slot]
@@ -0,0 +1,105 @@
+from minic.x86_64 import (Add, Call, Cqo, Idiv, Imm, Imul, Label, Lea,
+                          MemOffset, Mov, Movdqu, Movhps, Movq, Neg, Paddq,
+                          Pop, Psubq, Push, R, Ret, Sar, ScaledIndex, Shl, Shr,
+                          Size, Sub, Vmovdqu, Vmovhps, Vmovq, Vpaddq,
+                          Vpbroadcastq, Vpsubq, Vzeroupper, Xmm, Ymm)
+from minic.x86_64_encoder import Relocation, RelocKind, X86_64_Encoder
+
+
+def _encode(*instrs):
+    return bytes(X86_64_Encoder().encode(list(instrs)).code).hex()
+
+
+def test_encode_prologue_and_epilogue():
+    assert _encode(Push(R.Rbp)) == "55"
+    assert _encode(Mov(R.Rbp, R.Rsp)) == "4889e5"
+    assert _encode(Sub(R.Rsp, Imm(16))) == "4883ec10"
+    assert _encode(Add(R.Rsp, Imm(1024))) == "4881c400040000"
+    assert _encode(Mov(R.Eax, Imm(0))) == "b800000000"
+    assert _encode(Pop(R.Rbp)) == "5d"
+    assert _encode(Ret()) == "c3"
+
+
+def test_encode_stack_slot_accesses():
+    slot = MemOffset(Size.QWordPtr, R.Rbp, -8)
+    far_slot = MemOffset(Size.QWordPtr, R.Rbp, -1024)
+
+    assert _encode(Mov(slot, Imm(42))) == "48c745f82a000000"
+    assert _encode(Mov(R.Rax, slot)) == "488b45f8"
+    assert _encode(Mov(far_slot, R.Rax)) == "48898500fcffff"
+    assert _encode(Mov(R.R8, slot)) == "4c8b45f8"
+    assert _encode(Idiv(slot)) == "48f77df8"
+
+
+def test_encode_arithmetic():
+    assert _encode(Add(R.Rax, R.Rdx)) == "4801d0"
+    assert _encode(Sub(R.Rax, R.Rdx)) == "4829d0"
+    assert _encode(Imul(R.Rax, R.Rdx)) == "480fafc2"
+    assert _encode(Imul(R.Rcx)) == "48f7e9"
+    assert _encode(Neg(R.Rax)) == "48f7d8"
+    assert _encode(Cqo()) == "4899"
+
+
+def test_encode_shifts():
+    assert _encode(Shl(R.Rax, Imm(3))) == "48c1e003"
+    assert _encode(Shr(R.Rax, Imm(1))) == "48d1e8"
+    assert _encode(Sar(R.Rdx, Imm(63))) == "48c1fa3f"
+
+
+def test_encode_lea_with_scaled_index():
+    assert _encode(Lea(R.Rax, ScaledIndex(R.Rax, R.Rax, 4))) == "488d0480"
+    assert _encode(Lea(R.Rax, ScaledIndex(R.Rax, R.Rdx, 8))) == "488d04d0"
+    assert _encode(Lea(R.Rax, ScaledIndex(R.Rbp, R.R9, 4))) == "4a8d448d00"
+
+
+def test_encode_mov_of_64_bit_immediate():
+    assert _encode(Mov(R.Rax, Imm(-1))) == "48c7c0ffffffff"
+    assert _encode(Mov(R.Rax, Imm(2**40))) == "48b80000000000010000"
+
+
+def test_encode_sse2_vector_instructions():
+    slot = MemOffset(Size.QWordPtr, R.Rbp, -8)
+    next_slot = MemOffset(Size.QWordPtr, R.Rbp, -24)
+    block = MemOffset(Size.XmmWordPtr, R.Rbp, -16)
+    far_block = MemOffset(Size.XmmWordPtr, R.Rbp, -1024)
+
+    assert _encode(Movdqu(Xmm.Xmm0, block)) == "f30f6f45f0"
+    assert _encode(Movdqu(far_block, Xmm.Xmm1)) == "f30f7f8d00fcffff"
+    assert _encode(Movq(Xmm.Xmm1, slot)) == "f30f7e4df8"
+    assert _encode(Movhps(Xmm.Xmm1, next_slot)) == "0f164de8"
+    assert _encode(Paddq(Xmm.Xmm0, Xmm.Xmm1)) == "660fd4c1"
+    assert _encode(Psubq(Xmm.Xmm0, Xmm.Xmm1)) == "660ffbc1"
+
+
+def test_encode_vex_vector_instructions():
+    slot = MemOffset(Size.QWordPtr, R.Rbp, -8)
+    next_slot = MemOffset(Size.QWordPtr, R.Rbp, -24)
+    block = MemOffset(Size.XmmWordPtr, R.Rbp, -16)
+    wide_block = MemOffset(Size.YmmWordPtr, R.Rbp, -32)
+
+    assert _encode(Vmovdqu(Ymm.Ymm0, wide_block)) == "c5fe6f45e0"
+    assert _encode(Vmovdqu(wide_block, Ymm.Ymm0)) == "c5fe7f45e0"
+    assert _encode(Vmovdqu(Xmm.Xmm1, block)) == "c5fa6f4df0"
+    assert _encode(Vmovq(Xmm.Xmm1, slot)) == "c5fa7e4df8"
+    assert _encode(Vmovhps(Xmm.Xmm1, Xmm.Xmm1, next_slot)) == "c5f0164de8"
+    assert _encode(Vpbroadcastq(Ymm.Ymm1, slot)) == "c4e27d594df8"
+    assert _encode(Vpaddq(Ymm.Ymm0, Ymm.Ymm0, Ymm.Ymm1)) == "c5fdd4c1"
+    assert _encode(Vpsubq(Xmm.Xmm0, Xmm.Xmm0, Xmm.Xmm1)) == "c5f9fbc1"
+    assert _encode(Vzeroupper()) == "c5f877"
+
+
+def test_record_relocations_for_labels_and_calls():
+    encoder = X86_64_Encoder().encode(
+        [
+            Lea(R.Rdi, MemOffset(Size.QWordPtr, R.Rip, Label(".PRINTF_FMT_LLD"))),
+            Mov(R.Rcx, MemOffset(Size.QWordPtr, R.Rip, Label("stdout@GOTPCREL"))),
+            Call(Label("printf")),
+        ]
+    )
+
+    assert bytes(encoder.code).hex() == "488d3d00000000488b0d00000000e800000000"
+    assert encoder.relocations == [
+        Relocation(3, ".PRINTF_FMT_LLD", RelocKind.Pc32, -4),
+        Relocation(10, "stdout", RelocKind.GotPcRel, -4),
+        Relocation(15, "printf", RelocKind.Plt32, -4),
+    ]
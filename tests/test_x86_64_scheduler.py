@@ -0,0 +1,155 @@
+import platform
+import sys
+
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+from minic.compiler import gen_x86_64_program, run_minic
+from minic.jit import jit_run
+from minic.pass_manager import OPT_LEVELS
+from minic.x86_64 import (Add, Call, Cqo, Idiv, Imm, Lea, MemOffset, Mov, Pop,
+                          Push, R, Ret, Size, Sub, X86_64_Program)
+from minic.x86_64_scheduler import schedule_instructions
+
+CODE = """
+a = 7
+b = a * 10 - 3
+print b
+print b / 4
+print 0 - b
+c = b * b / a
+print c
+"""
+
+
+def slot(offset: int) -> MemOffset:
+    return MemOffset(Size.QWordPtr, R.Rbp, offset)
+
+
+def is_frame_or_call(instr) -> bool:
+    return isinstance(instr, (Push, Pop, Ret, Call)) or (
+        isinstance(instr, (Add, Sub)) and instr.dst == R.Rsp
+    )
+
+
+def test_run_independent_work_while_a_division_is_in_flight():
+    program = X86_64_Program(
+        instructions=[
+            Mov(R.Rax, slot(-8)),
+            Cqo(),
+            Idiv(slot(-16)),
+            Mov(slot(-24), R.Rax),
+            Mov(R.Rdx, slot(-32)),
+            Mov(R.Rax, slot(-40)),
+            Add(R.Rax, R.Rdx),
+            Mov(slot(-48), R.Rax),
+            Pop(R.Rbp),
+        ]
+    )
+
+    instrs = schedule_instructions(program).instructions
+    add = next(instr for instr in instrs if isinstance(instr, Add))
+
+    # The addition no longer waits for `rax` and `rdx` to be free.
+    assert {add.dst, add.src}.isdisjoint({R.Rax, R.Rdx})
+    assert instrs.index(add) < instrs.index(Mov(slot(-24), R.Rax))
+    assert instrs[-1] == Pop(R.Rbp)
+
+
+def test_keep_accesses_to_the_same_slot_in_order():
+    program = X86_64_Program(
+        instructions=[
+            Mov(slot(-8), Imm(1)),
+            Mov(R.Rax, slot(-8)),
+            Mov(slot(-8), Imm(2)),
+            Mov(R.Rdx, slot(-8)),
+            Add(R.Rax, R.Rdx),
+            Mov(slot(-16), R.Rax),
+            Pop(R.Rbp),
+        ]
+    )
+
+    instrs = schedule_instructions(program).instructions
+    accesses = [
+        instr
+        for instr in instrs
+        if isinstance(instr, Mov) and slot(-8) in (instr.dst, instr.src)
+    ]
+
+    assert accesses[0] == Mov(slot(-8), Imm(1))
+    assert accesses[1].src == slot(-8)
+    assert accesses[2] == Mov(slot(-8), Imm(2))
+    assert accesses[3].src == slot(-8)
+
+
+def test_keep_calls_and_frame_setup_in_place():
+    program = gen_x86_64_program(CODE, opt_level=0)
+    scheduled = schedule_instructions(program)
+
+    assert [
+        (idx, instr)
+        for idx, instr in enumerate(scheduled.instructions)
+        if is_frame_or_call(instr)
+    ] == [
+        (idx, instr)
+        for idx, instr in enumerate(program.instructions)
+        if is_frame_or_call(instr)
+    ]
+
+
+def test_leave_call_arguments_in_their_registers():
+    program = gen_x86_64_program("a = 3\nprint a * a\n", opt_level=0)
+    instrs = schedule_instructions(program).instructions
+    call_idx = next(idx for idx, instr in enumerate(instrs) if isinstance(instr, Call))
+    written_before_call = {
+        instr.dst
+        for instr in instrs[:call_idx]
+        if isinstance(instr, (Mov, Lea)) and isinstance(instr.dst, R)
+    }
+
+    assert {R.Rsi, R.Rdi, R.Eax} <= written_before_call
+
+
+needs_x86_64 = pytest.mark.skipif(
+    sys.platform != "linux" or platform.machine() != "x86_64",
+    reason="needs to execute x86-64 code",
+)
+
+st_operands = st.sampled_from(["a", "b", "c"]) | st.integers(
+    min_value=0, max_value=2**40
+).map(str)
+
+st_exprs = st.recursive(
+    st_operands,
+    lambda inner: st.one_of(
+        st.tuples(inner, st.sampled_from("+-*"), inner).map(
+            lambda parts: f"({parts[0]} {parts[1]} {parts[2]})"
+        ),
+        # Only divide by nonzero literals, so that programs don't trap.
+        st.tuples(inner, st.sampled_from(["3", "(0 - 7)", "4096"])).map(
+            lambda parts: f"({parts[0]} / {parts[1]})"
+        ),
+    ),
+    max_leaves=8,
+)
+
+
+@needs_x86_64
+@pytest.mark.parametrize("opt_level", OPT_LEVELS)
+@given(
+    literals=st.lists(
+        st.integers(min_value=0, max_value=2**40), min_size=3, max_size=3
+    ),
+    exprs=st.lists(st_exprs, min_size=1, max_size=6),
+)
+@settings(max_examples=25, deadline=None)
+def test_match_ir_semantics(opt_level, literals, exprs):
+    lines = [f"{name} = {value}" for name, value in zip("abc", literals)]
+    for idx, expr in enumerate(exprs):
+        name = "abc"[idx % 3]
+        lines += [f"{name} = {expr}", f"print {name}"]
+    code = "\n".join(lines) + "\n"
+
+    program = schedule_instructions(gen_x86_64_program(code, opt_level=opt_level))
+
+    assert jit_run(program) == run_minic(code, opt_level=0)
@@ -0,0 +1,282 @@
+import platform
+import sys
+from pathlib import Path
+
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+from minic.compiler import gen_unoptimized_ir_program, run_minic
+from minic.ir import (BinOp, BinOpInstr, LoadLiteralInstr, PrintInstr, Program,
+                      Reg)
+from minic.jit import jit_run
+from minic.pass_manager import FULL_LOWERING, PassManager, Pipeline
+from minic.x86_64 import (Call, MemOffset, Movdqu, Movhps, Movq, Paddq, R,
+                          Size, Vpaddq, Vzeroupper, Xmm, Ymm)
+from minic.x86_64_code_gen import X86_64_CodeGen
+from minic.x86_64_scheduler import schedule_instructions
+from minic.x86_64_slp import (Pack, pack_instructions, plan_slot_blocks,
+                              vectorize_pack)
+
+
+def slot(offset: int) -> MemOffset:
+    return MemOffset(Size.QWordPtr, R.Rbp, offset)
+
+
+def add(out: int, left: int, right: int) -> BinOpInstr:
+    return BinOpInstr(Reg(out), BinOp.Add, Reg(left), Reg(right))
+
+
+def sub(out: int, left: int, right: int) -> BinOpInstr:
+    return BinOpInstr(Reg(out), BinOp.Sub, Reg(left), Reg(right))
+
+
+def literals(count: int) -> list[LoadLiteralInstr]:
+    return [LoadLiteralInstr(Reg(idx), idx + 1) for idx in range(count)]
+
+
+def test_pack_independent_operations_with_the_same_operator():
+    program = Program(
+        instructions=[
+            *literals(4),
+            add(10, 0, 1),
+            sub(11, 0, 1),
+            add(12, 2, 3),
+            sub(13, 2, 3),
+            PrintInstr(Reg(10)),
+        ]
+    )
+
+    items = pack_instructions(program, width=2)
+
+    assert items[4:] == [
+        Pack(BinOp.Add, (add(10, 0, 1), add(12, 2, 3))),
+        Pack(BinOp.Sub, (sub(11, 0, 1), sub(13, 2, 3))),
+        PrintInstr(Reg(10)),
+    ]
+
+
+def test_keep_operations_that_read_a_pending_result_apart():
+    program = Program(
+        instructions=[
+            *literals(2),
+            add(10, 0, 1),
+            add(11, 10, 1),
+            add(12, 0, 0),
+            add(13, 11, 12),
+        ]
+    )
+
+    items = pack_instructions(program, width=4)
+
+    assert items[2:] == [
+        add(10, 0, 1),
+        Pack(BinOp.Add, (add(11, 10, 1), add(12, 0, 0))),
+        add(13, 11, 12),
+    ]
+
+
+def test_split_pending_operations_into_vector_widths():
+    program = Program(
+        instructions=[*literals(2), *(add(10 + idx, 0, 1) for idx in range(7))]
+    )
+
+    items = pack_instructions(program, width=8)
+
+    assert [len(item.instrs) for item in items[2:-1]] == [4, 2]
+    assert items[-1] == add(16, 0, 1)
+
+
+def test_lay_out_results_and_distinct_operands_next_to_each_other():
+    items = [
+        Pack(BinOp.Add, (add(10, 0, 1), add(11, 2, 1))),
+        Pack(BinOp.Sub, (sub(12, 10, 2), sub(13, 11, 3))),
+    ]
+
+    block_by_reg = plan_slot_blocks(items)
+
+    assert block_by_reg[Reg(10)] == (Reg(10), Reg(11))
+    assert block_by_reg[Reg(12)] == (Reg(12), Reg(13))
+    assert block_by_reg[Reg(0)] == (Reg(0), Reg(2))
+    # `r1` is in both lanes, and `r2` is already laid out next to `r0`.
+    assert Reg(1) not in block_by_reg
+    assert Reg(3) not in block_by_reg
+
+
+def test_load_contiguous_operands_with_one_move():
+    instrs = vectorize_pack(
+        BinOp.Add,
+        [slot(-48), slot(-40)],
+        [slot(-16), slot(-8)],
+        [slot(-32), slot(-24)],
+        avx2=False,
+    )
+
+    assert instrs == [
+        Movdqu(Xmm.Xmm0, MemOffset(Size.XmmWordPtr, R.Rbp, -16)),
+        Movdqu(Xmm.Xmm1, MemOffset(Size.XmmWordPtr, R.Rbp, -32)),
+        Paddq(Xmm.Xmm0, Xmm.Xmm1),
+        Movdqu(MemOffset(Size.XmmWordPtr, R.Rbp, -48), Xmm.Xmm0),
+    ]
+
+
+def test_gather_one_scattered_operand():
+    instrs = vectorize_pack(
+        BinOp.Add,
+        [slot(-48), slot(-40)],
+        [slot(-16), slot(-8)],
+        [slot(-24), slot(-64)],
+        avx2=False,
+    )
+
+    assert [type(instr) for instr in instrs] == [Movdqu, Movq, Movhps, Paddq, Movdqu]
+
+
+def test_fall_back_to_scalar_code_when_packing_doesnt_pay_off():
+    both_scattered = vectorize_pack(
+        BinOp.Add,
+        [slot(-48), slot(-40)],
+        [slot(-8), slot(-24)],
+        [slot(-16), slot(-32)],
+        avx2=True,
+    )
+    scattered_results = vectorize_pack(
+        BinOp.Add,
+        [slot(-40), slot(-48)],
+        [slot(-16), slot(-8)],
+        [slot(-32), slot(-24)],
+        avx2=True,
+    )
+    wide_without_avx2 = vectorize_pack(
+        BinOp.Add,
+        [slot(-64), slot(-56), slot(-48), slot(-40)],
+        [slot(-32), slot(-24), slot(-16), slot(-8)],
+        [slot(-32), slot(-24), slot(-16), slot(-8)],
+        avx2=False,
+    )
+
+    assert both_scattered is None
+    assert scattered_results is None
+    assert wide_without_avx2 is None
+
+
+def test_broadcast_an_operand_in_every_lane():
+    instrs = vectorize_pack(
+        BinOp.Add,
+        [slot(-64), slot(-56), slot(-48), slot(-40)],
+        [slot(-32), slot(-24), slot(-16), slot(-8)],
+        [slot(-72)] * 4,
+        avx2=True,
+    )
+
+    assert instrs is not None
+    assert Vpaddq(Ymm.Ymm0, Ymm.Ymm0, Ymm.Ymm1) in instrs
+
+
+CHAINS = "".join(
+    f"a{idx} = {idx + 2} / 1\nx{idx} = {idx + 100} / 1\n" for idx in range(8)
+)
+CHAINS += "".join(f"x{idx} = x{idx} + a{idx}\n" for idx in range(8))
+CHAINS += "".join(f"print x{idx}\n" for idx in range(8))
+
+
+def lower(code: str, avx2: bool):
+    pass_manager = PassManager()
+    pass_manager.pipeline = Pipeline(
+        ir_passes=("cse", "copy-prop", "dce"),
+        codegen_options=dict(FULL_LOWERING, vectorize=True),
+        machine_passes=(),
+    )
+    ir_program = pass_manager.run_ir_passes(gen_unoptimized_ir_program(code))
+
+    return pass_manager.lower(ir_program, avx2=avx2)
+
+
+def test_vectorize_independent_chains():
+    sse2_instrs = lower(CHAINS, avx2=False).instructions
+    avx2_instrs = lower(CHAINS, avx2=True).instructions
+
+    assert sum(isinstance(instr, Paddq) for instr in sse2_instrs) == 4
+    assert sum(isinstance(instr, Vpaddq) for instr in avx2_instrs) == 2
+
+
+# Programs have no inputs, so -O2 folds every value before lowering, and only
+# pipelines without folding, like the one in `lower`, make packs.
+@pytest.mark.parametrize("avx2", [False, True])
+def test_vectorize_nothing_at_o2(avx2):
+    pass_manager = PassManager(2)
+    ir_program = pass_manager.run_ir_passes(pass_manager.gen_ir(CHAINS))
+    text = pass_manager.run_machine_passes(
+        pass_manager.lower(ir_program, avx2=avx2)
+    ).dump()
+
+    vector_reg = "ymm" if avx2 else "xmm"
+    assert "xmm" not in text and "ymm" not in text
+    assert vector_reg in lower(CHAINS, avx2=avx2).dump()
+
+
+def test_clear_upper_halves_before_calling_out():
+    instrs = lower(CHAINS, avx2=True).instructions
+    call_idx = next(idx for idx, instr in enumerate(instrs) if isinstance(instr, Call))
+
+    assert instrs[call_idx - 1] == Vzeroupper()
+    assert instrs.count(Vzeroupper()) == 1
+
+
+def test_lower_to_the_same_code_without_packs():
+    program = gen_unoptimized_ir_program("a = 1\nb = a * 3\nprint b / 2\n")
+
+    assert (
+        X86_64_CodeGen(program, vectorize=True).generate()
+        == X86_64_CodeGen(program).generate()
+    )
+
+
+needs_x86_64 = pytest.mark.skipif(
+    sys.platform != "linux" or platform.machine() != "x86_64",
+    reason="needs to execute x86-64 code",
+)
+
+
+def has_avx2() -> bool:
+    try:
+        return " avx2 " in Path("/proc/cpuinfo").read_text()
+    except OSError:
+        return False
+
+
+st_operands = st.sampled_from(["a", "b", "c", "d"]) | st.integers(
+    min_value=0, max_value=2**62
+).map(lambda value: f"({value} / 1)")
+
+st_statements = st.tuples(
+    st.sampled_from("abcd"), st_operands, st.sampled_from("+-*"), st_operands
+).map(lambda parts: f"{parts[0]} = {parts[1]} {parts[2]} {parts[3]}")
+
+
+@needs_x86_64
+@pytest.mark.parametrize(
+    "avx2",
+    [
+        False,
+        pytest.param(
+            True, marks=pytest.mark.skipif(not has_avx2(), reason="needs AVX2")
+        ),
+    ],
+)
+@given(
+    literals=st.lists(
+        st.integers(min_value=0, max_value=2**62), min_size=4, max_size=4
+    ),
+    statements=st.lists(st_statements, min_size=1, max_size=24),
+)
+@settings(max_examples=25, deadline=None)
+def test_match_ir_semantics(avx2, literals, statements):
+    lines = [f"{name} = {value} / 1" for name, value in zip("abcd", literals)]
+    lines += statements
+    lines += [f"print {name}" for name in "abcd"]
+    code = "\n".join(lines) + "\n"
+
+    program = lower(code, avx2)
+
+    assert jit_run(program) == run_minic(code, opt_level=0)
+    assert jit_run(schedule_instructions(program)) == run_minic(code, opt_level=0)
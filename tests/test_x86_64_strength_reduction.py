@@ -0,0 +1,155 @@
+import hypothesis.strategies as st
+from hypothesis import given
+from minic.ir import wrap_int64
+from minic.x86_64 import (Add, Imm, Imul, Lea, Mov, Neg, R, Sar, ScaledIndex,
+                          Shl, Shr)
+from minic.x86_64_interp import X86_64_Interp
+from minic.x86_64_strength_reduction import (IMUL_COST, div_by_const_instrs,
+                                             div_magic, mul_by_const_instrs,
+                                             seq_cost)
+
+
+def st_int64s():
+    return st.integers(min_value=-(2**63), max_value=2**63 - 1)
+
+
+def test_mul_by_power_of_two_is_a_shift():
+    assert mul_by_const_instrs(8) == (Shl(R.Rax, Imm(3)),)
+
+
+def test_mul_by_lea_factor_is_a_single_lea():
+    assert mul_by_const_instrs(5) == (Lea(R.Rax, ScaledIndex(R.Rax, R.Rax, 4)),)
+
+
+def test_mul_by_ten_is_lea_then_shift():
+    assert mul_by_const_instrs(10) == (
+        Lea(R.Rax, ScaledIndex(R.Rax, R.Rax, 4)),
+        Shl(R.Rax, Imm(1)),
+    )
+
+
+def test_mul_by_one_is_a_no_op():
+    assert mul_by_const_instrs(1) == ()
+
+
+def test_mul_by_negative_power_of_two_is_shift_then_neg():
+    assert mul_by_const_instrs(-4) == (Shl(R.Rax, Imm(2)), Neg(R.Rax))
+
+
+def test_mul_by_zero_clears_the_register():
+    assert mul_by_const_instrs(0) == (Mov(R.Rax, Imm(0)),)
+
+
+def test_mul_falls_back_to_imul_when_decomposition_is_not_cheaper():
+    assert mul_by_const_instrs(1234567) is None
+    assert mul_by_const_instrs(2**64) is None
+
+
+def test_decompositions_are_cheaper_than_imul():
+    for value in range(-1000, 1000):
+        instrs = mul_by_const_instrs(value)
+        if instrs is not None:
+            assert seq_cost(instrs) < IMUL_COST
+
+
+@given(x=st_int64s(), value=st.integers(min_value=-1100, max_value=1100))
+def test_mul_decomposition_matches_wrapping_multiplication(x, value):
+    instrs = mul_by_const_instrs(value)
+    if instrs is None:
+        return
+
+    interp = X86_64_Interp({R.Rax: x}).run(instrs)
+
+    assert interp.get(R.Rax) == wrap_int64(x * value)
+
+
+@given(x=st_int64s(), shift=st.integers(min_value=0, max_value=62))
+def test_mul_by_large_powers_of_two_wraps(x, shift):
+    interp = X86_64_Interp({R.Rax: x}).run(mul_by_const_instrs(2**shift))
+
+    assert interp.get(R.Rax) == wrap_int64(x * 2**shift)
+
+
+INT64_EDGES = [
+    -(2**63),
+    -(2**63) + 1,
+    -(2**62),
+    -(2**32),
+    -1000,
+    -7,
+    -1,
+    0,
+    1,
+    7,
+    1000,
+    2**32,
+    2**62,
+    2**63 - 1,
+]
+
+
+def st_divisors():
+    return st.one_of(
+        st.integers(min_value=-1000, max_value=1000),
+        st.sampled_from([2**k for k in range(63)] + [-(2**k) for k in range(64)]),
+        st_int64s(),
+    ).filter(lambda divisor: divisor != 0)
+
+
+def test_div_by_power_of_two_uses_arithmetic_shift():
+    assert div_by_const_instrs(4) == (
+        Mov(R.Rdx, R.Rax),
+        Sar(R.Rdx, Imm(63)),
+        Shr(R.Rdx, Imm(62)),
+        Add(R.Rax, R.Rdx),
+        Sar(R.Rax, Imm(2)),
+    )
+
+
+def test_div_by_magic_number_uses_multiply_high():
+    magic, shift = div_magic(7)
+
+    assert (magic, shift) == (5270498306774157605, 1)
+    assert div_by_const_instrs(7) == (
+        Mov(R.Rcx, R.Rax),
+        Mov(R.Rax, Imm(magic)),
+        Imul(R.Rcx),
+        Sar(R.Rdx, Imm(1)),
+        Mov(R.Rax, R.Rdx),
+        Shr(R.Rax, Imm(63)),
+        Add(R.Rax, R.Rdx),
+    )
+
+
+def test_div_by_zero_keeps_idiv():
+    assert div_by_const_instrs(0) is None
+
+
+def test_div_by_const_matches_c_division_for_a_range_of_inputs():
+    for divisor in range(-300, 301):
+        if divisor == 0:
+            continue
+
+        instrs = div_by_const_instrs(divisor)
+        for x in [*INT64_EDGES, *range(-1000, 1001, 37)]:
+            if (x, divisor) == (-(2**63), -1):
+                continue
+
+            interp = X86_64_Interp({R.Rax: x}).run(instrs)
+
+            assert interp.get(R.Rax) == _c_div(x, divisor), (x, divisor)
+
+
+@given(x=st_int64s(), divisor=st_divisors())
+def test_div_by_const_matches_c_division(x, divisor):
+    if (x, divisor) == (-(2**63), -1):
+        return
+
+    interp = X86_64_Interp({R.Rax: x}).run(div_by_const_instrs(divisor))
+
+    assert interp.get(R.Rax) == _c_div(x, divisor)
+
+
+def _c_div(x, divisor):
+    quotient = abs(x) // abs(divisor)
+    return quotient if (x < 0) == (divisor < 0) else -quotient
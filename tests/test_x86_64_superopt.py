@@ -0,0 +1,65 @@
+import random
+
+from minic.x86_64 import Add, Imm, Lea, Neg, R, ScaledIndex, Shl
+from minic.x86_64_strength_reduction import (IMUL_COST, MUL_TABLE_PATH,
+                                             decompose_mul_by_const,
+                                             mul_by_const_instrs,
+                                             read_mul_table, seq_cost, seq_key)
+from minic.x86_64_superopt import (build_mul_table, gen_inputs,
+                                   search_mul_sequences, verify_mul_sequence,
+                                   write_mul_table)
+
+SMALL_INPUTS = [*range(-16, 17), -(2**63), 2**63 - 1, 0x123456789ABCDEF]
+
+
+def test_search_finds_single_instruction_multiplications():
+    best_by_value = search_mul_sequences(max_cost=1, max_length=2)
+
+    assert best_by_value[9] == (Lea(R.Rax, ScaledIndex(R.Rax, R.Rax, 8)),)
+    assert best_by_value[2**10] == (Shl(R.Rax, Imm(10)),)
+    assert best_by_value[-1] == (Neg(R.Rax),)
+    assert 7 not in best_by_value
+
+
+def test_verify_multiplications_against_the_ir():
+    inputs = gen_inputs(random.Random(0))
+
+    assert verify_mul_sequence(2, (Shl(R.Rax, Imm(1)),), inputs)
+    assert not verify_mul_sequence(3, (Shl(R.Rax, Imm(1)),), inputs)
+
+
+def test_reject_sequences_that_read_the_scratch_register_first():
+    assert not verify_mul_sequence(2, (Add(R.Rax, R.Rdx),), SMALL_INPUTS)
+
+
+def test_write_and_read_back_a_table(tmp_path):
+    table = build_mul_table(max_cost=1, max_length=2)
+    path = tmp_path / "table.json"
+    write_mul_table(table, path)
+
+    assert table
+    assert read_mul_table(path) == table
+
+
+def test_ignore_missing_tables_and_tables_of_other_versions(tmp_path):
+    path = tmp_path / "table.json"
+    path.write_text('{"version": 0, "mul": {"3": [["neg", "rax"]]}}')
+
+    assert read_mul_table(path) == {}
+    assert read_mul_table(tmp_path / "missing.json") == {}
+
+
+def test_shipped_table_beats_the_decompositions():
+    table = read_mul_table(MUL_TABLE_PATH)
+
+    assert table
+    for value, instrs in table.items():
+        decomposed = decompose_mul_by_const(value)
+        assert seq_cost(instrs) < IMUL_COST
+        assert decomposed is None or seq_key(instrs) < seq_key(decomposed)
+        assert verify_mul_sequence(value, instrs, SMALL_INPUTS)
+
+
+def test_strength_reduction_uses_the_table():
+    assert decompose_mul_by_const(-7) is None
+    assert mul_by_const_instrs(-7) == read_mul_table(MUL_TABLE_PATH)[-7]